@@ -0,0 +1,230 @@
+'''Golfer performance analytics backed by monthly rollups
+
+Dashboards only ever read golfer_monthly_stats, which holds one row per
+golfer per month. Rows are bumped as each hole is posted and can be rebuilt
+from rounds_strokes with one grouped query.
+'''
+
+from datetime import date
+
+from sqlalchemy import case, func, extract, insert, literal
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Round, RoundCourse, RoundStroke, CourseHole, GolferMonthlyStat
+
+
+COUNTER_COLUMNS = ('rounds', 'holes', 'strokes', 'fairway_opportunities',
+                   'fairways_hit', 'greens_in_reg', 'putts', 'scramble_attempts',
+                   'scrambles', 'par3_holes', 'par3_strokes', 'par4_holes',
+                   'par4_strokes', 'par5_holes', 'par5_strokes')
+
+
+def _month(day):
+    return date(day.year, day.month, 1)
+
+
+def stroke_counters(strokes, par, fairway_hit, green_in_reg, putts, first_hole=False):
+    '''Rollup increments for a single posted hole.'''
+    counters = dict.fromkeys(COUNTER_COLUMNS, 0)
+    counters['rounds'] = 1 if first_hole else 0
+    counters['holes'] = 1
+    counters['strokes'] = strokes
+    counters['putts'] = putts or 0
+    counters['greens_in_reg'] = 1 if green_in_reg else 0
+    if par is not None:
+        if par >= 4:
+            counters['fairway_opportunities'] = 1
+            counters['fairways_hit'] = 1 if fairway_hit else 0
+        if not green_in_reg:
+            counters['scramble_attempts'] = 1
+            counters['scrambles'] = 1 if strokes <= par else 0
+        if par in (3, 4, 5):
+            counters[f'par{par}_holes'] = 1
+            counters[f'par{par}_strokes'] = strokes
+    return counters
+
+
+def record_round_stroke(round_stroke, previous=None):
+    '''Add a newly posted RoundStroke to its golfer's monthly rollup.
+
+    For a corrected hole, `previous` is a dict of the hole's old strokes,
+    fairway_hit, green_in_reg and number_of_putts and only the difference
+    is applied.
+    '''
+    if round_stroke.strokes is None:
+        return
+    context = db.session.query(Round.date_of_round, CourseHole.par).select_from(
+        RoundCourse).join(Round, Round.round_id == RoundCourse.round_id).outerjoin(
+        CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+        & (CourseHole.number == round_stroke.hole_number)).filter(
+        RoundCourse.round_course_id == round_stroke.round_course_id).first()
+    if context is None or context.date_of_round is None:
+        return
+
+    first_hole = previous is None and db.session.query(RoundStroke.id).filter(
+        RoundStroke.golfer_id == round_stroke.golfer_id,
+        RoundStroke.round_course_id == round_stroke.round_course_id,
+        RoundStroke.date_of_round == context.date_of_round,
+        RoundStroke.id != round_stroke.id).first() is None
+    counters = stroke_counters(round_stroke.strokes, context.par,
+                               round_stroke.fairway_hit, round_stroke.green_in_reg,
+                               round_stroke.number_of_putts, first_hole)
+    if previous is not None and previous['strokes'] is not None:
+        old = stroke_counters(previous['strokes'], context.par, previous['fairway_hit'],
+                              previous['green_in_reg'], previous['number_of_putts'])
+        counters = {column: value - old[column] for column, value in counters.items()}
+
+    values = {getattr(GolferMonthlyStat, column): getattr(GolferMonthlyStat, column) + value
+              for column, value in counters.items() if value}
+    if not values:
+        # Re-posted with the same values, nothing to add
+        return
+    month = _month(context.date_of_round)
+    row = GolferMonthlyStat.query.filter_by(golfer_id=round_stroke.golfer_id, month=month)
+    if row.update(values, synchronize_session=False):
+        db.session.commit()
+        return
+    db.session.add(GolferMonthlyStat(
+        golfer_id=round_stroke.golfer_id, month=month, **counters))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the row first
+        db.session.rollback()
+        row.update(values, synchronize_session=False)
+        db.session.commit()
+
+
+def rebuild_rollups(golfer_id=None):
+    '''Recompute monthly rollups from rounds_strokes in one grouped query.
+
+    Rebuilds every golfer unless `golfer_id` is given.
+    '''
+    par = CourseHole.par
+    missed_green = func.coalesce(RoundStroke.green_in_reg, False) == False  # noqa: E712
+
+    def tally(condition, value=1):
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+    year = extract('year', Round.date_of_round)
+    month = extract('month', Round.date_of_round)
+    query = db.session.query(
+        RoundStroke.golfer_id, year, month,
+        func.count(func.distinct(RoundStroke.round_course_id)),
+        func.count(),
+        func.coalesce(func.sum(RoundStroke.strokes), 0),
+        tally(par >= 4),
+        tally((par >= 4) & (RoundStroke.fairway_hit == True)),  # noqa: E712
+        tally(RoundStroke.green_in_reg == True),  # noqa: E712
+        func.coalesce(func.sum(RoundStroke.number_of_putts), 0),
+        tally(par.isnot(None) & missed_green),
+        tally(missed_green & (RoundStroke.strokes <= par)),
+        tally(par == 3), tally(par == 3, RoundStroke.strokes),
+        tally(par == 4), tally(par == 4, RoundStroke.strokes),
+        tally(par == 5), tally(par == 5, RoundStroke.strokes),
+    ).join(RoundCourse, RoundCourse.round_course_id == RoundStroke.round_course_id
+           ).join(Round, Round.round_id == RoundCourse.round_id).outerjoin(
+        CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+        & (CourseHole.number == RoundStroke.hole_number)).filter(
+        RoundStroke.strokes.isnot(None), Round.date_of_round.isnot(None))
+
+    existing = GolferMonthlyStat.query
+    if golfer_id is not None:
+        query = query.filter(RoundStroke.golfer_id == golfer_id)
+        existing = existing.filter_by(golfer_id=golfer_id)
+
+    rows = [{'golfer_id': row[0], 'month': date(int(row[1]), int(row[2]), 1),
+             **{column: int(value) for column, value in zip(COUNTER_COLUMNS, row[3:])}}
+            for row in query.group_by(RoundStroke.golfer_id, year, month)]
+
+    existing.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(GolferMonthlyStat), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    return round(numerator * scale / denominator, 3) if denominator else None
+
+
+def summarize(counters):
+    '''Dashboard stats from summed rollup counters.'''
+    return {
+        'rounds': counters['rounds'],
+        'holes': counters['holes'],
+        'scoring_average': _ratio(counters['strokes'], counters['holes'], 18),
+        'fairways_hit_pct': _ratio(counters['fairways_hit'],
+                                   counters['fairway_opportunities'], 100),
+        'greens_in_reg_pct': _ratio(counters['greens_in_reg'], counters['holes'], 100),
+        'putts_per_round': _ratio(counters['putts'], counters['holes'], 18),
+        'scrambling_pct': _ratio(counters['scrambles'],
+                                 counters['scramble_attempts'], 100),
+        'par3_average': _ratio(counters['par3_strokes'], counters['par3_holes']),
+        'par4_average': _ratio(counters['par4_strokes'], counters['par4_holes']),
+        'par5_average': _ratio(counters['par5_strokes'], counters['par5_holes']),
+    }
+
+
+def golfer_trend(golfer_id, months=12):
+    '''Month-by-month stats for a golfer, oldest first.'''
+    rows = GolferMonthlyStat.query.filter_by(golfer_id=golfer_id).order_by(
+        GolferMonthlyStat.month.desc()).limit(months).all()
+    trend = []
+    for row in reversed(rows):
+        counters = {column: getattr(row, column) or 0 for column in COUNTER_COLUMNS}
+        trend.append({'month': row.month.isoformat(), **summarize(counters)})
+    return trend
+
+
+# Metrics ranked against the field, and whether a higher value is better
+PERCENTILE_METRICS = {
+    'scoring_average': False,
+    'fairways_hit_pct': True,
+    'greens_in_reg_pct': True,
+    'putts_per_round': False,
+    'scrambling_pct': True,
+}
+
+
+def field_percentiles(golfer_id, since=None):
+    '''Where a golfer ranks against every golfer with rollups (0-100, higher is better).
+
+    Sums each golfer's rollups since `since` and ranks them with PERCENT_RANK
+    in the database, so only one row comes back.
+    '''
+    def total(column):
+        return func.sum(getattr(GolferMonthlyStat, column))
+
+    def ratio(numerator, denominator, scale):
+        return total(numerator) * literal(scale) / func.nullif(total(denominator), 0)
+
+    per_golfer = db.session.query(
+        GolferMonthlyStat.golfer_id.label('golfer_id'),
+        ratio('strokes', 'holes', 18.0).label('scoring_average'),
+        ratio('fairways_hit', 'fairway_opportunities', 100.0).label('fairways_hit_pct'),
+        ratio('greens_in_reg', 'holes', 100.0).label('greens_in_reg_pct'),
+        ratio('putts', 'holes', 18.0).label('putts_per_round'),
+        ratio('scrambles', 'scramble_attempts', 100.0).label('scrambling_pct'),
+    )
+    if since is not None:
+        per_golfer = per_golfer.filter(GolferMonthlyStat.month >= _month(since))
+    per_golfer = per_golfer.group_by(GolferMonthlyStat.golfer_id).subquery()
+
+    # Golfers with no data for a metric are ranked in a partition of their
+    # own, so they don't count as the best (or worst) in the field
+    ranked = db.session.query(
+        per_golfer,
+        *[func.percent_rank().over(
+            partition_by=per_golfer.c[metric].is_(None),
+            order_by=per_golfer.c[metric].asc() if higher_is_better
+            else per_golfer.c[metric].desc()).label(f'{metric}_rank')
+          for metric, higher_is_better in PERCENTILE_METRICS.items()]
+    ).subquery()
+
+    row = db.session.query(ranked).filter(ranked.c.golfer_id == golfer_id).first()
+    if row is None:
+        return {}
+    return {metric: round(float(getattr(row, f'{metric}_rank')) * 100, 1)
+            if getattr(row, metric) is not None else None
+            for metric in PERCENTILE_METRICS}
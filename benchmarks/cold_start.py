@@ -0,0 +1,104 @@
+'''Cold start benchmark for the app factory
+
+Measures, each in a fresh interpreter:
+  - importing app.py
+  - create_app() with blueprints registered lazily, and with every view
+    module loaded up front (what a preloading gunicorn master does)
+  - the first request to one route of each blueprint, which is where the
+    lazily loaded view modules get imported
+
+Run from the repository root:
+
+    python benchmarks/cold_start.py --runs 7
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One cheap route per blueprint, requested with the test client
+FIRST_REQUESTS = {
+    'auth': '/login',
+    'golfers': '/all_golfers',
+    'courses': '/search_course',
+    'rounds': '/api/exports/rounds',
+    'results': '/api/tournaments/1/hole_stats',
+    'notifications': '/mark_notification_as_read/1',
+}
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({'SECRET_KEY': 'benchmark', 'WTF_CSRF_ENABLED': False})
+if sys.argv[1] == 'eager':
+    from views import load_all
+    load_all(app)
+created = time.perf_counter()
+timings = {'import': imported - started, 'create_app': created - imported,
+           'modules': len(sys.modules)}
+if sys.argv[1] == 'requests':
+    from models import db
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    for blueprint, path in json.loads(sys.argv[2]).items():
+        before = time.perf_counter()
+        client.open(path, method='POST' if 'mark_' in path else 'GET')
+        first = time.perf_counter()
+        client.open(path, method='POST' if 'mark_' in path else 'GET')
+        timings[blueprint] = {'first': first - before,
+                              'second': time.perf_counter() - first}
+print(json.dumps(timings))
+'''
+
+
+def probe(mode, env):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, mode, json.dumps(FIRST_REQUESTS)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median_ms(samples, *keys):
+    values = []
+    for sample in samples:
+        for key in keys:
+            sample = sample[key]
+        values.append(sample)
+    return round(statistics.median(values) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-url', default='sqlite://',
+                        help='DATABASE_URL for the probes (no queries run at startup)')
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=args.database_url)
+    env.pop('REPLICA_DATABASE_URL', None)
+
+    results = {mode: [probe(mode, env) for _ in range(args.runs)]
+               for mode in ('lazy', 'eager', 'requests')}
+
+    print(f'median of {args.runs} runs, milliseconds')
+    for mode in ('lazy', 'eager'):
+        print(f"{mode:>6}: import {median_ms(results[mode], 'import')}  "
+              f"create_app {median_ms(results[mode], 'create_app')}  "
+              f"modules {statistics.median(r['modules'] for r in results[mode])}")
+    print('first / second request per blueprint (lazy):')
+    for blueprint in FIRST_REQUESTS:
+        print(f"  {blueprint:<14} {median_ms(results['requests'], blueprint, 'first'):>8} "
+              f"{median_ms(results['requests'], blueprint, 'second'):>8}")
+
+
+if __name__ == '__main__':
+    main()
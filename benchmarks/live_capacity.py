@@ -0,0 +1,231 @@
+'''Spectator connection capacity: sync gunicorn workers vs the ASGI live app
+
+Each server runs as a single worker pinned to one CPU, so the numbers are
+per core. N "slow spectators" request the leaderboard over a slow link:
+they send their request headers a line at a time over --hold seconds,
+then read the response, and repeat. Meanwhile a probe client makes a
+normal leaderboard request every 100ms. A server can handle N spectators
+if the probe's p99 latency stays under --slo seconds with no failures.
+
+--endpoint picks the route under test: the leaderboard or the hole stats.
+Needs a Postgres DATABASE_URL (the live app uses asyncpg). --seed creates
+the tables and a 150 golfer tournament, with field stats for 18 holes,
+first. Run from the repository root:
+
+    SECRET_KEY=bench DATABASE_URL=postgresql:///shore_bench \
+        python benchmarks/live_capacity.py --seed
+'''
+
+import argparse
+import asyncio
+import os
+import resource
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each mode runs under its own deployment config, cut down to one worker
+SERVERS = {
+    'sync': ['gunicorn', '-c', 'gunicorn.conf.py', '--worker-class', 'sync'],
+    'gthread': ['gunicorn', '-c', 'gunicorn.conf.py', '--worker-class', 'gthread',
+                '--threads', '32'],
+    'asgi': ['gunicorn', '-c', 'gunicorn_live.conf.py'],
+}
+
+ENDPOINTS = {
+    'leaderboard': '/api/tournaments/{tournament_id}/leaderboard',
+    'hole_stats': '/api/tournaments/{tournament_id}/hole_stats',
+}
+
+HEADER_LINES = ['Host: localhost', 'User-Agent: live-capacity', 'Accept: application/json',
+                'Accept-Encoding: identity', 'Cache-Control: no-cache']
+
+
+def seed(database_url):
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from models import db, Club, Course, Golfer, HoleFieldStat, Leaderboard, Tournament
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.create_all()
+        if Tournament.query.get(1) is None:
+            db.session.add(Tournament(tournament_id=1, name='Benchmark Invitational',
+                                      type='tournament'))
+            for golfer_id in range(1, 151):
+                db.session.add(Golfer(golfer_id=golfer_id, golfer_name=f'Golfer {golfer_id}',
+                                      username=f'bench{golfer_id}', password='x',
+                                      email=f'bench{golfer_id}@example.com'))
+            db.session.flush()
+            for golfer_id in range(1, 151):
+                db.session.add(Leaderboard(tournament_id=1, golfer_id=golfer_id,
+                                           score=270 + golfer_id % 11, position=golfer_id,
+                                           holes_played=54))
+            db.session.add(Club(club_id=1))
+            db.session.add(Course(course_id=1, club_id=1))
+            db.session.flush()
+            for hole_number in range(1, 19):
+                par = (4, 4, 3, 5)[hole_number % 4]
+                db.session.add(HoleFieldStat(
+                    tournament_id=1, course_id=1, hole_number=hole_number, par=par,
+                    holes_played=450, total_strokes=450 * par + 90, total_putts=810,
+                    eagles=2, birdies=60, pars=250, bogeys=110, double_bogeys=28))
+            db.session.commit()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, cpu):
+    def pin():
+        os.setpgrp()
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {cpu})
+
+    server = subprocess.Popen(
+        SERVERS[kind] + ['--workers', '1', '--bind', f'127.0.0.1:{port}', '--timeout', '120',
+                         '--log-level', 'warning'],
+        cwd=ROOT, preexec_fn=pin)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+async def request(port, path, hold=0.0, timeout=30.0):
+    '''One GET, trickling the headers over `hold` seconds. Returns the status.'''
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\n'.encode())
+        for line in HEADER_LINES + ['Connection: close']:
+            if hold:
+                await writer.drain()
+                await asyncio.sleep(hold / (len(HEADER_LINES) + 1))
+            writer.write(f'{line}\r\n'.encode())
+        writer.write(b'\r\n')
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        return int(response.split(b' ', 2)[1]) if response else None
+    finally:
+        writer.close()
+
+
+async def spectator(port, path, hold, stop, completed):
+    while not stop.is_set():
+        try:
+            if await request(port, path, hold) == 200:
+                completed.append(1)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            await asyncio.sleep(0.1)
+
+
+async def probe(port, path, stop, latencies, failures, timeout):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            status = await request(port, path, timeout=timeout)
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures.append(status)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            failures.append(type(e).__name__)
+        await asyncio.sleep(0.1)
+
+
+async def run_level(port, path, spectators, hold, duration, slo):
+    stop = asyncio.Event()
+    completed, latencies, failures = [], [], []
+    tasks = [asyncio.create_task(spectator(port, path, hold, stop, completed))
+             for _ in range(spectators)]
+    await asyncio.sleep(min(hold, 1.0))
+    probe_task = asyncio.create_task(probe(port, path, stop, latencies, failures, slo * 10))
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.wait([probe_task], timeout=slo * 10)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else None
+    return {'spectators': spectators,
+            'spectator_requests_per_s': round(len(completed) / duration, 1),
+            'probe_p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            'probe_p99_ms': round(p99 * 1000, 1) if p99 is not None else None,
+            'probe_failures': len(failures),
+            'ok': bool(latencies) and not failures and p99 <= slo}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--levels', nargs='+', type=int, default=[1, 8, 32, 128, 512, 1024])
+    parser.add_argument('--hold', type=float, default=2.0,
+                        help='Seconds each spectator takes to send its request')
+    parser.add_argument('--duration', type=float, default=8.0, help='Seconds per level')
+    parser.add_argument('--slo', type=float, default=0.5, help='Probe p99 target in seconds')
+    parser.add_argument('--cpu', type=int, default=0, help='CPU the server is pinned to')
+    parser.add_argument('--tournament-id', type=int, default=1)
+    parser.add_argument('--endpoint', default='leaderboard', choices=list(ENDPOINTS))
+    parser.add_argument('--seed', action='store_true')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL', '').startswith('postgres'):
+        parser.error('set DATABASE_URL to a Postgres database')
+    if args.seed:
+        seed(os.environ['DATABASE_URL'])
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    path = ENDPOINTS[args.endpoint].format(tournament_id=args.tournament_id)
+
+    capacity = {}
+    for kind in args.servers:
+        port = free_port()
+        server = start_server(kind, port, args.cpu)
+        try:
+            print(f'\n{kind} (1 worker, CPU {args.cpu}), {path}')
+            print(f"{'spectators':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'fails':>6}")
+            capacity[kind] = 0
+            for level in args.levels:
+                result = asyncio.run(run_level(port, path, level, args.hold,
+                                               args.duration, args.slo))
+                print(f"{result['spectators']:>10} {result['spectator_requests_per_s']:>8} "
+                      f"{result['probe_p50_ms']!s:>8} {result['probe_p99_ms']!s:>8} "
+                      f"{result['probe_failures']:>6}")
+                if not result['ok']:
+                    break
+                capacity[kind] = level
+        finally:
+            stop_server(server)
+
+    print(f'\nslow spectators per core with probe p99 under {args.slo}s:')
+    for kind, spectators in capacity.items():
+        print(f'  {kind:<8} {spectators}')
+
+
+if __name__ == '__main__':
+    main()
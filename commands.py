@@ -0,0 +1,95 @@
+'''Flask CLI commands
+
+The modules behind each command (numpy, pyarrow...) are imported when the
+command runs, not when the app is created.
+'''
+
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups():
+        """Recompute golfer monthly stat rollups from rounds_strokes."""
+        import analytics
+        print(f'Rebuilt {analytics.rebuild_rollups()} golfer months')
+
+    @app.cli.command('export-rounds')
+    @click.argument('output_dir')
+    @click.option('--format', 'export_format', type=click.Choice(('parquet', 'arrow')), default='parquet')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='First date_of_round to include')
+    @click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last date_of_round to include')
+    @click.option('--golfer', 'golfer_ids', type=int, multiple=True, help='Only export these golfer ids')
+    @click.option('--batch-size', type=int, default=50000)
+    def export_rounds(output_dir, export_format, start, end, golfer_ids, batch_size):
+        """Export rounds and strokes partitioned by season and course."""
+        import exports
+        stats = exports.export_dataset(
+            output_dir, format=export_format, batch_size=batch_size,
+            start_date=start.date() if start else None,
+            end_date=end.date() if end else None,
+            golfer_ids=list(golfer_ids))
+        print(f"Exported {stats['rows']} rows in {stats['seconds']}s "
+              f"({stats['rows_per_second']} rows/s)")
+
+    @app.cli.command('create-partitions')
+    @click.option('--ahead', type=int, default=1, help='How many future seasons to create')
+    def create_partitions(ahead):
+        """Create season partitions for rounds and rounds_strokes."""
+        import partitions
+        created = partitions.create_partitions(ahead=ahead)
+        print(f"Created {', '.join(created)}" if created else 'All partitions already exist')
+
+    @app.cli.command('archive-seasons')
+    @click.argument('archive_dir')
+    @click.option('--keep', type=int, default=3, help='How many recent seasons stay live')
+    @click.option('--detach-only', is_flag=True, help='Keep detached partitions instead of dropping them')
+    def archive_seasons(archive_dir, keep, detach_only):
+        """Archive old seasons of rounds and rounds_strokes to Parquet."""
+        import partitions
+        archived = partitions.archive_old_seasons(keep, archive_dir, drop=not detach_only)
+        for partition, rows in archived.items():
+            print(f'Archived {rows} rows from {partition}')
+
+    @app.cli.command('replay-scores')
+    @click.argument('tournament_id', type=int)
+    @click.option('--from-start', is_flag=True, help='Ignore and rewrite existing checkpoints')
+    def replay_scores(tournament_id, from_start):
+        """Rebuild a tournament's leaderboard from its score events."""
+        import time
+        import score_events
+        started = time.perf_counter()
+        standings = score_events.rebuild_leaderboard(
+            tournament_id, use_checkpoints=not from_start)
+        print(f'Replayed {len(standings)} golfers in {time.perf_counter() - started:.2f}s')
+
+    @app.cli.command('checkpoint-scores')
+    @click.argument('tournament_id', type=int)
+    def checkpoint_scores(tournament_id):
+        """Write score replay checkpoints for events since the last one."""
+        import score_events
+        state = score_events.write_checkpoints(tournament_id)
+        print(f'Checkpointed tournament {tournament_id} through event {state.event_id}')
+
+    @app.cli.command('finalize-standings')
+    @click.argument('tournament_id', type=int)
+    @click.option('--cut-top-n', type=int, help='Golfers inside this position (ties included) make the cut')
+    @click.option('--cut-within', type=int, help='Golfers within this many strokes of the lead make the cut')
+    @click.option('--after-round', type=int, default=2, help='Round the cut is made after')
+    def finalize_standings(tournament_id, cut_top_n, cut_within, after_round):
+        """Rank a tournament from its golfer rounds and store the result."""
+        import tournament_scoring
+        cut_rule = tournament_scoring.CutRule(cut_top_n, cut_within, after_round) \
+            if cut_top_n is not None or cut_within is not None else None
+        result = tournament_scoring.finalize_standings(tournament_id, cut_rule)
+        if result is None:
+            raise click.ClickException(f'No tournament {tournament_id}')
+        print(f"Finalized {len(result.leaderboard['rows'])} golfers into results {result.results_id}")
+
+    @app.cli.command('rebuild-field-stats')
+    @click.argument('tournament_id', type=int)
+    def rebuild_field_stats(tournament_id):
+        """Recompute a tournament's hole field stats from rounds_strokes."""
+        import field_stats
+        print(f'Rebuilt {field_stats.rebuild_field_stats(tournament_id)} holes')
@@ -0,0 +1,121 @@
+'''Send read-only requests to a replica database and writes to the primary
+
+Routes marked with @read_only run their queries against the 'replica' bind
+(SQLALCHEMY_BINDS['replica']) when one is configured. Everything else, and
+anything that flushes or executes DML, uses the primary. After a request
+writes, the client reads from the primary for REPLICA_STICKY_SECONDS so a
+golfer always sees the score they just posted. If the replica falls more
+than REPLICA_MAX_LAG seconds behind, or can't be reached, reads go back to
+the primary until it catches up.
+'''
+
+from functools import wraps
+from threading import Lock
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'primary_until'
+
+_lag = {'checked_at': 0.0, 'lag': None}
+_lag_lock = Lock()
+
+POSTGRES_LAG_QUERY = text(
+    'SELECT CASE WHEN NOT pg_is_in_recovery() '
+    'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END')
+
+
+def _is_write(clause):
+    return clause is not None and getattr(clause, 'is_dml', False)
+
+
+def _is_replica_safe(clause):
+    # Raw text() could be anything, so only ORM and Core selects are routed
+    return not _is_write(clause) and not isinstance(clause, TextClause)
+
+
+class RoutingSession(Session):
+    '''Session that picks the replica engine for reads in read-only requests.'''
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _is_replica_safe(clause) \
+                and use_replica():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+
+        if has_request_context() and (self._flushing or _is_write(clause)):
+            g.db_wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    '''Mark a view as safe to serve from the replica.'''
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def use_replica():
+    '''Whether reads in the current request should go to the replica.'''
+    if not has_request_context() or not g.get('read_only') or g.get('db_wrote'):
+        return False
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    sticky_until = request.cookies.get(STICKY_COOKIE, type=float)
+    if sticky_until and sticky_until > time.time():
+        return False
+    lag = replica_lag()
+    return lag is not None and lag <= current_app.config['REPLICA_MAX_LAG']
+
+
+def measure_replica_lag(engine):
+    '''Seconds the replica is behind the primary, or None if it can't be reached.'''
+    try:
+        with engine.connect() as connection:
+            if engine.dialect.name == 'postgresql':
+                return float(connection.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+            # Other backends (e.g. a SQLite file copy for local testing) have
+            # no replication to measure, only whether the replica answers.
+            connection.execute(text('SELECT 1'))
+            return 0.0
+    except Exception:
+        current_app.logger.warning('Replica lag check failed', exc_info=True)
+        return None
+
+
+def replica_lag():
+    '''Last measured replica lag, re-measured every REPLICA_LAG_CHECK_INTERVAL.'''
+    interval = current_app.config['REPLICA_LAG_CHECK_INTERVAL']
+    if time.monotonic() - _lag['checked_at'] > interval and _lag_lock.acquire(blocking=False):
+        try:
+            engine = current_app.extensions['sqlalchemy'].engines.get(REPLICA_BIND)
+            _lag['lag'] = measure_replica_lag(engine) if engine is not None else None
+            _lag['checked_at'] = time.monotonic()
+        finally:
+            _lag_lock.release()
+    return _lag['lag']
+
+
+def _remember_writes(response):
+    if g.get('db_wrote'):
+        sticky = current_app.config['REPLICA_STICKY_SECONDS']
+        response.set_cookie(STICKY_COOKIE, str(time.time() + sticky),
+                            max_age=int(sticky) + 1, httponly=True, samesite='Lax')
+    return response
+
+
+def init_routing(app):
+    '''Set replica defaults and turn on read-your-writes stickiness for `app`.'''
+    app.config.setdefault('REPLICA_MAX_LAG', 5.0)
+    app.config.setdefault('REPLICA_STICKY_SECONDS', 10.0)
+    app.config.setdefault('REPLICA_LAG_CHECK_INTERVAL', 5.0)
+    app.after_request(_remember_writes)
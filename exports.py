@@ -0,0 +1,200 @@
+'''Columnar (Parquet / Arrow IPC) export of rounds and strokes
+
+Rows are read through a server-side cursor in fixed size batches and each
+batch is converted straight into an Arrow record batch, so memory stays flat
+no matter how many strokes are exported.
+'''
+
+import time
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select, extract
+
+from models import db, Round, RoundCourse, RoundStroke
+
+
+BATCH_SIZE = 50000
+FORMATS = ('parquet', 'arrow')
+
+# One row per hole played, flattened from rounds, rounds_courses and rounds_strokes
+SCHEMA = pa.schema([
+    ('season', pa.int16()),
+    ('course_id', pa.int32()),
+    ('round_id', pa.int32()),
+    ('date_of_round', pa.date32()),
+    ('golfer_id', pa.int32()),
+    ('club_id', pa.int32()),
+    ('tournament_id', pa.int32()),
+    ('round_course_id', pa.int32()),
+    ('tee_id', pa.int32()),
+    ('sequence_number', pa.int16()),
+    ('hole_number', pa.int16()),
+    ('strokes', pa.int16()),
+    ('fairway_hit', pa.bool_()),
+    ('green_in_reg', pa.bool_()),
+    ('number_of_putts', pa.int16()),
+    ('bunker_shot', pa.bool_()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([SCHEMA.field('season'), SCHEMA.field('course_id')]), flavor='hive')
+
+
+def export_query(start_date=None, end_date=None, golfer_ids=None):
+    '''SELECT for the flattened export, in SCHEMA column order.'''
+    query = select(
+        extract('year', Round.date_of_round),
+        RoundCourse.course_id,
+        Round.round_id,
+        Round.date_of_round,
+        RoundStroke.golfer_id,
+        Round.club_id,
+        Round.tournament_id,
+        RoundCourse.round_course_id,
+        RoundCourse.tee_id,
+        RoundCourse.sequence_number,
+        RoundStroke.hole_number,
+        RoundStroke.strokes,
+        RoundStroke.fairway_hit,
+        RoundStroke.green_in_reg,
+        RoundStroke.number_of_putts,
+        RoundStroke.bunker_shot,
+    ).join(RoundCourse, RoundCourse.round_course_id == RoundStroke.round_course_id
+           ).join(Round, Round.round_id == RoundCourse.round_id)
+
+    # Both partitioned tables are filtered on their own date_of_round so
+    # seasons outside the range are pruned from each
+    if start_date is not None:
+        query = query.where(Round.date_of_round >= start_date,
+                            RoundStroke.date_of_round >= start_date)
+    if end_date is not None:
+        query = query.where(Round.date_of_round <= end_date,
+                            RoundStroke.date_of_round <= end_date)
+    if golfer_ids:
+        query = query.where(RoundStroke.golfer_id.in_(golfer_ids))
+    return query.order_by(Round.date_of_round, RoundCourse.course_id)
+
+
+def record_batches(start_date=None, end_date=None, golfer_ids=None,
+                   batch_size=BATCH_SIZE, stats=None):
+    '''Return an iterator of Arrow record batches of at most `batch_size` rows.
+
+    The query runs right away, so the iterator can be consumed by pyarrow's
+    writer threads outside the app context. `stats`, if given, is a dict kept
+    updated with 'rows' and 'seconds'.
+    '''
+    started = time.perf_counter()
+    if stats is not None:
+        stats.update(rows=0, seconds=0.0)
+
+    result = db.session.execute(
+        export_query(start_date, end_date, golfer_ids).execution_options(
+            yield_per=batch_size))
+
+    def batches():
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            columns[0] = [int(season) if season is not None else None
+                          for season in columns[0]]
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type)
+                 for column, field in zip(columns, SCHEMA)], schema=SCHEMA)
+            if stats is not None:
+                stats['rows'] += len(rows)
+                stats['seconds'] = time.perf_counter() - started
+
+    return batches()
+
+
+def export_dataset(base_dir, format='parquet', compression='zstd', **filters):
+    '''Write an export partitioned by season and course under `base_dir`.
+
+    Each season/course directory the export writes to is emptied first, so
+    files left by an earlier, larger export can't be read back alongside
+    the new ones. Partitions this export has no rows for are left alone.
+
+    Returns a dict with the number of rows written, elapsed seconds and rows/s.
+    '''
+    if format not in FORMATS:
+        raise ValueError(f'Unknown export format {format!r}')
+
+    if format == 'parquet':
+        file_format = ds.ParquetFileFormat()
+        file_options = file_format.make_write_options(compression=compression)
+    else:
+        file_format = ds.IpcFileFormat()
+        file_options = file_format.make_write_options(
+            compression=_ipc_compression(compression))
+
+    stats = {}
+    ds.write_dataset(
+        record_batches(stats=stats, **filters), base_dir, schema=SCHEMA,
+        format=file_format, file_options=file_options, partitioning=PARTITIONING,
+        basename_template='part-{i}.' + format,
+        existing_data_behavior='delete_matching')
+
+    seconds = stats.get('seconds') or 0.0
+    rows = stats.get('rows', 0)
+    return {'rows': rows, 'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds else None}
+
+
+def _ipc_compression(compression):
+    # Arrow IPC only supports zstd and lz4 buffer compression
+    return compression if compression in ('zstd', 'lz4') else None
+
+
+class _ChunkSink:
+    '''Write-only file object that hands back whatever was written since the last drain.'''
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_export(format='arrow', compression='zstd', stats=None, **filters):
+    '''Yield an export as bytes, one chunk per batch, for a streaming response.
+
+    Arrow IPC streams are written batch by batch. Parquet is written one row
+    group per batch, with the footer sent last.
+    '''
+    if format not in FORMATS:
+        raise ValueError(f'Unknown export format {format!r}')
+
+    sink = _ChunkSink()
+    if format == 'parquet':
+        writer = pq.ParquetWriter(sink, SCHEMA, compression=compression)
+    else:
+        writer = pa.ipc.new_stream(sink, SCHEMA, options=pa.ipc.IpcWriteOptions(
+            compression=_ipc_compression(compression)))
+
+    for batch in record_batches(stats=stats, **filters):
+        writer.write_batch(batch)
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,10 @@
+'''Flask extensions shared by the app factory and blueprints'''
+
+from flask_login import LoginManager
+from flask_migrate import Migrate
+
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+
+migrate = Migrate()
@@ -0,0 +1,232 @@
+'''Per-hole field statistics kept up to date while a round is in progress
+
+The counters live in hole_field_stats. Every posted hole adds its
+difference to its hole's row with a single `column = column + n` UPDATE, so
+posts from every worker land in the same totals and nothing waits in
+worker memory to be written out. Workers keep a copy of each tournament's
+rows for the hole stats pages and re-read it every REFRESH_INTERVAL: a
+handful of rows by primary key, not a rebuild.
+
+rebuild_field_stats() recomputes a tournament's rows from rounds_strokes,
+to repair them or to backfill a tournament scored before the table existed.
+'''
+
+from datetime import datetime
+from threading import Lock
+import time
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Round, RoundCourse, RoundStroke, CourseHole, HoleFieldStat
+
+
+# Counter layout for each (tournament, course, hole). Plain lists keep a
+# whole tournament's worth of holes small and cheap to update in place.
+PAR, PLAYED, STROKES, PUTTS, EAGLES, BIRDIES, PARS, BOGEYS, DOUBLES = range(9)
+COUNTER_FIELDS = ('par', 'holes_played', 'total_strokes', 'total_putts', 'eagles',
+                  'birdies', 'pars', 'bogeys', 'double_bogeys')
+
+# How often (in seconds) a worker re-reads a tournament's counters so
+# scores posted to other workers show up
+REFRESH_INTERVAL = 5.0
+
+_stats = {}
+_loaded_at = {}
+_stats_lock = Lock()
+
+
+def _bucket(strokes, par):
+    offset = strokes - par
+    if offset <= -2:
+        return EAGLES
+    if offset >= 2:
+        return DOUBLES
+    return (BIRDIES, PARS, BOGEYS)[offset + 1]
+
+
+def _apply(counters, par, strokes, putts, sign):
+    counters[PLAYED] += sign
+    counters[STROKES] += sign * strokes
+    counters[PUTTS] += sign * (putts or 0)
+    if par is not None:
+        counters[_bucket(strokes, par)] += sign
+
+
+def _add_to_row(tournament_id, course_id, hole_number, par, changes):
+    '''Add `changes` to a hole's hole_field_stats row, creating it if needed.'''
+    values = {getattr(HoleFieldStat, field): getattr(HoleFieldStat, field) + value
+              for field, value in zip(COUNTER_FIELDS, changes) if field != 'par' and value}
+    values[HoleFieldStat.updated_at] = datetime.now()
+    row = HoleFieldStat.query.filter_by(
+        tournament_id=tournament_id, course_id=course_id, hole_number=hole_number)
+    if row.update(values, synchronize_session=False):
+        db.session.commit()
+        return
+    db.session.add(HoleFieldStat(
+        tournament_id=tournament_id, course_id=course_id, hole_number=hole_number,
+        updated_at=datetime.now(), **dict(zip(COUNTER_FIELDS, [par] + changes[1:]))))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the row first
+        db.session.rollback()
+        row.update(values, synchronize_session=False)
+        db.session.commit()
+
+
+def record_stroke(tournament_id, course_id, hole_number, par, strokes, putts=None,
+                  previous=None):
+    '''Fold one posted hole into the tournament's totals.
+
+    Call this after the RoundStroke is committed. `previous` is the
+    (strokes, putts) the hole had before, when a score is corrected rather
+    than posted for the first time.
+    '''
+    if tournament_id is None or strokes is None:
+        return
+    changes = [par, 0, 0, 0, 0, 0, 0, 0, 0]
+    if previous is not None and previous[0] is not None:
+        _apply(changes, par, previous[0], previous[1], -1)
+    _apply(changes, par, strokes, putts, 1)
+    _add_to_row(tournament_id, course_id, hole_number, par, changes)
+
+    # This worker's copy shows its own posts straight away
+    key = (tournament_id, course_id, hole_number)
+    with _stats_lock:
+        if tournament_id in _loaded_at:
+            counters = _stats.get(key)
+            if counters is None:
+                _stats[key] = changes
+            else:
+                for index in range(PLAYED, len(changes)):
+                    counters[index] += changes[index]
+
+
+def load_field_stats(tournament_id):
+    '''Replace this worker's copy of a tournament's counters with the stored rows.'''
+    rows = db.session.query(
+        HoleFieldStat.course_id, HoleFieldStat.hole_number,
+        *[getattr(HoleFieldStat, field) for field in COUNTER_FIELDS]).filter(
+        HoleFieldStat.tournament_id == tournament_id).all()
+    with _stats_lock:
+        for key in [key for key in _stats if key[0] == tournament_id]:
+            del _stats[key]
+        for course_id, hole_number, *counters in rows:
+            _stats[(tournament_id, course_id, hole_number)] = [
+                value if index == PAR else int(value or 0)
+                for index, value in enumerate(counters)]
+        _loaded_at[tournament_id] = time.monotonic()
+
+
+def _ensure_loaded(tournament_id):
+    loaded_at = _loaded_at.get(tournament_id)
+    if loaded_at is None or time.monotonic() - loaded_at > REFRESH_INTERVAL:
+        load_field_stats(tournament_id)
+
+
+def rebuild_field_stats(tournament_id):
+    '''Recompute a tournament's hole_field_stats rows from rounds_strokes.
+
+    One grouped query; the stored rows are replaced. Holes posted while it
+    runs can be missed, so run it when the tournament isn't being scored.
+    '''
+    offset = RoundStroke.strokes - CourseHole.par
+
+    def tally(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    query = db.session.query(
+        RoundCourse.course_id,
+        RoundStroke.hole_number,
+        CourseHole.par,
+        func.count(RoundStroke.strokes),
+        func.coalesce(func.sum(RoundStroke.strokes), 0),
+        func.coalesce(func.sum(RoundStroke.number_of_putts), 0),
+        tally(offset <= -2),
+        tally(offset == -1),
+        tally(offset == 0),
+        tally(offset == 1),
+        tally(offset >= 2),
+    ).join(RoundCourse, RoundCourse.round_course_id == RoundStroke.round_course_id
+           ).join(Round, Round.round_id == RoundCourse.round_id
+                  ).outerjoin(CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+                              & (CourseHole.number == RoundStroke.hole_number)
+                              ).filter(Round.tournament_id == tournament_id,
+                                       RoundStroke.strokes.isnot(None))
+    first, last = Round.date_range(tournament_id)
+    if first is not None:
+        # Only the tournament's season partitions are scanned
+        query = query.filter(Round.date_of_round.between(first, last),
+                             RoundStroke.date_of_round.between(first, last))
+    rows = query.group_by(RoundCourse.course_id, RoundStroke.hole_number,
+                          CourseHole.par).all()
+
+    now = datetime.now()
+    HoleFieldStat.query.filter_by(tournament_id=tournament_id).delete(
+        synchronize_session=False)
+    for course_id, hole_number, *counters in rows:
+        db.session.add(HoleFieldStat(
+            tournament_id=tournament_id, course_id=course_id, hole_number=hole_number,
+            updated_at=now, **{field: value if index == PAR else int(value or 0)
+                               for index, (field, value)
+                               in enumerate(zip(COUNTER_FIELDS, counters))}))
+    db.session.commit()
+    load_field_stats(tournament_id)
+    return len(rows)
+
+
+def hole_stats(tournament_id):
+    '''Hole-by-hole field stats for a tournament, hardest hole first.'''
+    _ensure_loaded(tournament_id)
+    with _stats_lock:
+        items = [(course_id, hole_number, list(counters))
+                 for (key_tournament, course_id, hole_number), counters in _stats.items()
+                 if key_tournament == tournament_id]
+    return format_hole_stats(items)
+
+
+def format_hole_stats(items):
+    '''Hole stats dicts, hardest hole first, from (course_id, hole_number,
+    counters) with counters in COUNTER_FIELDS order.'''
+    holes = []
+    for course_id, hole_number, counters in items:
+        played = counters[PLAYED]
+        par = counters[PAR]
+        average = counters[STROKES] / played if played else None
+        holes.append({
+            'course_id': course_id,
+            'hole_number': hole_number,
+            'par': par,
+            'holes_played': played,
+            'scoring_average': round(average, 3) if average is not None else None,
+            'average_to_par': round(average - par, 3)
+            if average is not None and par is not None else None,
+            'putts_average': round(counters[PUTTS] / played, 2) if played else None,
+            'eagles': counters[EAGLES],
+            'birdies': counters[BIRDIES],
+            'pars': counters[PARS],
+            'bogeys': counters[BOGEYS],
+            'double_bogeys': counters[DOUBLES],
+        })
+
+    holes.sort(key=lambda hole: (hole['average_to_par'] is None,
+                                 -(hole['average_to_par'] or 0)))
+    for rank, hole in enumerate(holes, start=1):
+        hole['difficulty_rank'] = rank
+    return holes
+
+
+def record_round_stroke(round_stroke, previous=None):
+    '''record_stroke() for a RoundStroke, looking up its tournament and par.'''
+    context = db.session.query(
+        Round.tournament_id, RoundCourse.course_id, CourseHole.par
+    ).join(Round, Round.round_id == RoundCourse.round_id).outerjoin(
+        CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+        & (CourseHole.number == round_stroke.hole_number)).filter(
+        RoundCourse.round_course_id == round_stroke.round_course_id).first()
+    if context is None:
+        return
+    tournament_id, course_id, par = context
+    record_stroke(tournament_id, course_id, round_stroke.hole_number, par,
+                  round_stroke.strokes, round_stroke.number_of_putts, previous)
@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField, IntegerField, SelectField, SearchField
 from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError
-from models import Tournament, Tee, Course
+from loaders import request_loaders
 
 
 class RegistrationForm(FlaskForm):
@@ -46,24 +46,27 @@ class RoundInitiationForm(FlaskForm):
 
     enable_handicap = BooleanField('Enable Handicap')
 
+    teebox = SelectField('Teebox', choices=[], validators=[Optional()])
+
     submit = SubmitField('Start Round')
 
     def validate_course_name(self, field):
-        course = Course.query.filter_by(course_name=field.data).first()
+        # Memoized by the request's course loader, so this doesn't query again
+        course = request_loaders().course_by_name.load(field.data)
         if not course:
             raise ValidationError('Invalid course name.')
 
     def __init__(self, *args, **kwargs):
         super(RoundInitiationForm, self).__init__(*args, **kwargs)
-        if 'course_name' in kwargs:
-            course_name = kwargs['course_name']
-            course = Course.query.filter_by(course_name=course_name).first()
-            if course:
-                self.course_id = course.id
-                teeboxes = Tee.query.filter_by(course_id=course.id).all()
-                self.teebox_choices = [(str(tee.id), tee.tee_name)
-                                       for tee in teeboxes]
-                self.teebox.choices = self.teebox_choices
+        loaders = request_loaders()
+        course_name = kwargs.get('course_name') or self.course_name.data
+        course = loaders.course_by_name.load(course_name)
+        self.course_id = course.course_id if course else None
+        if course:
+            teeboxes = loaders.tees_by_course.load(course.course_id)
+            self.teebox_choices = [(str(tee.tee_id), tee.tee_name)
+                                   for tee in teeboxes]
+            self.teebox.choices = self.teebox_choices
 
 
 class ScoreCardForm(FlaskForm):
@@ -89,17 +92,16 @@ class ScoreCardForm(FlaskForm):
 
 
 class TeeboxSelectionForm(FlaskForm):
+    teebox = SelectField('Teebox', choices=[], validators=[DataRequired()])
+
     def __init__(self, *args, **kwargs):
         super(TeeboxSelectionForm, self).__init__(*args, **kwargs)
         # Get the course_id passed to the form
         self.course_id = kwargs.get('course_id')
 
-        # Fetch all teeboxes for the selected course
-        self.teeboxes = Tee.query.filter_by(course_id=self.course_id).all()
+        # Teeboxes for the selected course, shared with any other form or
+        # template in this request that needs the same course's tees
+        self.teeboxes = request_loaders().tees_by_course.load(self.course_id)
 
         # Create choices for the select field using teebox names
-        teebox_choices = [(str(tee.id), tee.tee_name) for tee in self.teeboxes]
-
-        # Add a select field with teebox choices
-        self.teebox = SelectField(
-            'Teebox', choices=teebox_choices, validators=[DataRequired()])
+        self.teebox.choices = [(str(tee.tee_id), tee.tee_name) for tee in self.teeboxes]
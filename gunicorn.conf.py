@@ -0,0 +1,29 @@
+'''gunicorn settings
+
+The app is created and every blueprint's view module imported once in the
+master, so workers fork with everything already loaded (and shared
+copy-on-write) instead of each paying the import cost on its first
+requests. Connection pools must not be shared across processes, so each
+worker drops the pool it inherited without closing the master's sockets.
+'''
+
+import multiprocessing
+import os
+
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('BIND', '0.0.0.0:8082')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def when_ready(server):
+    from views import load_all
+    load_all(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    from models import db
+    with worker.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,19 @@
+'''gunicorn settings for the async spectator endpoints (live_asgi.py)
+
+One uvicorn worker per core is enough: a worker holds thousands of idle
+long polls and event streams, since waiting costs no thread. Score entry
+and the rest of the app keep running on the sync workers in gunicorn.conf.py.
+'''
+
+import multiprocessing
+import os
+
+
+wsgi_app = 'live_asgi:app'
+worker_class = 'uvicorn.workers.UvicornWorker'
+bind = os.environ.get('LIVE_BIND', '0.0.0.0:8083')
+workers = int(os.environ.get('LIVE_WORKERS', multiprocessing.cpu_count()))
+# Event streams stay open far longer than a request
+timeout = 0
+graceful_timeout = 10
+keepalive = 75
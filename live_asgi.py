@@ -0,0 +1,256 @@
+'''ASGI serving mode for spectator-facing live endpoints
+
+Spectators hold connections open (long polls, event streams, slow mobile
+links) and only ever read, so these routes are served by a small async app
+on an asyncpg connection pool instead of tying up a sync gunicorn worker per
+connection. Score entry and everything else stay on the sync Flask app;
+the proxy in front sends only the paths below here:
+
+    GET /api/tournaments/<id>/leaderboard?since=<version>&wait=<seconds>
+        Same payload as the Flask route. With `wait`, a client that is
+        already up to date is held until the leaderboard changes (or
+        `wait` runs out) instead of polling again.
+    GET /api/tournaments/<id>/leaderboard/events
+        Server-sent events: a full snapshot, then each change as it
+        happens. Reconnects resume from Last-Event-ID.
+    GET /api/tournaments/<id>/hole_stats
+        Field stats from hole_field_stats, which every posted hole updates,
+        re-read at most every field_stats.REFRESH_INTERVAL and shared by
+        every request in between.
+
+Versions are the tournament's leaderboard_version from the database, so
+`since`, `wait` and Last-Event-ID mean the same on every worker of either
+app. A version this worker hasn't caught up to yet makes it re-read the
+leaderboard; one it still can't vouch for (a lagging replica) gets a full
+snapshot rather than a partial one.
+
+Run it with:
+
+    gunicorn -c gunicorn_live.conf.py
+
+It reads REPLICA_DATABASE_URL when set (these routes never write),
+otherwise DATABASE_URL.
+'''
+
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import os
+import time
+
+import asyncpg
+from starlette.applications import Starlette
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, request_response
+
+from field_stats import COUNTER_FIELDS, format_hole_stats
+from field_stats import REFRESH_INTERVAL as HOLE_STATS_REFRESH_INTERVAL
+from live_leaderboard import REFRESH_INTERVAL, LeaderboardChangeLog, leaderboard_payload
+
+
+POOL_MIN_SIZE = int(os.environ.get('LIVE_POOL_MIN_SIZE', 2))
+POOL_MAX_SIZE = int(os.environ.get('LIVE_POOL_MAX_SIZE', 10))
+
+# Longest a long poll is held, and how often an idle event stream is pinged
+MAX_WAIT = 30.0
+HEARTBEAT_INTERVAL = 15.0
+
+# Same statement as live_leaderboard.load_leaderboard_rows, so versions
+# match the WSGI app's
+LEADERBOARD_SQL = (
+    'SELECT t.leaderboard_version, l.version, '
+    'l.golfer_id, g.golfer_name, l.score, l.position, l.holes_played '
+    'FROM tournaments t '
+    'LEFT JOIN leaderboards l ON l.tournament_id = t.tournament_id '
+    'LEFT JOIN golfers g ON g.golfer_id = l.golfer_id '
+    'WHERE t.tournament_id = $1')
+
+HOLE_STATS_SQL = (
+    'SELECT course_id, hole_number, ' + ', '.join(COUNTER_FIELDS) + ' '
+    'FROM hole_field_stats WHERE tournament_id = $1')
+
+
+def database_dsn():
+    url = os.environ.get('REPLICA_DATABASE_URL') or os.environ.get(
+        'DATABASE_URL', 'postgresql:///shore_tour_invite')
+    # asyncpg takes plain libpq URLs, without a SQLAlchemy driver suffix
+    scheme, rest = url.split('://', 1)
+    return 'postgresql://' + rest if scheme.startswith('postgres') else url
+
+
+class LiveFeed:
+    '''One tournament's leaderboard, refreshed at most every REFRESH_INTERVAL.
+
+    Every waiting client shares one query per refresh, however many of them
+    there are.
+    '''
+
+    def __init__(self, tournament_id):
+        self.change_log = LeaderboardChangeLog(tournament_id)
+        self._refresh_lock = asyncio.Lock()
+        self._changed = asyncio.Condition()
+
+    async def refresh(self, pool, since=None):
+        '''Re-read the leaderboard when stale, or when a client has seen a
+        newer version (from another worker) than this copy.'''
+        def needed():
+            return self.change_log.is_stale() or (
+                since is not None and since > self.change_log.version)
+
+        if not needed():
+            return
+        async with self._refresh_lock:
+            if not needed():
+                return
+            rows = await pool.fetch(LEADERBOARD_SQL, self.change_log.tournament_id)
+            before = self.change_log.version
+            if rows:
+                self.change_log.record(rows[0][0] or 0, [
+                    (tuple(row[2:]), row[1] or 0) for row in rows if row[2] is not None])
+            else:
+                self.change_log.refreshed_at = time.monotonic()
+        if self.change_log.version != before:
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def wait_for_change(self, pool, version, timeout):
+        '''Wait until the version moves past `version`, up to `timeout` seconds.'''
+        deadline = time.monotonic() + timeout
+        while self.change_log.version == version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(),
+                                           min(remaining, REFRESH_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+            await self.refresh(pool)
+        return True
+
+
+class HoleStatsFeed:
+    '''One tournament's hole stats, re-read at most every HOLE_STATS_REFRESH_INTERVAL.
+
+    The JSON body is rendered once per refresh and served as is until the next.
+    '''
+
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+        self.body = None
+        self.refreshed_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+
+    def is_stale(self):
+        return time.monotonic() - self.refreshed_at > HOLE_STATS_REFRESH_INTERVAL
+
+    async def refresh(self, pool):
+        if not self.is_stale():
+            return
+        async with self._refresh_lock:
+            if not self.is_stale():
+                return
+            rows = await pool.fetch(HOLE_STATS_SQL, self.tournament_id)
+            self.body = JSONResponse(format_hole_stats(
+                [(row['course_id'], row['hole_number'],
+                  [row[field] for field in COUNTER_FIELDS]) for row in rows])).body
+            self.refreshed_at = time.monotonic()
+
+
+_feeds = {}
+_hole_stats_feeds = {}
+
+
+def get_feed(tournament_id):
+    feed = _feeds.get(tournament_id)
+    if feed is None:
+        feed = _feeds[tournament_id] = LiveFeed(tournament_id)
+    return feed
+
+
+def get_hole_stats_feed(tournament_id):
+    feed = _hole_stats_feeds.get(tournament_id)
+    if feed is None:
+        feed = _hole_stats_feeds[tournament_id] = HoleStatsFeed(tournament_id)
+    return feed
+
+
+def _int_param(request, name):
+    try:
+        return int(request.query_params[name]) if name in request.query_params else None
+    except ValueError:
+        return None
+
+
+async def leaderboard(request):
+    pool = request.app.state.pool
+    feed = get_feed(request.path_params['tournament_id'])
+    since = _int_param(request, 'since')
+    await feed.refresh(pool, since)
+
+    wait = min(float(_int_param(request, 'wait') or 0), MAX_WAIT)
+    if wait and since == feed.change_log.version:
+        await feed.wait_for_change(pool, since, wait)
+    return JSONResponse(leaderboard_payload(feed.change_log, since),
+                        headers={'Cache-Control': 'no-cache'})
+
+
+async def leaderboard_events(request):
+    pool = request.app.state.pool
+    feed = get_feed(request.path_params['tournament_id'])
+    last_event_id = request.headers.get('last-event-id')
+    version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    await feed.refresh(pool, version)
+
+    async def stream():
+        nonlocal version
+        while True:
+            if version != feed.change_log.version:
+                payload = leaderboard_payload(feed.change_log, version)
+                version = payload['version']
+                yield f'id: {version}\nevent: leaderboard\ndata: {json.dumps(payload)}\n\n'
+            elif not await feed.wait_for_change(pool, version, HEARTBEAT_INTERVAL):
+                yield ': heartbeat\n\n'
+            if await request.is_disconnected():
+                break
+
+    return StreamingResponse(stream(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def hole_stats(request):
+    feed = get_hole_stats_feed(request.path_params['tournament_id'])
+    await feed.refresh(request.app.state.pool)
+    return Response(feed.body, media_type='application/json',
+                    headers={'Cache-Control': 'no-cache'})
+
+
+async def health(request):
+    return Response('ok', media_type='text/plain')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.pool = await asyncpg.create_pool(
+        database_dsn(), min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE)
+    try:
+        yield
+    finally:
+        await app.state.pool.close()
+
+
+def gzipped(endpoint):
+    # Only the JSON routes: gzip would hold back events on the stream
+    return GZipMiddleware(request_response(endpoint), minimum_size=1024, compresslevel=6)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/tournaments/{tournament_id:int}/leaderboard', gzipped(leaderboard)),
+        Route('/api/tournaments/{tournament_id:int}/leaderboard/events', leaderboard_events),
+        Route('/api/tournaments/{tournament_id:int}/hole_stats', gzipped(hole_stats)),
+        Route('/live/health', health),
+    ],
+    lifespan=lifespan)
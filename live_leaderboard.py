@@ -0,0 +1,220 @@
+'''Per-tournament leaderboard change log for polling clients
+
+Versions come from the database, not from each worker: every write to a
+tournament's leaderboard bumps tournaments.leaderboard_version and stamps the
+rows it changed with the new version. A `since` version a client got from
+one worker therefore means the same thing on every other worker (and in
+the ASGI live app), and "rows changed after version N" is a plain filter
+on the row versions.
+'''
+
+from collections import deque
+from threading import Lock
+import time
+
+from models import db, Leaderboard, Golfer, Tournament
+
+
+# Fields sent for each leaderboard row, in order. Rows go over the wire as
+# plain lists so a 150 player field stays small enough to poll every few seconds.
+ROW_FIELDS = ('golfer_id', 'golfer_name', 'score', 'position', 'holes_played')
+
+# How many removed golfers each tournament remembers before older versions
+# need a snapshot
+CHANGE_LOG_SIZE = 1024
+
+# How often (in seconds) a worker re-reads the leaderboards table
+REFRESH_INTERVAL = 2.0
+
+# Leaderboard columns save_leaderboard() writes unless told otherwise, in order
+SAVED_FIELDS = ('golfer_id', 'score', 'position', 'holes_played', 'rounds_played')
+
+
+class LeaderboardChangeLog:
+    '''A worker's copy of one tournament's leaderboard.
+
+    `version` is the tournament's leaderboard_version the copy was read at
+    and each row keeps the version it last changed at, so `since(version)`
+    answers the same on every worker. It returns a full snapshot when the
+    copy can't vouch for the answer: no version, a version newer than the
+    copy, or one older than the removals it remembers. Leaderboard rows are
+    only ever deleted by hand, so a worker's first snapshot can answer any
+    earlier version from the row versions alone.
+    '''
+
+    def __init__(self, tournament_id, size=CHANGE_LOG_SIZE):
+        self.tournament_id = tournament_id
+        self.version = 0
+        self.rows = {}
+        self.row_versions = {}
+        self.removals = deque()
+        self.size = size
+        # Oldest version since() can answer without a full snapshot
+        self.oldest = None
+        self.refreshed_at = 0.0
+        self._lock = Lock()
+
+    def record(self, version, rows):
+        '''Replace the current rows with a snapshot read at `version`.
+
+        `rows` is an iterable of (row, row_version) pairs with each row in
+        ROW_FIELDS order. A snapshot older than the one already held (from a
+        lagging replica, say) is ignored. Golfers missing from `rows` are
+        remembered as removed at `version`.
+        '''
+        with self._lock:
+            self.refreshed_at = time.monotonic()
+            if self.oldest is not None and version < self.version:
+                return self.version
+
+            incoming = {row[0]: (tuple(row), row_version) for row, row_version in rows}
+            if self.oldest is None:
+                self.oldest = 0
+            else:
+                for golfer_id in self.rows.keys() - incoming.keys():
+                    self.removals.append((version, golfer_id))
+                    if len(self.removals) > self.size:
+                        self.oldest = self.removals.popleft()[0]
+            self.rows = {golfer_id: row for golfer_id, (row, _) in incoming.items()}
+            self.row_versions = {golfer_id: row_version
+                                 for golfer_id, (_, row_version) in incoming.items()}
+            self.version = version
+            return version
+
+    def since(self, version):
+        '''Return (full, rows, removed) describing changes after `version`.'''
+        with self._lock:
+            if version is None or self.oldest is None or version > self.version \
+                    or version < self.oldest:
+                return True, sorted(self.rows.values(), key=_position_key), []
+
+            rows = [row for golfer_id, row in self.rows.items()
+                    if self.row_versions[golfer_id] > version]
+            removed = sorted({golfer_id for removed_at, golfer_id in self.removals
+                              if removed_at > version} - self.rows.keys())
+            return False, sorted(rows, key=_position_key), removed
+
+    def is_stale(self, interval=REFRESH_INTERVAL):
+        return time.monotonic() - self.refreshed_at > interval
+
+
+def _position_key(row):
+    position = row[3]
+    return (position is None, position or 0, row[0])
+
+
+_change_logs = {}
+_change_logs_lock = Lock()
+
+
+def get_change_log(tournament_id):
+    '''Return the change log for a tournament, creating it if needed.'''
+    with _change_logs_lock:
+        change_log = _change_logs.get(tournament_id)
+        if change_log is None:
+            change_log = _change_logs[tournament_id] = LeaderboardChangeLog(
+                tournament_id)
+        return change_log
+
+
+def load_leaderboard_rows(tournament_id):
+    '''Read a tournament's leaderboard as (version, [(row, row_version), ...]).
+
+    The version and rows come from one statement, so they are from the same
+    snapshot: the rows are exactly those of that version. Returns None if
+    there is no such tournament.
+    '''
+    rows = db.session.query(
+        Tournament.leaderboard_version, Leaderboard.version,
+        Leaderboard.golfer_id, Golfer.golfer_name, Leaderboard.score,
+        Leaderboard.position, Leaderboard.holes_played
+    ).select_from(Tournament).outerjoin(
+        Leaderboard, Leaderboard.tournament_id == Tournament.tournament_id).outerjoin(
+        Golfer, Golfer.golfer_id == Leaderboard.golfer_id).filter(
+        Tournament.tournament_id == tournament_id).all()
+    if not rows:
+        return None
+    return rows[0][0] or 0, [(tuple(row[2:]), row[1] or 0)
+                             for row in rows if row[2] is not None]
+
+
+def record_leaderboard(tournament_id):
+    '''Refresh this worker's copy of a tournament's leaderboard from the database.
+
+    Call this after committing leaderboard changes so this worker's polling
+    clients see them without waiting for REFRESH_INTERVAL.
+    '''
+    change_log = get_change_log(tournament_id)
+    loaded = load_leaderboard_rows(tournament_id)
+    if loaded is None:
+        change_log.refreshed_at = time.monotonic()
+        return change_log.version
+    return change_log.record(*loaded)
+
+
+def next_leaderboard_version(tournament_id):
+    '''Bump a tournament's leaderboard version and return the new value.
+
+    Call this first, before reading whatever the new leaderboard is built
+    from: the row lock the update takes holds every other leaderboard writer
+    for the tournament until this transaction commits, so each update
+    builds on the one before it. Doesn't commit.
+    '''
+    Tournament.query.filter_by(tournament_id=tournament_id).update(
+        {Tournament.leaderboard_version: Tournament.leaderboard_version + 1},
+        synchronize_session=False)
+    return db.session.query(Tournament.leaderboard_version).filter_by(
+        tournament_id=tournament_id).scalar()
+
+
+def save_leaderboard(tournament_id, version, rows, fields=SAVED_FIELDS):
+    '''Write leaderboard rows, stamping the ones that changed with `version`.
+
+    `rows` hold the Leaderboard columns named in `fields`, golfer_id first,
+    and `version` comes from next_leaderboard_version() in the same
+    transaction. Golfers not in `rows` keep their entries. Doesn't commit.
+    '''
+    entries = {entry.golfer_id: entry for entry in Leaderboard.query.filter_by(
+        tournament_id=tournament_id)}
+    for row in rows:
+        values = dict(zip(fields[1:], row[1:]))
+        entry = entries.get(row[0])
+        if entry is None:
+            entry = Leaderboard(tournament_id=tournament_id, golfer_id=row[0])
+            db.session.add(entry)
+        elif all(getattr(entry, field) == value for field, value in values.items()):
+            continue
+        for field, value in values.items():
+            setattr(entry, field, value)
+        entry.version = version
+
+
+def leaderboard_version(tournament_id, since=None):
+    '''Current leaderboard version, refreshed from the database when stale.
+
+    A client that has already seen a newer version (from another worker)
+    makes this worker refresh straight away.
+    '''
+    change_log = get_change_log(tournament_id)
+    if change_log.is_stale() or (since is not None and since > change_log.version):
+        record_leaderboard(tournament_id)
+    return change_log.version
+
+
+def leaderboard_payload(change_log, version=None):
+    '''JSON payload of a change log for a client that last saw `version`.'''
+    full, rows, removed = change_log.since(version)
+    return {
+        'tournament_id': change_log.tournament_id,
+        'version': change_log.version,
+        'full': full,
+        'fields': ROW_FIELDS,
+        'rows': rows,
+        'removed': removed,
+    }
+
+
+def leaderboard_since(tournament_id, version=None):
+    '''Build the JSON payload for a leaderboard poll.'''
+    leaderboard_version(tournament_id, version)
+    return leaderboard_payload(get_change_log(tournament_id), version)
@@ -0,0 +1,120 @@
+'''Batched, per-request loaders for course, tee and hole lookups
+
+Forms and templates ask for what they need with defer() (or straight away
+with load()). The first load() sends every key deferred so far in one
+`IN (...)` query for that entity type, and results are kept for the rest
+of the request. Two forms on the same page looking up the same course
+share one query, and each course's tees or holes come back in one query
+no matter how many courses are shown.
+'''
+
+from flask import g
+from werkzeug.local import LocalProxy
+
+from models import Course, CourseHole, Tee, TeeHole
+
+
+class DataLoader:
+    '''Memoizing loader that resolves pending keys in one batch.
+
+    `batch` takes a set of keys and returns {key: value}; keys it leaves out
+    resolve to `default()`.
+    '''
+
+    def __init__(self, batch, default=lambda: None):
+        self.batch = batch
+        self.default = default
+        self._cache = {}
+        self._pending = set()
+
+    def defer(self, key):
+        '''Queue `key` for the next batch without querying yet.'''
+        if key is not None and key not in self._cache:
+            self._pending.add(key)
+
+    def prime(self, key, value):
+        self._cache.setdefault(key, value)
+        self._pending.discard(key)
+
+    def dispatch(self):
+        keys, self._pending = self._pending, set()
+        if keys:
+            found = self.batch(keys)
+            for key in keys:
+                self._cache[key] = found.get(key, self.default())
+
+    def load(self, key):
+        if key is None:
+            return self.default()
+        self.defer(key)
+        if key not in self._cache:
+            self.dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        for key in keys:
+            self.defer(key)
+        self.dispatch()
+        return [self._cache[key] if key is not None else self.default() for key in keys]
+
+
+def _group_by(rows, attribute):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(getattr(row, attribute), []).append(row)
+    return grouped
+
+
+class RequestLoaders:
+    '''Every loader for one request.'''
+
+    def __init__(self):
+        self.course = DataLoader(self._courses)
+        self.course_by_name = DataLoader(self._courses_by_name)
+        self.tees_by_course = DataLoader(self._tees_by_course, list)
+        self.holes_by_course = DataLoader(self._holes_by_course, list)
+        self.tee_holes_by_tee = DataLoader(self._tee_holes_by_tee, list)
+
+    def _courses(self, course_ids):
+        courses = Course.query.filter(Course.course_id.in_(course_ids)).all()
+        for course in courses:
+            self.course_by_name.prime(course.course_name, course)
+        return {course.course_id: course for course in courses}
+
+    def _courses_by_name(self, names):
+        courses = {}
+        # Like filter_by(course_name=...).first(), the lowest id wins
+        for course in Course.query.filter(Course.course_name.in_(names)).order_by(
+                Course.course_id.desc()):
+            courses[course.course_name] = course
+        for course in courses.values():
+            self.course.prime(course.course_id, course)
+        return courses
+
+    def _tees_by_course(self, course_ids):
+        return _group_by(Tee.query.filter(Tee.course_id.in_(course_ids)).order_by(
+            Tee.tee_id), 'course_id')
+
+    def _holes_by_course(self, course_ids):
+        return _group_by(CourseHole.query.filter(CourseHole.course_id.in_(course_ids)).order_by(
+            CourseHole.number), 'course_id')
+
+    def _tee_holes_by_tee(self, tee_ids):
+        return _group_by(TeeHole.query.filter(TeeHole.tee_id.in_(tee_ids)).order_by(
+            TeeHole.hole_number), 'tee_id')
+
+
+def request_loaders():
+    '''The current request's loaders, created on first use.'''
+    if 'loaders' not in g:
+        g.loaders = RequestLoaders()
+    return g.loaders
+
+
+def init_loaders(app):
+    '''Make `loaders` available to templates.'''
+    loaders = LocalProxy(request_loaders)
+
+    @app.context_processor
+    def inject_loaders():
+        return {'loaders': loaders}
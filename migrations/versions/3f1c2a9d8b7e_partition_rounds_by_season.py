@@ -0,0 +1,148 @@
+"""partition rounds and rounds_strokes by season
+
+Turns rounds and rounds_strokes into tables range partitioned on
+date_of_round, one partition per calendar year plus a default partition for
+rows without a date. rounds_strokes gets its own copy of date_of_round so
+it can be partitioned (and pruned) without a join.
+
+Foreign keys from both tables are re-created on the partitioned tables.
+Partitioned tables can only enforce uniqueness together with the partition
+key, so rounds_courses gets a copy of date_of_round as well and references
+rounds on (round_id, date_of_round) instead of round_id alone.
+
+Revision ID: 3f1c2a9d8b7e
+Revises: c2e8f5a13d67
+Create Date: 2026-10-19 10:12:41.318512
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b7e'
+down_revision = 'c2e8f5a13d67'
+branch_labels = None
+depends_on = None
+
+
+PARTITIONED_TABLES = (('rounds', 'round_id'), ('rounds_strokes', 'id'))
+
+
+def _drop_foreign_keys_to(table):
+    bind = op.get_bind()
+    constraints = bind.execute(sa.text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)"),
+        {'table': table}).all()
+    for referencing_table, name in constraints:
+        op.execute(f'ALTER TABLE {referencing_table} DROP CONSTRAINT "{name}"')
+
+
+def _foreign_keys_from(table):
+    '''(name, definition) of every foreign key declared on `table`.'''
+    return op.get_bind().execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)"),
+        {'table': table}).all()
+
+
+def _add_foreign_keys(table, foreign_keys):
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+
+def _move_sequence(table, source, id_column):
+    sequence = op.get_bind().execute(sa.text(
+        "SELECT pg_get_serial_sequence(:table, :column)"),
+        {'table': source, 'column': id_column}).scalar()
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column}')
+
+
+def _seasons(table):
+    years = op.get_bind().execute(sa.text(
+        f'SELECT DISTINCT CAST(EXTRACT(YEAR FROM date_of_round) AS INTEGER) '
+        f'FROM {table} WHERE date_of_round IS NOT NULL')).scalars().all()
+    this_year = date.today().year
+    return sorted(set(years) | {this_year, this_year + 1})
+
+
+def _create_partitions(table, seasons):
+    for year in seasons:
+        op.execute(
+            f"CREATE TABLE {table}_{year} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+
+def upgrade():
+    foreign_keys = {table: _foreign_keys_from(table) for table, _ in PARTITIONED_TABLES}
+    _drop_foreign_keys_to('rounds')
+    _drop_foreign_keys_to('rounds_strokes')
+
+    # rounds
+    op.execute('ALTER TABLE rounds RENAME TO rounds_unpartitioned')
+    op.execute(
+        'CREATE TABLE rounds (LIKE rounds_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (date_of_round)')
+    _create_partitions('rounds', _seasons('rounds_unpartitioned'))
+    op.execute('INSERT INTO rounds SELECT * FROM rounds_unpartitioned')
+
+    # rounds_strokes, with date_of_round copied down from its round
+    op.execute('ALTER TABLE rounds_strokes ADD COLUMN IF NOT EXISTS date_of_round DATE')
+    op.execute(
+        'UPDATE rounds_strokes s SET date_of_round = r.date_of_round '
+        'FROM rounds_courses rc, rounds_unpartitioned r '
+        'WHERE rc.round_course_id = s.round_course_id AND r.round_id = rc.round_id')
+    op.execute('ALTER TABLE rounds_strokes RENAME TO rounds_strokes_unpartitioned')
+    op.execute(
+        'CREATE TABLE rounds_strokes (LIKE rounds_strokes_unpartitioned '
+        'INCLUDING DEFAULTS) PARTITION BY RANGE (date_of_round)')
+    _create_partitions('rounds_strokes', _seasons('rounds_unpartitioned'))
+    op.execute('INSERT INTO rounds_strokes SELECT * FROM rounds_strokes_unpartitioned')
+
+    for table, id_column in PARTITIONED_TABLES:
+        _move_sequence(table, f'{table}_unpartitioned', id_column)
+        op.execute(f'DROP TABLE {table}_unpartitioned')
+        op.create_index(f'ix_{table}_{id_column}_date', table,
+                        [id_column, 'date_of_round'], unique=True)
+
+    op.create_index('ix_rounds_golfer_date', 'rounds', ['golfer_id', 'date_of_round'])
+    op.create_index('ix_rounds_tournament_id', 'rounds', ['tournament_id'])
+    op.create_index('ix_rounds_strokes_round_course', 'rounds_strokes', ['round_course_id'])
+    op.create_index('ix_rounds_strokes_golfer_date', 'rounds_strokes',
+                    ['golfer_id', 'date_of_round'])
+
+    for table, _ in PARTITIONED_TABLES:
+        _add_foreign_keys(table, foreign_keys[table])
+    op.add_column('rounds_courses', sa.Column('date_of_round', sa.Date()))
+    op.execute(
+        'UPDATE rounds_courses rc SET date_of_round = r.date_of_round '
+        'FROM rounds r WHERE r.round_id = rc.round_id')
+    op.create_foreign_key('rounds_courses_round_id_date_of_round_fkey', 'rounds_courses',
+                          'rounds', ['round_id', 'date_of_round'],
+                          ['round_id', 'date_of_round'])
+
+
+def downgrade():
+    foreign_keys = {table: _foreign_keys_from(table) for table, _ in PARTITIONED_TABLES}
+    op.drop_column('rounds_courses', 'date_of_round')
+
+    for table, id_column in PARTITIONED_TABLES:
+        op.execute(f'ALTER TABLE {table} RENAME TO {table}_partitioned')
+        op.execute(
+            f'CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS, '
+            f'PRIMARY KEY ({id_column}))')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {table}_partitioned')
+        _move_sequence(table, f'{table}_partitioned', id_column)
+        op.execute(f'DROP TABLE {table}_partitioned CASCADE')
+    op.create_index('ix_rounds_tournament_id', 'rounds', ['tournament_id'])
+
+    op.drop_column('rounds_strokes', 'date_of_round')
+    for table, _ in PARTITIONED_TABLES:
+        _add_foreign_keys(table, foreign_keys[table])
+    op.create_foreign_key('rounds_courses_round_id_fkey', 'rounds_courses', 'rounds',
+                          ['round_id'], ['round_id'])
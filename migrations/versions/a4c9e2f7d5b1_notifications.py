@@ -0,0 +1,34 @@
+"""notifications
+
+Invitations and updates sent from one golfer to another, used by the
+notifications blueprint.
+
+Revision ID: a4c9e2f7d5b1
+Revises: f1a8d3c6b2e9
+Create Date: 2026-10-19 16:58:12.730415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e2f7d5b1'
+down_revision = 'f1a8d3c6b2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('recipient_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('sender_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('match_id', sa.Integer()),
+        sa.Column('message', sa.String(255)),
+        sa.Column('read', sa.Boolean()))
+
+
+def downgrade():
+    op.drop_table('notifications')
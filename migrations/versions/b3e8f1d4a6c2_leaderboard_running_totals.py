@@ -0,0 +1,33 @@
+"""leaderboard running totals
+
+leaderboards.to_par and leaderboards.cut_score hold what the live
+leaderboard is ranked on, so a posted hole only recomputes its own golfer's
+row (from that golfer's score events) before re-ranking the field.
+
+Revision ID: b3e8f1d4a6c2
+Revises: a4c9e2f7d5b1
+Create Date: 2026-10-19 18:04:51.562309
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1d4a6c2'
+down_revision = 'a4c9e2f7d5b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('leaderboards', sa.Column('to_par', sa.Integer()))
+    op.add_column('leaderboards', sa.Column('cut_score', sa.Integer()))
+    op.create_index('ix_score_events_tournament_golfer', 'score_events',
+                    ['tournament_id', 'golfer_id'])
+
+
+def downgrade():
+    op.drop_index('ix_score_events_tournament_golfer', table_name='score_events')
+    op.drop_column('leaderboards', 'cut_score')
+    op.drop_column('leaderboards', 'to_par')
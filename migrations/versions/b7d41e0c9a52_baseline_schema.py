@@ -0,0 +1,129 @@
+"""baseline schema
+
+The tables as they were before migrations were added, so `flask db upgrade`
+can build an empty database from scratch. Databases created earlier from
+data.sql or db.create_all() already have them: run
+`flask db stamp b7d41e0c9a52` once, then upgrade as usual.
+
+Revision ID: b7d41e0c9a52
+Revises:
+Create Date: 2026-10-19 10:05:12.004217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e0c9a52'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'golfers',
+        sa.Column('golfer_id', sa.Integer(), primary_key=True),
+        sa.Column('golfer_name', sa.Text()),
+        sa.Column('username', sa.Text(), nullable=False, unique=True),
+        sa.Column('password', sa.Text(), nullable=False),
+        sa.Column('email', sa.Text(), nullable=False, unique=True),
+        sa.Column('GHIN', sa.Text()),
+        sa.Column('handicap', sa.Float()),
+        sa.Column('home_course', sa.Text()))
+    op.create_table(
+        'clubs',
+        sa.Column('club_id', sa.Integer(), primary_key=True),
+        sa.Column('club_name', sa.Text()),
+        sa.Column('city', sa.Text()),
+        sa.Column('state', sa.Text()))
+    op.create_table(
+        'courses',
+        sa.Column('course_id', sa.Integer(), primary_key=True),
+        sa.Column('course_name', sa.Text()),
+        sa.Column('club_id', sa.Integer(), sa.ForeignKey('clubs.club_id')))
+    op.create_table(
+        'courses_holes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('course_id', sa.Integer(), sa.ForeignKey('courses.course_id')),
+        sa.Column('number', sa.Integer()),
+        sa.Column('par', sa.Integer()),
+        sa.Column('handicap', sa.Integer()))
+    op.create_table(
+        'tees',
+        sa.Column('tee_id', sa.Integer(), primary_key=True),
+        sa.Column('course_id', sa.Integer(), sa.ForeignKey('courses.course_id')),
+        sa.Column('tee_name', sa.Text()),
+        sa.Column('slope', sa.Integer()),
+        sa.Column('rating', sa.Float()),
+        sa.Column('total_yards', sa.Integer()))
+    op.create_table(
+        'tee_holes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tee_id', sa.Integer(), sa.ForeignKey('tees.tee_id')),
+        sa.Column('hole_number', sa.Integer()),
+        sa.Column('yards', sa.Integer()))
+    op.create_table(
+        'golfer_rounds',
+        sa.Column('golfer_round_id', sa.Integer(), primary_key=True),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('round_id', sa.Integer()),
+        sa.Column('total_strokes', sa.Integer()),
+        sa.Column('total_holes', sa.Integer()))
+    op.create_table(
+        'results',
+        sa.Column('results_id', sa.Integer(), primary_key=True),
+        sa.Column('leaderboard', sa.JSON()),
+        sa.Column('tournament', sa.JSON()))
+    op.create_table(
+        'tournaments',
+        sa.Column('tournament_id', sa.Integer(), primary_key=True),
+        sa.Column('start_date', sa.Text()),
+        sa.Column('end_date', sa.Text()),
+        sa.Column('live_details', sa.JSON()),
+        sa.Column('name', sa.Text()),
+        sa.Column('type', sa.Text()),
+        sa.Column('results_id', sa.Integer(), sa.ForeignKey('results.results_id')),
+        sa.Column('number_of_players', sa.Integer()))
+    op.create_table(
+        'rounds',
+        sa.Column('round_id', sa.Integer(), primary_key=True),
+        sa.Column('club_id', sa.Integer(), sa.ForeignKey('clubs.club_id')),
+        sa.Column('date_of_round', sa.Date()),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')))
+    op.create_table(
+        'rounds_courses',
+        sa.Column('round_course_id', sa.Integer(), primary_key=True),
+        sa.Column('round_id', sa.Integer(), sa.ForeignKey('rounds.round_id')),
+        sa.Column('course_id', sa.Integer(), sa.ForeignKey('courses.course_id')),
+        sa.Column('sequence_number', sa.Integer()),
+        sa.Column('tee_id', sa.Integer(), sa.ForeignKey('tees.tee_id')))
+    op.create_table(
+        'rounds_strokes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('round_course_id', sa.Integer(),
+                  sa.ForeignKey('rounds_courses.round_course_id')),
+        sa.Column('hole_number', sa.Integer()),
+        sa.Column('strokes', sa.Integer()),
+        sa.Column('fairway_hit', sa.Boolean()),
+        sa.Column('green_in_reg', sa.Boolean()),
+        sa.Column('number_of_putts', sa.Integer()),
+        sa.Column('bunker_shot', sa.Boolean()))
+    op.create_table(
+        'leaderboards',
+        sa.Column('leaderboard_id', sa.Integer(), primary_key=True),
+        sa.Column('tournament_id', sa.Integer(),
+                  sa.ForeignKey('tournaments.tournament_id')),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('holes_played', sa.Integer()),
+        sa.Column('rounds_played', sa.Integer()),
+        sa.Column('position', sa.Integer()))
+
+
+def downgrade():
+    for table in ('leaderboards', 'rounds_strokes', 'rounds_courses', 'rounds',
+                  'tournaments', 'results', 'golfer_rounds', 'tee_holes', 'tees',
+                  'courses_holes', 'courses', 'clubs', 'golfers'):
+        op.drop_table(table)
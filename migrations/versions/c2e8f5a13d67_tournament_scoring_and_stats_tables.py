@@ -0,0 +1,72 @@
+"""tournament scoring, tee sheets, field stats and golfer rollups
+
+Adds leaderboards.score and rounds.tournament_id (multi-round scoring and
+the live leaderboard), tee_times, hole_field_stats and golfer_monthly_stats.
+
+Revision ID: c2e8f5a13d67
+Revises: b7d41e0c9a52
+Create Date: 2026-10-19 10:08:47.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8f5a13d67'
+down_revision = 'b7d41e0c9a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('leaderboards', sa.Column('score', sa.Integer()))
+    op.add_column('rounds', sa.Column(
+        'tournament_id', sa.Integer(), sa.ForeignKey('tournaments.tournament_id')))
+    op.create_index('ix_rounds_tournament_id', 'rounds', ['tournament_id'])
+
+    op.create_table(
+        'tee_times',
+        sa.Column('tee_time_id', sa.Integer(), primary_key=True),
+        sa.Column('tournament_id', sa.Integer(),
+                  sa.ForeignKey('tournaments.tournament_id')),
+        sa.Column('round_number', sa.Integer()),
+        sa.Column('group_number', sa.Integer()),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('tee_time', sa.DateTime()),
+        sa.Column('starting_hole', sa.Integer()))
+    op.create_index('ix_tee_times_tournament_id', 'tee_times', ['tournament_id'])
+
+    op.create_table(
+        'hole_field_stats',
+        sa.Column('tournament_id', sa.Integer(),
+                  sa.ForeignKey('tournaments.tournament_id'), primary_key=True),
+        sa.Column('course_id', sa.Integer(), sa.ForeignKey('courses.course_id'),
+                  primary_key=True),
+        sa.Column('hole_number', sa.Integer(), primary_key=True),
+        sa.Column('par', sa.Integer()),
+        *[sa.Column(column, sa.Integer()) for column in (
+            'holes_played', 'total_strokes', 'total_putts', 'eagles', 'birdies',
+            'pars', 'bogeys', 'double_bogeys')],
+        sa.Column('updated_at', sa.DateTime()))
+
+    op.create_table(
+        'golfer_monthly_stats',
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id'),
+                  primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        *[sa.Column(column, sa.Integer()) for column in (
+            'rounds', 'holes', 'strokes', 'fairway_opportunities', 'fairways_hit',
+            'greens_in_reg', 'putts', 'scramble_attempts', 'scrambles',
+            'par3_holes', 'par3_strokes', 'par4_holes', 'par4_strokes',
+            'par5_holes', 'par5_strokes')])
+
+
+def downgrade():
+    op.drop_table('golfer_monthly_stats')
+    op.drop_table('hole_field_stats')
+    op.drop_index('ix_tee_times_tournament_id', table_name='tee_times')
+    op.drop_table('tee_times')
+    op.drop_index('ix_rounds_tournament_id', table_name='rounds')
+    op.drop_column('rounds', 'tournament_id')
+    op.drop_column('leaderboards', 'score')
@@ -0,0 +1,32 @@
+"""tournament organizers
+
+tournaments.organizer_id names the golfer who runs a tournament and
+golfers.is_admin marks site admins; only they can write a tournament's tee
+sheet.
+
+Revision ID: c8d2f4a7e1b6
+Revises: b3e8f1d4a6c2
+Create Date: 2026-10-19 19:22:07.418936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d2f4a7e1b6'
+down_revision = 'b3e8f1d4a6c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('golfers', sa.Column('is_admin', sa.Boolean(), nullable=False,
+                                       server_default=sa.false()))
+    op.add_column('tournaments', sa.Column('organizer_id', sa.Integer(),
+                                           sa.ForeignKey('golfers.golfer_id')))
+
+
+def downgrade():
+    op.drop_column('tournaments', 'organizer_id')
+    op.drop_column('golfers', 'is_admin')
@@ -0,0 +1,32 @@
+"""shared leaderboard versions
+
+tournaments.leaderboard_version is bumped by every leaderboard write and
+leaderboards.version records the version each row last changed at, so
+every worker hands out the same versions to polling clients.
+
+Revision ID: d9a3b6e1f4c8
+Revises: 3f1c2a9d8b7e
+Create Date: 2026-10-19 15:21:36.870114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a3b6e1f4c8'
+down_revision = '3f1c2a9d8b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('tournaments', sa.Column(
+        'leaderboard_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('leaderboards', sa.Column(
+        'version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('leaderboards', 'version')
+    op.drop_column('tournaments', 'leaderboard_version')
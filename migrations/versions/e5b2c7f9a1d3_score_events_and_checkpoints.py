@@ -0,0 +1,53 @@
+"""score events and leaderboard checkpoints
+
+score_events is the append-only log of posted and corrected holes that
+leaderboards are replayed from; leaderboard_checkpoints holds replay state
+so replays don't start from the first event.
+
+Revision ID: e5b2c7f9a1d3
+Revises: d9a3b6e1f4c8
+Create Date: 2026-10-19 15:48:02.413957
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2c7f9a1d3'
+down_revision = 'd9a3b6e1f4c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'score_events',
+        sa.Column('event_id', sa.BigInteger(), primary_key=True),
+        sa.Column('event_type', sa.Text(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('tournament_id', sa.Integer(),
+                  sa.ForeignKey('tournaments.tournament_id')),
+        sa.Column('round_id', sa.Integer()),
+        sa.Column('round_course_id', sa.Integer()),
+        sa.Column('golfer_id', sa.Integer(), sa.ForeignKey('golfers.golfer_id')),
+        sa.Column('hole_number', sa.Integer()),
+        sa.Column('par', sa.Integer()),
+        sa.Column('strokes', sa.Integer()),
+        sa.Column('previous_strokes', sa.Integer()))
+    op.create_index('ix_score_events_tournament_event', 'score_events',
+                    ['tournament_id', 'event_id'])
+
+    op.create_table(
+        'leaderboard_checkpoints',
+        sa.Column('tournament_id', sa.Integer(),
+                  sa.ForeignKey('tournaments.tournament_id'), primary_key=True),
+        sa.Column('event_id', sa.BigInteger(), primary_key=True),
+        sa.Column('recorded_at', sa.DateTime()),
+        sa.Column('state', sa.JSON()))
+
+
+def downgrade():
+    op.drop_table('leaderboard_checkpoints')
+    op.drop_index('ix_score_events_tournament_event', table_name='score_events')
+    op.drop_table('score_events')
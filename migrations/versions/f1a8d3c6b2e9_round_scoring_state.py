@@ -0,0 +1,31 @@
+"""round scoring state columns
+
+Adds rounds_courses.number_of_holes (chosen when the round starts) and
+rounds_courses.scoring_version, bumped by every hole posted to the round so
+cached round states can tell when they are behind.
+
+Revision ID: f1a8d3c6b2e9
+Revises: e5b2c7f9a1d3
+Create Date: 2026-10-19 16:20:44.108263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a8d3c6b2e9'
+down_revision = 'e5b2c7f9a1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('rounds_courses', sa.Column('number_of_holes', sa.Integer()))
+    op.add_column('rounds_courses', sa.Column(
+        'scoring_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('rounds_courses', 'scoring_version')
+    op.drop_column('rounds_courses', 'number_of_holes')
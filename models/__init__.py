@@ -0,0 +1,26 @@
+'''SQLAlchemy models for Shore Tour Invitational'''
+
+from models.db import (
+    bcrypt,
+    db,
+    connect_db,
+    Golfer,
+    Club,
+    Course,
+    CourseHole,
+    Tee,
+    TeeHole,
+    GolferRound,
+    Round,
+    RoundCourse,
+    RoundStroke,
+    Leaderboard,
+    ScoreEvent,
+    LeaderboardCheckpoint,
+    TeeTime,
+    HoleFieldStat,
+    GolferMonthlyStat,
+    Tournament,
+    Result,
+    Notification,
+)
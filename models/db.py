@@ -3,13 +3,16 @@
 from datetime import datetime
 
 from flask_bcrypt import Bcrypt
+from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
 
+from db_routing import RoutingSession
+
 bcrypt = Bcrypt()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
-class Golfer(db.Model):
+class Golfer(UserMixin, db.Model):
     '''Connection of a Golfer <-> Golfer_Round'''
 
     __tablename__ = 'golfers'
@@ -22,10 +25,20 @@ class Golfer(db.Model):
     GHIN = db.Column(db.Text)
     handicap = db.Column(db.Float)
     home_course = db.Column(db.Text)
+    # site admins can manage any tournament
+    is_admin = db.Column(db.Boolean, nullable=False, default=False,
+                         server_default=db.false())
 
     def __repr__(self):
         return f"<User #{self.golfer_id}: {self.username}, {self.email}>"
 
+    def get_id(self):
+        return str(self.golfer_id)
+
+    def toJSON(self):
+        return {column.name: getattr(self, column.name)
+                for column in self.__table__.columns if column.name != 'password'}
+
     @classmethod
     def register(cls, golfer_name, email, username, password, GHIN):
 
@@ -104,7 +117,7 @@ class Course(db.Model):
 
     course_id = db.Column(db.Integer, primary_key=True)
     course_name = db.Column(db.Text)
-    club_id = db.Column(db.Integer, db.ForeignKey('club.club_id'))
+    club_id = db.Column(db.Integer, db.ForeignKey('clubs.club_id'))
 
 
 class CourseHole(db.Model):
@@ -113,7 +126,7 @@ class CourseHole(db.Model):
     __tablename__ = 'courses_holes'
 
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'))
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.course_id'))
     number = db.Column(db.Integer)
     par = db.Column(db.Integer)
     handicap = db.Column(db.Integer)
@@ -124,7 +137,7 @@ class Tee(db.Model):
     __tablename__ = 'tees'
 
     tee_id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'))
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.course_id'))
     tee_name = db.Column(db.Text)
     slope = db.Column(db.Integer)
     rating = db.Column(db.Float)
@@ -136,7 +149,7 @@ class TeeHole(db.Model):
     __tablename__ = 'tee_holes'
 
     id = db.Column(db.Integer, primary_key=True)
-    tee_id = db.Column(db.Integer, db.ForeignKey('tee.tee_id'))
+    tee_id = db.Column(db.Integer, db.ForeignKey('tees.tee_id'))
     hole_number = db.Column(db.Integer)
     yards = db.Column(db.Integer)
 
@@ -146,7 +159,7 @@ class GolferRound(db.Model):
     __tablename__ = 'golfer_rounds'
 
     golfer_round_id = db.Column(db.Integer, primary_key=True)
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'))
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
     round_id = db.Column(db.Integer)
     total_strokes = db.Column(db.Integer)
     total_holes = db.Column(db.Integer)
@@ -155,11 +168,17 @@ class GolferRound(db.Model):
 class Round(db.Model):
     '''many to many relationship with rounds and courses'''
     __tablename__ = 'rounds'
+    # rounds is partitioned on date_of_round, so this is what other tables
+    # can reference
+    __table_args__ = (db.Index('ix_rounds_round_id_date', 'round_id', 'date_of_round',
+                               unique=True),)
 
     round_id = db.Column(db.Integer, primary_key=True)
-    club_id = db.Column(db.Integer, db.ForeignKey('club.club_id'))
+    club_id = db.Column(db.Integer, db.ForeignKey('clubs.club_id'))
     date_of_round = db.Column(db.Date)
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'))
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey('tournaments.tournament_id'), index=True)
     golfer = db.relationship('Golfer', backref='rounds')
 
     @classmethod
@@ -171,16 +190,34 @@ class Round(db.Model):
         db.session.commit()
         return round
 
+    @classmethod
+    def date_range(cls, tournament_id):
+        """First and last date_of_round of a tournament, (None, None) if it has no rounds.
+
+        Filtering on this range lets Postgres skip the season partitions of
+        rounds and rounds_strokes that the tournament can't be in.
+        """
+        return db.session.query(
+            db.func.min(cls.date_of_round), db.func.max(cls.date_of_round)).filter(
+            cls.tournament_id == tournament_id).one()
+
 
 class RoundCourse(db.Model):
     '''slecting tee and 9 or 18 holes'''
     __tablename__ = 'rounds_courses'
+    __table_args__ = (db.ForeignKeyConstraint(
+        ['round_id', 'date_of_round'], ['rounds.round_id', 'rounds.date_of_round']),)
 
     round_course_id = db.Column(db.Integer, primary_key=True)
-    round_id = db.Column(db.Integer, db.ForeignKey('round.round_id'))
-    course_id = db.Column(db.Integer, db.ForeignKey('course.course_id'))
+    round_id = db.Column(db.Integer)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.course_id'))
     sequence_number = db.Column(db.Integer)
-    tee_id = db.Column(db.Integer, db.ForeignKey('tee.tee_id'))
+    tee_id = db.Column(db.Integer, db.ForeignKey('tees.tee_id'))
+    number_of_holes = db.Column(db.Integer)
+    # bumped by every hole posted to the round, see round_state.py
+    scoring_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # copied from the round, which is only unique together with its date
+    date_of_round = db.Column(db.Date)
 
 
 class RoundStroke(db.Model):
@@ -188,15 +225,17 @@ class RoundStroke(db.Model):
     __tablename__ = 'rounds_strokes'
 
     id = db.Column(db.Integer, primary_key=True)
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'))
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
     round_course_id = db.Column(
-        db.Integer, db.ForeignKey('round_course.round_course_id'))
+        db.Integer, db.ForeignKey('rounds_courses.round_course_id'))
     hole_number = db.Column(db.Integer)
     strokes = db.Column(db.Integer)
     fairway_hit = db.Column(db.Boolean)
     green_in_reg = db.Column(db.Boolean)
     number_of_putts = db.Column(db.Integer)
     bunker_shot = db.Column(db.Boolean)
+    # copied from the round so rounds_strokes can be partitioned by season
+    date_of_round = db.Column(db.Date)
 
 
 class Leaderboard(db.Model):
@@ -205,11 +244,112 @@ class Leaderboard(db.Model):
 
     leaderboard_id = db.Column(db.Integer, primary_key=True)
     tournament_id = db.Column(
-        db.Integer, db.ForeignKey('tournament.tournament_id'))
-    golfer_id = db.Column(db.Integer, db.ForeignKey('golfer.golfer_id'))
+        db.Integer, db.ForeignKey('tournaments.tournament_id'))
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    score = db.Column(db.Integer)
     holes_played = db.Column(db.Integer)
     rounds_played = db.Column(db.Integer)
     position = db.Column(db.Integer)
+    # score to par the live leaderboard is ranked on, and score to par
+    # through the cut round (None until the golfer has played that far)
+    to_par = db.Column(db.Integer)
+    cut_score = db.Column(db.Integer)
+    # tournaments.leaderboard_version this row last changed at
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+class ScoreEvent(db.Model):
+    '''append-only record of every hole posted or corrected'''
+    __tablename__ = 'score_events'
+    __table_args__ = (db.Index('ix_score_events_tournament_event',
+                               'tournament_id', 'event_id'),
+                      db.Index('ix_score_events_tournament_golfer',
+                               'tournament_id', 'golfer_id'))
+
+    event_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'),
+                         primary_key=True)
+    event_type = db.Column(db.Text, nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey('tournaments.tournament_id'))
+    round_id = db.Column(db.Integer)
+    round_course_id = db.Column(db.Integer)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    hole_number = db.Column(db.Integer)
+    par = db.Column(db.Integer)
+    strokes = db.Column(db.Integer)
+    # strokes the hole had before a correction
+    previous_strokes = db.Column(db.Integer)
+
+
+class LeaderboardCheckpoint(db.Model):
+    '''replay state of a tournament as of one score event'''
+    __tablename__ = 'leaderboard_checkpoints'
+
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey('tournaments.tournament_id'), primary_key=True)
+    event_id = db.Column(db.BigInteger, primary_key=True)
+    recorded_at = db.Column(db.DateTime)
+    state = db.Column(db.JSON)
+
+
+class TeeTime(db.Model):
+    '''places a golfer in a group with a tee time for one tournament round'''
+    __tablename__ = 'tee_times'
+
+    tee_time_id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey('tournaments.tournament_id'), index=True)
+    round_number = db.Column(db.Integer)
+    group_number = db.Column(db.Integer)
+    golfer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    tee_time = db.Column(db.DateTime)
+    starting_hole = db.Column(db.Integer)
+
+
+class HoleFieldStat(db.Model):
+    '''running scoring totals for one hole across a tournament field'''
+    __tablename__ = 'hole_field_stats'
+
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey('tournaments.tournament_id'), primary_key=True)
+    course_id = db.Column(
+        db.Integer, db.ForeignKey('courses.course_id'), primary_key=True)
+    hole_number = db.Column(db.Integer, primary_key=True)
+    par = db.Column(db.Integer)
+    holes_played = db.Column(db.Integer, default=0)
+    total_strokes = db.Column(db.Integer, default=0)
+    total_putts = db.Column(db.Integer, default=0)
+    eagles = db.Column(db.Integer, default=0)
+    birdies = db.Column(db.Integer, default=0)
+    pars = db.Column(db.Integer, default=0)
+    bogeys = db.Column(db.Integer, default=0)
+    double_bogeys = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime)
+
+
+class GolferMonthlyStat(db.Model):
+    '''per golfer per month rollup of hole-by-hole stats for dashboards'''
+    __tablename__ = 'golfer_monthly_stats'
+
+    golfer_id = db.Column(
+        db.Integer, db.ForeignKey('golfers.golfer_id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    rounds = db.Column(db.Integer, default=0)
+    holes = db.Column(db.Integer, default=0)
+    strokes = db.Column(db.Integer, default=0)
+    fairway_opportunities = db.Column(db.Integer, default=0)
+    fairways_hit = db.Column(db.Integer, default=0)
+    greens_in_reg = db.Column(db.Integer, default=0)
+    putts = db.Column(db.Integer, default=0)
+    scramble_attempts = db.Column(db.Integer, default=0)
+    scrambles = db.Column(db.Integer, default=0)
+    par3_holes = db.Column(db.Integer, default=0)
+    par3_strokes = db.Column(db.Integer, default=0)
+    par4_holes = db.Column(db.Integer, default=0)
+    par4_strokes = db.Column(db.Integer, default=0)
+    par5_holes = db.Column(db.Integer, default=0)
+    par5_strokes = db.Column(db.Integer, default=0)
 
 
 class Tournament(db.Model):
@@ -225,6 +365,11 @@ class Tournament(db.Model):
     type = db.Column(db.Text)
     results_id = db.Column(db.Integer, db.ForeignKey('results.results_id'))
     number_of_players = db.Column(db.Integer)
+    # golfer who runs the tournament: sets the tee sheet, with site admins
+    organizer_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    # bumped by every write to the tournament's leaderboards rows
+    leaderboard_version = db.Column(db.Integer, nullable=False, default=0,
+                                    server_default='0')
 
 
 class Result(db.Model):
@@ -236,11 +381,32 @@ class Result(db.Model):
     tournament = db.Column(db.JSON)
 
 
+class Notification(db.Model):
+    '''invitation or update sent from one golfer to another'''
+    __tablename__ = 'notifications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    sender_id = db.Column(db.Integer, db.ForeignKey('golfers.golfer_id'))
+    match_id = db.Column(db.Integer)
+    message = db.Column(db.String(255))
+    read = db.Column(db.Boolean, default=False)
+
+    @classmethod
+    def send_invitation_notification(cls, sender, recipient, match):
+        """Invite `recipient` to join `match` on behalf of `sender`."""
+        message = f"You've been invited to join a {match.match_type} match by {sender.username}."
+        notification = cls(recipient_id=recipient.golfer_id, sender_id=sender.golfer_id,
+                           match_id=match.id, message=message)
+        db.session.add(notification)
+        db.session.commit()
+        return notification
+
+
 def connect_db(app):
     """Connect this database to provided Flask app.
 
-    You should call this in your Flask app.
+    You should call this in your Flask app factory. No app context is pushed,
+    so the app stays safe to import before forking workers.
     """
-    app.app_context().push()
-    db.app = app
     db.init_app(app)
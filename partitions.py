@@ -0,0 +1,172 @@
+'''Season partition maintenance for rounds and rounds_strokes
+
+Both tables are range partitioned on date_of_round with one partition per
+calendar year (see the 3f1c2a9d8b7e migration). New seasons need their
+partitions created ahead of time, and old seasons can be detached and
+archived to compressed Parquet so live queries and indexes stay small.
+A season's rounds_courses rows are archived and deleted with it, since they
+reference its rounds.
+'''
+
+from datetime import date
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from models import db
+
+
+# In the order a season is detached: rounds_strokes references
+# rounds_courses, which references rounds
+PARTITIONED_TABLES = ('rounds_strokes', 'rounds')
+ARCHIVE_BATCH_SIZE = 50000
+
+# Archived columns of each table. Every batch is converted with these, so a
+# batch whose first rows are all NULL in a column still matches the file.
+ARCHIVE_SCHEMAS = {
+    'rounds': pa.schema([
+        ('round_id', pa.int32()),
+        ('club_id', pa.int32()),
+        ('date_of_round', pa.date32()),
+        ('golfer_id', pa.int32()),
+        ('tournament_id', pa.int32()),
+    ]),
+    'rounds_strokes': pa.schema([
+        ('id', pa.int32()),
+        ('golfer_id', pa.int32()),
+        ('round_course_id', pa.int32()),
+        ('hole_number', pa.int16()),
+        ('strokes', pa.int16()),
+        ('fairway_hit', pa.bool_()),
+        ('green_in_reg', pa.bool_()),
+        ('number_of_putts', pa.int16()),
+        ('bunker_shot', pa.bool_()),
+        ('date_of_round', pa.date32()),
+    ]),
+    'rounds_courses': pa.schema([
+        ('round_course_id', pa.int32()),
+        ('round_id', pa.int32()),
+        ('course_id', pa.int32()),
+        ('sequence_number', pa.int16()),
+        ('tee_id', pa.int32()),
+        ('number_of_holes', pa.int16()),
+        ('scoring_version', pa.int32()),
+        ('date_of_round', pa.date32()),
+    ]),
+}
+
+
+def partition_name(table, season):
+    return f'{table}_{season}'
+
+
+def list_seasons(table):
+    '''Seasons that currently have an attached partition of `table`.'''
+    names = db.session.execute(text(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        'WHERE parent.relname = :table'), {'table': table}).scalars().all()
+    pattern = re.compile(rf'^{table}_(\d{{4}})$')
+    return sorted(int(match.group(1)) for match in map(pattern.match, names) if match)
+
+
+def create_partitions(ahead=1, today=None):
+    '''Make sure this season and the next `ahead` seasons have partitions.
+
+    Returns the partitions that were created.
+    '''
+    this_year = (today or date.today()).year
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = set(list_seasons(table))
+        for season in range(this_year, this_year + ahead + 1):
+            if season in existing:
+                continue
+            db.session.execute(text(
+                f'CREATE TABLE {partition_name(table, season)} PARTITION OF {table} '
+                f"FOR VALUES FROM ('{season}-01-01') TO ('{season + 1}-01-01')"))
+            created.append(partition_name(table, season))
+    db.session.commit()
+    return created
+
+
+def _write_parquet(table, source, path, params=None):
+    '''Copy rows of `table` read from `source` to a zstd compressed Parquet file in batches.
+
+    `source` is a partition or a FROM ... WHERE clause with `params`.
+    '''
+    schema = ARCHIVE_SCHEMAS[table]
+    result = db.session.execute(text(
+        f'SELECT {", ".join(schema.names)} FROM {source}').execution_options(
+        yield_per=ARCHIVE_BATCH_SIZE), params or {})
+    rows_written = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for rows in result.partitions():
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(schema.names, row)) for row in rows], schema=schema))
+            rows_written += len(rows)
+    return rows_written
+
+
+def _drop_foreign_keys(table):
+    '''Drop a detached partition's foreign keys so it no longer holds up deletes.'''
+    names = db.session.execute(text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)"),
+        {'table': table}).scalars().all()
+    for name in names:
+        db.session.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+
+
+def archive_season(season, archive_dir, drop=True):
+    '''Archive one season of every partitioned table, and its rounds_courses rows.
+
+    Each partition is written to `archive_dir/<table>_<season>.parquet` and
+    then detached; with `drop` the detached table is dropped as well,
+    otherwise it is kept without its foreign keys. The season's
+    rounds_courses rows go to `rounds_courses_<season>.parquet` and are
+    deleted before its rounds are detached. Returns {table or partition: rows
+    archived}.
+    '''
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = {}
+    start, end = date(season, 1, 1), date(season + 1, 1, 1)
+    for table in PARTITIONED_TABLES:
+        if season not in list_seasons(table):
+            continue
+        if table == 'rounds':
+            round_courses = partition_name('rounds_courses', season)
+            archived[round_courses] = _write_parquet(
+                'rounds_courses',
+                'rounds_courses WHERE date_of_round >= :start AND date_of_round < :end',
+                os.path.join(archive_dir, f'{round_courses}.parquet'),
+                {'start': start, 'end': end})
+            db.session.execute(text(
+                'DELETE FROM rounds_courses '
+                'WHERE date_of_round >= :start AND date_of_round < :end'),
+                {'start': start, 'end': end})
+        partition = partition_name(table, season)
+        archived[partition] = _write_parquet(
+            table, partition, os.path.join(archive_dir, f'{partition}.parquet'))
+        db.session.execute(text(f'ALTER TABLE {table} DETACH PARTITION {partition}'))
+        if drop:
+            db.session.execute(text(f'DROP TABLE {partition}'))
+        else:
+            _drop_foreign_keys(partition)
+        db.session.commit()
+    return archived
+
+
+def archive_old_seasons(keep, archive_dir, drop=True, today=None):
+    '''Archive every season older than the most recent `keep` seasons.'''
+    oldest_kept = (today or date.today()).year - keep + 1
+    seasons = sorted({season for table in PARTITIONED_TABLES
+                      for season in list_seasons(table) if season < oldest_kept})
+    archived = {}
+    for season in seasons:
+        archived.update(archive_season(season, archive_dir, drop=drop))
+    return archived
@@ -0,0 +1,292 @@
+'''Opt-in request profiling
+
+With PROFILING on, every request's time is split into database, template
+render and JSON serialization phases and added to per-route histograms
+(GET /api/profiling/timings), and each response gets a Server-Timing
+header. A single request can also be profiled on demand by sending
+X-Profile-Token: <PROFILE_TOKEN> with X-Profile: collapsed (a sampling
+profile in collapsed-stack format, ready for flamegraph.pl or speedscope)
+or X-Profile: pstats (cProfile, for pstats/snakeviz). The file is written to
+PROFILE_DIR and its name returned in the X-Profile-File header.
+
+With PROFILING off nothing is registered at all, so there is no per-request
+cost.
+'''
+
+from bisect import bisect_left
+from collections import Counter
+import cProfile
+import hmac
+import os
+import sys
+from threading import Event, Lock, Thread, get_ident
+import time
+
+from flask import before_render_template, current_app, g, has_request_context, jsonify, request, template_rendered
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+PHASES = ('total', 'db', 'render', 'serialize')
+PROFILE_FORMATS = ('collapsed', 'pstats')
+
+# Upper bounds (ms) of the histogram buckets, the last bucket is open ended
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_histograms = {}
+_histograms_lock = Lock()
+
+# Samplers running in this process and the switch interval to put back
+# when the last of them stops
+_sampling = [0, None]
+_sampling_lock = Lock()
+
+
+class Histogram:
+    '''Fixed bucket histogram of phase durations in milliseconds.'''
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        '''Upper bound of the bucket holding the q-th percentile.'''
+        if not self.count:
+            return None
+        target = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def toJSON(self):
+        return {'count': self.count,
+                'mean_ms': round(self.total / self.count, 3) if self.count else None,
+                'p50_ms': self.percentile(50),
+                'p95_ms': self.percentile(95),
+                'p99_ms': self.percentile(99),
+                'max_ms': round(self.max, 3),
+                'buckets': dict(zip([f'le_{bound}' for bound in BUCKETS_MS] + ['inf'],
+                                    self.counts))}
+
+
+def observe(endpoint, phase, ms):
+    with _histograms_lock:
+        histogram = _histograms.get((endpoint, phase))
+        if histogram is None:
+            histogram = _histograms[(endpoint, phase)] = Histogram()
+        histogram.observe(ms)
+
+
+def route_timings():
+    '''{endpoint: {phase: histogram summary}} for this process.'''
+    timings = {}
+    with _histograms_lock:
+        for (endpoint, phase), histogram in sorted(_histograms.items()):
+            timings.setdefault(endpoint, {})[phase] = histogram.toJSON()
+    return timings
+
+
+def reset_timings():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def _phases():
+    return g.get('_profile_phases') if has_request_context() else None
+
+
+def _add(phase, seconds):
+    phases = _phases()
+    if phases is not None:
+        phases[phase] += seconds
+
+
+# Database time: every cursor execute on any engine
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['_profile_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('_profile_started', None)
+    if started is not None:
+        _add('db', time.perf_counter() - started)
+
+
+# Template render time
+
+def _before_render(sender, template, context, **extra):
+    if _phases() is not None:
+        g._profile_render_started = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    started = g.pop('_profile_render_started', None) if has_request_context() else None
+    if started is not None:
+        _add('render', time.perf_counter() - started)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    '''JSON provider that counts time spent in dumps() as serialization.'''
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            _add('serialize', time.perf_counter() - started)
+
+
+class StackSampler(Thread):
+    '''Samples one thread's Python stack every `interval` seconds.
+
+    Stacks are kept as collapsed 'outer;...;inner' strings with a count, the
+    format flamegraph.pl and speedscope read. The GIL switch interval
+    (5ms by default) is lowered to `interval` while sampling, otherwise a
+    busy request thread would only let the sampler run every 5ms. The
+    interval is process-wide, so overlapping samplers share one change and
+    the last to stop restores the original.
+    '''
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True, name='profile-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = Event()
+
+    def start(self):
+        with _sampling_lock:
+            if not _sampling[0]:
+                _sampling[1] = sys.getswitchinterval()
+            _sampling[0] += 1
+            sys.setswitchinterval(min(self.interval, sys.getswitchinterval()))
+        super().start()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        with _sampling_lock:
+            _sampling[0] -= 1
+            if not _sampling[0]:
+                sys.setswitchinterval(_sampling[1])
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def _profile_requested():
+    token = current_app.config['PROFILE_TOKEN']
+    if not token or request.headers.get('X-Profile') not in PROFILE_FORMATS:
+        return None
+    if not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+        return None
+    return request.headers['X-Profile']
+
+
+def _start_request():
+    g._profile_phases = dict.fromkeys(PHASES[1:], 0.0)
+    g._profile_started = time.perf_counter()
+
+    profile_format = _profile_requested()
+    if profile_format == 'pstats':
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+    elif profile_format == 'collapsed':
+        g._profiler = StackSampler(get_ident(), current_app.config['PROFILE_SAMPLE_INTERVAL'])
+        g._profiler.start()
+
+
+def _stop_profiler():
+    profiler = g.pop('_profiler', None)
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    elif profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def _finish_request(response):
+    profiler = _stop_profiler()
+    phases = g.pop('_profile_phases', None)
+    if phases is None:
+        return response
+
+    endpoint = request.endpoint or 'unmatched'
+    phases['total'] = time.perf_counter() - g._profile_started
+    for phase, seconds in phases.items():
+        observe(endpoint, phase, seconds * 1000)
+    response.headers['Server-Timing'] = ', '.join(
+        f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in phases.items())
+
+    if profiler is not None:
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        extension = 'pstats' if isinstance(profiler, cProfile.Profile) else 'collapsed'
+        filename = f'{endpoint}-{int(time.time() * 1000)}-{os.getpid()}.{extension}'
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(os.path.join(directory, filename))
+        else:
+            profiler.write(os.path.join(directory, filename))
+        response.headers['X-Profile-File'] = filename
+    return response
+
+
+def _cleanup_request(exc):
+    # after_request doesn't run when a view raises, so make sure a sampler
+    # thread never outlives its request
+    _stop_profiler()
+
+
+def timings_view():
+    token = current_app.config['PROFILE_TOKEN']
+    if not token or not hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token):
+        return jsonify({'error': 'X-Profile-Token required'}), 403
+    return jsonify({'pid': os.getpid(), 'routes': route_timings()}), 200
+
+
+def init_profiling(app):
+    '''Hook request timing and on-demand profiling into `app` if PROFILING is set.'''
+    app.config.setdefault('PROFILING', False)
+    app.config.setdefault('PROFILE_TOKEN', None)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_INTERVAL', 0.001)
+    if not app.config['PROFILING']:
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.json = TimedJSONProvider(app)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_cleanup_request)
+    app.add_url_rule('/api/profiling/timings', 'profiling_timings', timings_view)
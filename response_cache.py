@@ -0,0 +1,163 @@
+'''Compressed, revalidatable responses for results and leaderboard routes
+
+@cached_response gives a view:
+
+- a strong ETag (a hash of the body, tagged with the content coding) and a
+  304 Not Modified when the client already has it,
+- gzip or brotli (when the brotli package is installed) for bodies of at
+  least COMPRESS_MIN_SIZE bytes, picked from Accept-Encoding,
+- Cache-Control: 'no-cache' for live data (max_age=0), so clients and
+  proxies keep a copy but revalidate every poll, or a short max-age with
+  stale-while-revalidate for pages that can be a few seconds old.
+
+Bodies are compressed once per distinct body and kept in a bounded LRU, so
+every poller that sees the same leaderboard shares one compression. Views
+with a cheap `version(**view_args)` go further: the whole response is
+cached per (URL, version) and the view doesn't run at all until the
+version changes.
+'''
+
+from collections import OrderedDict
+from functools import wraps
+import gzip
+import hashlib
+from threading import Lock
+
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Distinct bodies (with their compressed variants) kept per process
+CACHE_ENTRIES = 512
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class CachedBody:
+    '''One response body plus its compressed variants, built on demand.'''
+
+    __slots__ = ('body', 'digest', 'mimetype', 'variants', '_lock')
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.mimetype = mimetype
+        self.variants = {}
+        self._lock = Lock()
+
+    def etag(self, encoding):
+        return f'{self.digest}-{encoding}' if encoding else self.digest
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.body
+        with self._lock:
+            data = self.variants.get(encoding)
+            if data is None:
+                if encoding == 'br':
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self.variants[encoding] = data
+            return data
+
+
+class BodyCache:
+    '''LRU of CachedBody keyed by body digest or by (URL, data version).'''
+
+    def __init__(self, size=CACHE_ENTRIES):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            return entry
+
+
+_bodies = BodyCache()
+
+
+def choose_encoding(size):
+    '''Best coding the client accepts for a body of `size` bytes, or None.'''
+    if size < COMPRESS_MIN_SIZE:
+        return None
+    accepted = request.accept_encodings
+    encodings = [encoding for encoding in ENCODINGS if accepted[encoding]]
+    if not encodings:
+        return None
+    return max(encodings, key=lambda encoding: accepted[encoding])
+
+
+def cache_control(max_age, private=False):
+    scope = 'private' if private else 'public'
+    if not max_age:
+        return f'{scope}, no-cache'
+    return f'{scope}, max-age={max_age}, stale-while-revalidate={max_age * 5}'
+
+
+def _respond(entry, status, headers, max_age, private):
+    encoding = choose_encoding(len(entry.body))
+    etag = entry.etag(encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(entry.encoded(encoding), status)
+        response.headers.update(headers)
+        response.mimetype = entry.mimetype
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control(max_age, private)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_response(max_age=0, private=False, version=None):
+    '''Compress, ETag and cache a GET view's 200 responses.
+
+    `version`, if given, is called with the view's arguments and returns a
+    value that changes whenever the response would; the rendered response
+    is then reused for the same URL and version.
+    '''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = None
+            if version is not None:
+                key = (request.endpoint, request.full_path, version(*args, **kwargs))
+                entry = _bodies.get(key)
+                if entry is not None:
+                    return _respond(entry, 200, {}, max_age, private)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed \
+                    or 'Content-Encoding' in response.headers:
+                return response
+
+            entry = CachedBody(response.get_data(), response.mimetype)
+            entry = _bodies.put(key or entry.digest, entry)
+            extra = {name: value for name, value in response.headers.items()
+                     if name not in ('Content-Type', 'Content-Length')}
+            return _respond(entry, 200, extra if key is None else {}, max_age, private)
+        return wrapper
+    return decorator
@@ -0,0 +1,280 @@
+'''In-progress round state for hole by hole scoring
+
+Each round being scored keeps a small RoundState: the number of holes, the
+tee, per-hole par and yardage, the strokes entered so far and the running
+total. It is built once (when the round starts, or from the database on a
+miss) and updated on every posted hole, so moving between holes and showing
+the running score never touches the database.
+
+Rounds are keyed by the round_id in the scoring URLs, which is the
+rounds_courses.round_course_id that RoundStroke rows point at.
+
+Every posted hole bumps rounds_courses.scoring_version in its own
+transaction, and each state records the version it was built at. A post
+only updates a cached state that is exactly one version behind; anything
+else means another request got there first, and the state is dropped and
+reloaded.
+
+By default states live in a bounded per-process dict, which suits a single
+worker: reads never touch the database, and a state that missed a post
+(one made through another worker) is only caught by the version check when
+this worker next posts to the round. Deployments with several workers
+should set ROUND_STATE_REDIS_URL to share the states in Redis instead;
+posts update them with WATCH/MULTI, so two quick posts to the same round
+can't overwrite each other.
+'''
+
+from collections import OrderedDict
+from datetime import date
+import json
+from threading import Lock
+
+from flask import current_app
+
+from models import db, CourseHole, Round, RoundCourse, RoundStroke, TeeHole
+
+
+# Rounds kept by the per-process store before the least recently used is dropped
+LOCAL_MAX_ROUNDS = 5000
+
+# Seconds a round's state is kept in Redis after its last update
+REDIS_TTL = 12 * 60 * 60
+
+
+class RoundState:
+    '''Course, tee and scoring context of one round, indexed by hole number - 1.'''
+
+    __slots__ = ('round_id', 'golfer_id', 'course_id', 'tee_id', 'date_of_round',
+                 'number_of_holes', 'pars', 'yards', 'strokes', 'version')
+
+    def __init__(self, round_id, golfer_id, course_id, tee_id, date_of_round,
+                 number_of_holes, pars, yards, strokes=None, version=0):
+        self.round_id = round_id
+        # golfer whose round it is
+        self.golfer_id = golfer_id
+        self.course_id = course_id
+        self.tee_id = tee_id
+        self.date_of_round = date_of_round
+        self.number_of_holes = number_of_holes
+        self.pars = pars
+        self.yards = yards
+        self.strokes = strokes or [None] * number_of_holes
+        # rounds_courses.scoring_version this state was built at
+        self.version = version
+
+    def has_hole(self, hole_number):
+        return 1 <= hole_number <= self.number_of_holes
+
+    def par(self, hole_number):
+        return self.pars[hole_number - 1]
+
+    def yardage(self, hole_number):
+        return self.yards[hole_number - 1]
+
+    def entered(self, hole_number):
+        return self.strokes[hole_number - 1]
+
+    def record(self, hole_number, strokes):
+        self.strokes[hole_number - 1] = strokes
+
+    @property
+    def holes_played(self):
+        return sum(1 for strokes in self.strokes if strokes is not None)
+
+    @property
+    def total(self):
+        return sum(strokes for strokes in self.strokes if strokes is not None)
+
+    @property
+    def to_par(self):
+        return sum(strokes - (par or strokes)
+                   for strokes, par in zip(self.strokes, self.pars) if strokes is not None)
+
+    def toJSON(self):
+        return {'round_id': self.round_id, 'golfer_id': self.golfer_id,
+                'course_id': self.course_id,
+                'tee_id': self.tee_id,
+                'date_of_round': self.date_of_round.isoformat() if self.date_of_round else None,
+                'number_of_holes': self.number_of_holes, 'pars': self.pars,
+                'yards': self.yards, 'strokes': self.strokes, 'version': self.version}
+
+    @classmethod
+    def fromJSON(cls, data):
+        data = dict(data)
+        if data['date_of_round']:
+            data['date_of_round'] = date.fromisoformat(data['date_of_round'])
+        return cls(**data)
+
+
+class LocalRoundStateStore:
+    '''Per-process LRU dict of round states.'''
+
+    def __init__(self, max_rounds=LOCAL_MAX_ROUNDS):
+        self.max_rounds = max_rounds
+        self._states = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, round_id):
+        with self._lock:
+            state = self._states.get(round_id)
+            if state is not None:
+                self._states.move_to_end(round_id)
+            return state
+
+    def set(self, state):
+        with self._lock:
+            self._states[state.round_id] = state
+            self._states.move_to_end(state.round_id)
+            while len(self._states) > self.max_rounds:
+                self._states.popitem(last=False)
+
+    def delete(self, round_id):
+        with self._lock:
+            self._states.pop(round_id, None)
+
+    def update(self, round_id, change):
+        '''Apply `change(state)` to a cached state; a None result drops it.'''
+        with self._lock:
+            state = self._states.get(round_id)
+            if state is None:
+                return None
+            state = change(state)
+            if state is None:
+                del self._states[round_id]
+            return state
+
+
+class RedisRoundStateStore:
+    '''Round states shared by every worker, stored as JSON in Redis.'''
+
+    def __init__(self, url, ttl=REDIS_TTL):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _key(self, round_id):
+        # v2 states carry golfer_id; older ones are left to expire
+        return f'round_state:v2:{round_id}'
+
+    def get(self, round_id):
+        data = self.client.get(self._key(round_id))
+        return RoundState.fromJSON(json.loads(data)) if data else None
+
+    def set(self, state):
+        self.client.set(self._key(state.round_id), json.dumps(state.toJSON()), ex=self.ttl)
+
+    def delete(self, round_id):
+        self.client.delete(self._key(round_id))
+
+    def update(self, round_id, change):
+        '''Apply `change(state)` to a stored state; a None result drops it.
+
+        Runs under WATCH, so it is retried if another worker writes the
+        state in between.
+        '''
+        key = self._key(round_id)
+
+        def apply(pipe):
+            data = pipe.get(key)
+            state = change(RoundState.fromJSON(json.loads(data))) if data else None
+            pipe.multi()
+            if state is None:
+                pipe.delete(key)
+            else:
+                pipe.set(key, json.dumps(state.toJSON()), ex=self.ttl)
+            return state
+
+        return self.client.transaction(apply, key, value_from_callable=True)
+
+
+def _store():
+    return current_app.extensions['round_state']
+
+
+def load_round_state(round_id):
+    '''Build a round's state from the database, or None if there's no such round.'''
+    round_course = db.session.query(
+        RoundCourse.course_id, RoundCourse.tee_id, RoundCourse.number_of_holes,
+        RoundCourse.scoring_version, Round.golfer_id, Round.date_of_round
+    ).join(Round, Round.round_id == RoundCourse.round_id).filter(
+        RoundCourse.round_course_id == round_id).first()
+    if round_course is None:
+        return None
+
+    pars = dict(db.session.query(CourseHole.number, CourseHole.par).filter(
+        CourseHole.course_id == round_course.course_id).all())
+    yards = dict(db.session.query(TeeHole.hole_number, TeeHole.yards).filter(
+        TeeHole.tee_id == round_course.tee_id).all())
+    number_of_holes = round_course.number_of_holes or len(pars) or 18
+    state = RoundState(
+        round_id, round_course.golfer_id, round_course.course_id, round_course.tee_id, round_course.date_of_round,
+        number_of_holes,
+        [pars.get(hole) for hole in range(1, number_of_holes + 1)],
+        [yards.get(hole) for hole in range(1, number_of_holes + 1)],
+        version=round_course.scoring_version or 0)
+    for hole_number, strokes in db.session.query(
+            RoundStroke.hole_number, RoundStroke.strokes).filter(
+            RoundStroke.round_course_id == round_id,
+            RoundStroke.date_of_round == round_course.date_of_round):
+        if state.has_hole(hole_number):
+            state.record(hole_number, strokes)
+    return state
+
+
+def scoring_version(round_id):
+    return db.session.query(RoundCourse.scoring_version).filter_by(
+        round_course_id=round_id).scalar()
+
+
+def next_scoring_version(round_id):
+    '''Bump a round's scoring_version and return the new value.
+
+    Call this in the transaction that posts the hole and pass the result to
+    record_hole() once it commits. Doesn't commit.
+    '''
+    RoundCourse.query.filter_by(round_course_id=round_id).update(
+        {RoundCourse.scoring_version: RoundCourse.scoring_version + 1},
+        synchronize_session=False)
+    return scoring_version(round_id)
+
+
+def get_round_state(round_id):
+    '''The round's cached state, loading it from the database on a miss.'''
+    store = _store()
+    state = store.get(round_id)
+    if state is None:
+        state = load_round_state(round_id)
+        if state is not None:
+            store.set(state)
+    return state
+
+
+def record_hole(round_id, hole_number, strokes, version):
+    '''Update a round's state after a hole is posted or corrected.
+
+    `version` is the scoring_version from next_scoring_version() in the
+    post's transaction. A cached state that isn't exactly one version
+    behind has missed (or already seen) other posts, so it is dropped and
+    the next read reloads it.
+    '''
+    def change(state):
+        if state.version != version - 1 or not state.has_hole(hole_number):
+            return None
+        state.record(hole_number, strokes)
+        state.version = version
+        return state
+
+    return _store().update(round_id, change)
+
+
+def forget_round(round_id):
+    _store().delete(round_id)
+
+
+def init_round_state(app):
+    '''Pick the round state store for `app` from ROUND_STATE_REDIS_URL.'''
+    app.config.setdefault('ROUND_STATE_REDIS_URL', None)
+    if app.config['ROUND_STATE_REDIS_URL']:
+        app.extensions['round_state'] = RedisRoundStateStore(app.config['ROUND_STATE_REDIS_URL'])
+    else:
+        app.extensions['round_state'] = LocalRoundStateStore()
@@ -0,0 +1,363 @@
+'''Append-only score events and leaderboard replay
+
+Every hole posted or corrected in rounds_strokes is also appended to
+score_events in the same transaction. Events are never updated, so
+replaying them in event_id order rebuilds a tournament's totals and
+positions as of any moment: to repair leaderboards after a bug, or to chart
+positions over time.
+
+A replay only needs per-golfer running totals (a correction carries the
+strokes it replaced), so its state is small enough to checkpoint every
+CHECKPOINT_EVERY events; posting holes writes them as the log grows.
+Replays start from the nearest checkpoint and only stream the events after
+it.
+
+event_ids are handed out when an event is inserted, not when it commits, so
+a slow transaction can commit an event below ids that are already visible.
+Checkpoints are therefore only written at events older than
+CHECKPOINT_DELAY, by which time every lower id has committed or rolled back.
+'''
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select
+
+from models import db, LeaderboardCheckpoint, Round, RoundCourse, CourseHole, ScoreEvent
+from live_leaderboard import next_leaderboard_version, record_leaderboard, save_leaderboard
+from tournament_scoring import rank_leaderboard, rank_standings, tournament_cut_rule
+
+
+POSTED = 'posted'
+CORRECTED = 'corrected'
+
+# Events streamed from the database per round trip
+REPLAY_BATCH_SIZE = 5000
+
+# How many events apart checkpoints are written
+CHECKPOINT_EVERY = 5000
+
+# How old an event must be before a checkpoint may be written at it. Far
+# longer than a hole post's transaction (statement_timeout included).
+CHECKPOINT_DELAY = timedelta(minutes=5)
+
+# Per golfer running totals, in this order, while replaying. ROUNDS maps
+# round_id -> [strokes, to_par] in the order the rounds were played.
+STROKES, TO_PAR, HOLES, ROUNDS = range(4)
+
+# Leaderboard columns of each ScoreReplay.totals() row, score being strokes
+TOTALS_FIELDS = ('golfer_id', 'score', 'to_par', 'holes_played', 'rounds_played',
+                 'cut_score')
+
+# Fields of each ScoreReplay.standings() row
+STANDINGS_FIELDS = ('golfer_id', 'position', 'strokes', 'to_par', 'holes_played',
+                    'rounds_played', 'made_cut')
+
+EVENT_COLUMNS = (ScoreEvent.event_id, ScoreEvent.recorded_at, ScoreEvent.event_type,
+                 ScoreEvent.golfer_id, ScoreEvent.round_id, ScoreEvent.par,
+                 ScoreEvent.strokes, ScoreEvent.previous_strokes)
+
+
+def add_score_event(round_stroke, previous_strokes=None):
+    '''Append the event for a posted (or, with `previous_strokes`, corrected) hole.
+
+    Call this before committing the RoundStroke so both are written in one
+    transaction. Rounds that aren't part of a tournament aren't logged.
+    '''
+    context = db.session.query(
+        Round.tournament_id, Round.round_id, CourseHole.par
+    ).select_from(RoundCourse).join(Round, Round.round_id == RoundCourse.round_id).outerjoin(
+        CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+        & (CourseHole.number == round_stroke.hole_number)).filter(
+        RoundCourse.round_course_id == round_stroke.round_course_id).first()
+    if context is None or context.tournament_id is None:
+        return None
+
+    event = ScoreEvent(
+        event_type=POSTED if previous_strokes is None else CORRECTED,
+        recorded_at=datetime.utcnow(),
+        tournament_id=context.tournament_id,
+        round_id=context.round_id,
+        round_course_id=round_stroke.round_course_id,
+        golfer_id=round_stroke.golfer_id,
+        hole_number=round_stroke.hole_number,
+        par=context.par,
+        strokes=round_stroke.strokes,
+        previous_strokes=previous_strokes)
+    db.session.add(event)
+    return event
+
+
+class ScoreReplay:
+    '''Running tournament totals built by applying score events in order.'''
+
+    def __init__(self, tournament_id, event_id=0, recorded_at=None, golfers=None):
+        self.tournament_id = tournament_id
+        self.event_id = event_id
+        self.recorded_at = recorded_at
+        # golfer_id -> [strokes, to_par, holes played, {round_id: [strokes, to_par]}]
+        self.golfers = golfers if golfers is not None else {}
+
+    def apply(self, event_id, recorded_at, event_type, golfer_id, round_id, par,
+              strokes, previous_strokes):
+        totals = self.golfers.get(golfer_id)
+        if totals is None:
+            totals = self.golfers[golfer_id] = [0, 0, 0, {}]
+        round_totals = totals[ROUNDS].get(round_id)
+        if round_totals is None:
+            round_totals = totals[ROUNDS][round_id] = [0, 0]
+        strokes = strokes or 0
+        if event_type == CORRECTED:
+            change = strokes - (previous_strokes or 0)
+            to_par = change
+        else:
+            change = strokes
+            to_par = strokes - (par if par is not None else strokes)
+            totals[HOLES] += 1
+        totals[STROKES] += change
+        totals[TO_PAR] += to_par
+        round_totals[0] += change
+        round_totals[1] += to_par
+        self.event_id = event_id
+        self.recorded_at = recorded_at
+
+    def totals(self, after_round=0):
+        '''Rows in TOTALS_FIELDS order, one per golfer.
+
+        cut_score is the golfer's score to par through `after_round` rounds,
+        None if they haven't played that many.
+        '''
+        rows = []
+        for golfer_id, totals in self.golfers.items():
+            rounds = list(totals[ROUNDS].values())
+            cut_score = sum(to_par for _, to_par in rounds[:after_round]) \
+                if len(rounds) >= after_round else None
+            rows.append((golfer_id, totals[STROKES], totals[TO_PAR], totals[HOLES],
+                         len(rounds), cut_score))
+        return rows
+
+    def standings(self, cut_rule=None):
+        '''Rows in STANDINGS_FIELDS order sorted by position.
+
+        Ranked by score to par with rank_standings(), the in-memory copy of
+        the ranking rank_leaderboard() does in SQL, with the cut judged on
+        to par through the cut round.
+        '''
+        after_round = cut_rule.after_round if cut_rule is not None else 0
+        golfers = [(golfer_id, to_par, rounds_played, cut_score)
+                   for golfer_id, _strokes, to_par, _holes, rounds_played, cut_score
+                   in self.totals(after_round)]
+
+        rows = []
+        for golfer_id, position, _tied, _behind, made_cut in rank_standings(
+                golfers, cut_rule, by_rounds=False):
+            totals = self.golfers[golfer_id]
+            rows.append((golfer_id, position, totals[STROKES], totals[TO_PAR],
+                         totals[HOLES], len(totals[ROUNDS]), made_cut))
+        return rows
+
+    def positions(self, cut_rule=None):
+        return {row[0]: row[1] for row in self.standings(cut_rule)}
+
+    def state(self):
+        return {str(golfer_id): [totals[STROKES], totals[TO_PAR], totals[HOLES],
+                                 [[round_id] + round_totals
+                                  for round_id, round_totals in totals[ROUNDS].items()]]
+                for golfer_id, totals in self.golfers.items()}
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        golfers = {int(golfer_id): [strokes, to_par, holes,
+                                    {round_id: [round_strokes, round_to_par]
+                                     for round_id, round_strokes, round_to_par in rounds}]
+                   for golfer_id, (strokes, to_par, holes, rounds) in checkpoint.state.items()}
+        return cls(checkpoint.tournament_id, checkpoint.event_id,
+                   checkpoint.recorded_at, golfers)
+
+
+def stream_events(tournament_id, after_event_id=0, until=None):
+    '''Yield event tuples in EVENT_COLUMNS order, oldest first.
+
+    `until` is a datetime; events recorded after it are left out.
+    '''
+    query = select(*EVENT_COLUMNS).where(
+        ScoreEvent.tournament_id == tournament_id,
+        ScoreEvent.event_id > after_event_id)
+    if until is not None:
+        query = query.where(ScoreEvent.recorded_at <= until)
+    result = db.session.execute(query.order_by(ScoreEvent.event_id).execution_options(
+        yield_per=REPLAY_BATCH_SIZE))
+    for rows in result.partitions():
+        yield from rows
+
+
+def latest_checkpoint(tournament_id, until=None):
+    query = LeaderboardCheckpoint.query.filter_by(tournament_id=tournament_id)
+    if until is not None:
+        query = query.filter(LeaderboardCheckpoint.recorded_at <= until)
+    return query.order_by(LeaderboardCheckpoint.event_id.desc()).first()
+
+
+def replay(tournament_id, until=None, use_checkpoints=True, save_checkpoints=False):
+    '''Replay a tournament's events up to `until` (default: now).
+
+    Starts from the latest checkpoint at or before `until` unless
+    `use_checkpoints` is off. With `save_checkpoints` a checkpoint is written
+    every CHECKPOINT_EVERY events past the last one, but only at events
+    older than CHECKPOINT_DELAY.
+    '''
+    checkpoint = latest_checkpoint(tournament_id, until) if use_checkpoints else None
+    state = ScoreReplay.from_checkpoint(checkpoint) if checkpoint else ScoreReplay(tournament_id)
+
+    settled = datetime.utcnow() - CHECKPOINT_DELAY
+    since_checkpoint = 0
+    for event in stream_events(tournament_id, state.event_id, until):
+        state.apply(*event)
+        since_checkpoint += 1
+        if save_checkpoints and since_checkpoint >= CHECKPOINT_EVERY \
+                and state.recorded_at <= settled:
+            db.session.add(LeaderboardCheckpoint(
+                tournament_id=tournament_id, event_id=state.event_id,
+                recorded_at=state.recorded_at, state=state.state()))
+            since_checkpoint = 0
+
+    if save_checkpoints:
+        db.session.commit()
+    return state
+
+
+def write_checkpoints(tournament_id):
+    '''Checkpoint every CHECKPOINT_EVERY events since the last checkpoint.'''
+    return replay(tournament_id, save_checkpoints=True)
+
+
+def checkpoint_if_due(tournament_id, version):
+    '''Write checkpoints once every CHECKPOINT_EVERY leaderboard versions.
+
+    Call this after a posted hole commits, with the version
+    apply_score_event() returned. Each post bumps the version once, so
+    this catches up on checkpoints about every CHECKPOINT_EVERY events
+    without counting them. Returns the replay state, or None if not due.
+    '''
+    if version % CHECKPOINT_EVERY:
+        return None
+    return write_checkpoints(tournament_id)
+
+
+def clear_checkpoints(tournament_id):
+    '''Drop a tournament's checkpoints, e.g. after events were backfilled.'''
+    deleted = LeaderboardCheckpoint.query.filter_by(tournament_id=tournament_id).delete()
+    db.session.commit()
+    return deleted
+
+
+def golfer_totals(tournament_id, golfer_id, after_round=0):
+    '''One golfer's ScoreReplay.totals() row, summed from their own events.
+
+    Each round's events are summed in the database and the rounds come back
+    in the order they were first posted to, as they would in a replay.
+    '''
+    posted = ScoreEvent.event_type == POSTED
+    strokes = func.coalesce(ScoreEvent.strokes, 0)
+    change = case((posted, strokes),
+                  else_=strokes - func.coalesce(ScoreEvent.previous_strokes, 0))
+    to_par = case((posted, strokes - func.coalesce(ScoreEvent.par, strokes)), else_=change)
+    rounds = db.session.query(
+        func.sum(change), func.sum(to_par), func.sum(case((posted, 1), else_=0))
+    ).filter(ScoreEvent.tournament_id == tournament_id,
+             ScoreEvent.golfer_id == golfer_id).group_by(ScoreEvent.round_id).order_by(
+        func.min(ScoreEvent.event_id)).all()
+    cut_score = sum(round_to_par for _, round_to_par, _ in rounds[:after_round]) \
+        if len(rounds) >= after_round else None
+    return (golfer_id, sum(row[0] for row in rounds), sum(row[1] for row in rounds),
+            sum(row[2] for row in rounds), len(rounds), cut_score)
+
+
+def apply_score_event(event):
+    '''Move a tournament's leaderboard for one posted or corrected hole.
+
+    Only the event's golfer is recomputed, from their own events, and the
+    field is then re-ranked with one UPDATE, so a post costs the same
+    however long the tournament's event log is. Runs in the caller's
+    transaction (the hole's, so the leaderboard moves with the score) and
+    doesn't commit. The version bump comes first: its row lock makes
+    concurrent posts to the same tournament re-rank one after another.
+    Returns the new leaderboard version.
+    '''
+    version = next_leaderboard_version(event.tournament_id)
+    cut_rule = tournament_cut_rule(event.tournament_id)
+    db.session.flush()
+    totals = golfer_totals(event.tournament_id, event.golfer_id,
+                           cut_rule.after_round if cut_rule is not None else 0)
+    save_leaderboard(event.tournament_id, version, [totals], fields=TOTALS_FIELDS)
+    db.session.flush()
+    rank_leaderboard(event.tournament_id, version, cut_rule)
+    return version
+
+
+def update_leaderboard(tournament_id, use_checkpoints=True):
+    '''Rewrite every Leaderboard row of a tournament from its score events.
+
+    Runs in the caller's transaction and doesn't commit. Posted holes don't
+    need this, apply_score_event() moves the leaderboard for them; it is for
+    rebuilds, e.g. after the cut rule changes.
+    '''
+    version = next_leaderboard_version(tournament_id)
+    cut_rule = tournament_cut_rule(tournament_id)
+    state = replay(tournament_id, use_checkpoints=use_checkpoints)
+    save_leaderboard(tournament_id, version,
+                     state.totals(cut_rule.after_round if cut_rule is not None else 0),
+                     fields=TOTALS_FIELDS)
+    db.session.flush()
+    rank_leaderboard(tournament_id, version, cut_rule)
+    return state.standings(cut_rule)
+
+
+def rebuild_leaderboard(tournament_id, use_checkpoints=True):
+    '''Overwrite a tournament's Leaderboard rows by replaying its events.
+
+    Pass use_checkpoints=False to replay from the first event and rewrite the
+    checkpoints too, e.g. after fixing a bug in the replay itself.
+    '''
+    if not use_checkpoints:
+        clear_checkpoints(tournament_id)
+    write_checkpoints(tournament_id)
+    standings = update_leaderboard(tournament_id)
+    db.session.commit()
+
+    record_leaderboard(tournament_id)
+    return standings
+
+
+def position_history(tournament_id, interval_seconds=300, golfer_ids=None, until=None):
+    '''Positions over time for charts.
+
+    Returns a list of {'at', 'event_id', 'positions': {golfer_id: position}},
+    one point per `interval_seconds` of play holding the state after the last
+    event in that interval, optionally limited to `golfer_ids`. Only one
+    ranking is done per interval, not one per event.
+    '''
+    golfer_ids = set(golfer_ids) if golfer_ids else None
+    cut_rule = tournament_cut_rule(tournament_id)
+
+    def snapshot(state):
+        positions = state.positions(cut_rule)
+        if golfer_ids is not None:
+            positions = {golfer_id: position for golfer_id, position in positions.items()
+                         if golfer_id in golfer_ids}
+        return {'at': state.recorded_at.isoformat(), 'event_id': state.event_id,
+                'positions': positions}
+
+    points = []
+    interval = None
+    state = ScoreReplay(tournament_id)
+    for event in stream_events(tournament_id, until=until):
+        # Events are in event_id order, not recorded_at order, so a late
+        # one can land in an earlier interval
+        current = int(event[1].timestamp() // interval_seconds)
+        if interval is not None and current > interval:
+            points.append(snapshot(state))
+        interval = max(current, interval or current)
+        state.apply(*event)
+    if state.event_id:
+        points.append(snapshot(state))
+    return points
@@ -0,0 +1,357 @@
+'''Monte Carlo projected finishes for live tournament leaderboards'''
+
+from collections import OrderedDict
+from threading import Lock
+import time
+
+import numpy as np
+from sqlalchemy import func
+
+from models import db, Round, RoundCourse, RoundStroke, CourseHole
+from tournament_scoring import tournament_cut_rule, tournament_rounds
+
+
+# Hole scores are simulated as an offset from par, clipped to this range
+OFFSETS = np.arange(-2, 6)
+PAR_TYPES = (3, 4, 5)
+
+# Fallback score-to-par distribution (eagle .. +5) used before there is any
+# history at all. Roughly a mid-handicap amateur.
+DEFAULT_DISTRIBUTION = np.array([0.002, 0.05, 0.32, 0.36, 0.18, 0.06, 0.02, 0.008])
+
+# How many historical holes the field-wide distribution is worth when it is
+# blended with a golfer's own history. Golfers with few holes lean on the field.
+PRIOR_WEIGHT = 36.0
+
+# Uniform draws are quantised to this many buckets so a hole can be sampled
+# with one table lookup instead of a search over the CDF.
+RESOLUTION = 1024
+
+DISTRIBUTION_TTL = 600.0
+BATCH_SIZE = 2500
+# Most hole draws simulated at once; a whole tournament left to play takes
+# smaller batches than one round does
+MAX_BATCH_DRAWS = 4000000
+
+# Projections kept per (tournament, leaderboard version, iterations, cut)
+PROJECTION_CACHE_SIZE = 256
+
+_distributions = {}
+_field_distribution = [0.0, None]
+_distributions_lock = Lock()
+_projections = OrderedDict()
+_projections_lock = Lock()
+
+
+def _par_index(par):
+    return min(max(par, 3), 5) - 3
+
+
+def _counts_to_distribution(counts, prior):
+    '''Blend raw (par type, offset) counts with a prior into probabilities.'''
+    blended = counts + PRIOR_WEIGHT * prior
+    return blended / blended.sum(axis=1, keepdims=True)
+
+
+def _offset_counts(rows):
+    '''Collect (key, par, strokes - par, n) rows into per-key count arrays.'''
+    counts = {}
+    for key, par, offset, n in rows:
+        if par is None or offset is None:
+            continue
+        array = counts.setdefault(key, np.zeros((len(PAR_TYPES), len(OFFSETS))))
+        column = min(max(offset, OFFSETS[0]), OFFSETS[-1]) - OFFSETS[0]
+        array[_par_index(par), column] += n
+    return counts
+
+
+def _history_query(*columns):
+    offset = (RoundStroke.strokes - CourseHole.par).label('offset')
+    return db.session.query(*columns, CourseHole.par, offset, func.count()).join(
+        RoundCourse, RoundCourse.round_course_id == RoundStroke.round_course_id
+    ).join(CourseHole, (CourseHole.course_id == RoundCourse.course_id)
+           & (CourseHole.number == RoundStroke.hole_number)
+           ).filter(RoundStroke.strokes.isnot(None))
+
+
+def field_distribution():
+    '''Score-to-par distribution for the whole field, cached.'''
+    loaded_at, distribution = _field_distribution
+    if distribution is not None and time.monotonic() - loaded_at < DISTRIBUTION_TTL:
+        return distribution
+
+    prior = np.tile(DEFAULT_DISTRIBUTION, (len(PAR_TYPES), 1))
+    rows = _history_query().group_by(CourseHole.par, 'offset')
+    counts = _offset_counts((None,) + tuple(row) for row in rows).get(None)
+    distribution = prior if counts is None else _counts_to_distribution(counts, prior)
+    _field_distribution[:] = [time.monotonic(), distribution]
+    return distribution
+
+
+def golfer_distributions(golfer_ids):
+    '''Per-golfer score-to-par distributions, shape (golfers, par types, offsets).
+
+    Distributions are cached per golfer; any that are missing or stale are
+    loaded together in one grouped query.
+    '''
+    now = time.monotonic()
+    with _distributions_lock:
+        missing = [golfer_id for golfer_id in golfer_ids
+                   if golfer_id not in _distributions
+                   or now - _distributions[golfer_id][0] > DISTRIBUTION_TTL]
+
+    if missing:
+        prior = field_distribution()
+        counts = _offset_counts(_history_query(RoundStroke.golfer_id).filter(
+            RoundStroke.golfer_id.in_(missing)).group_by(
+            RoundStroke.golfer_id, CourseHole.par, 'offset'))
+        with _distributions_lock:
+            for golfer_id in missing:
+                golfer_counts = counts.get(golfer_id)
+                _distributions[golfer_id] = (now, prior if golfer_counts is None
+                                             else _counts_to_distribution(golfer_counts, prior))
+
+    with _distributions_lock:
+        return np.stack([_distributions[golfer_id][1] for golfer_id in golfer_ids])
+
+
+def clear_distribution_cache():
+    with _distributions_lock:
+        _distributions.clear()
+        _field_distribution[:] = [0.0, None]
+
+
+def live_state(tournament_id, rounds=1):
+    '''Where every golfer in a tournament stands and what they have left to play.
+
+    Returns (golfer_ids, scores, strokes, remaining). `scores` holds each
+    golfer's score to par per round, shape (golfers, rounds), rounds in the
+    order they were played; `strokes` is their total strokes so far.
+    `remaining` holds a list of (round index, par) per golfer for every hole
+    still to play: holes not yet posted in rounds they have started, and
+    every hole of the rounds (up to `rounds`) they haven't, on the course
+    of their latest round.
+    '''
+    first, last = Round.date_range(tournament_id)
+    if first is None:
+        return [], np.zeros((0, rounds), dtype=np.int64), np.zeros(0, dtype=np.int64), []
+    # The date range keeps both queries to the tournament's season partitions
+    round_courses = db.session.query(
+        Round.golfer_id, Round.round_id, RoundCourse.round_course_id,
+        RoundCourse.course_id
+    ).join(RoundCourse, RoundCourse.round_id == Round.round_id).filter(
+        Round.tournament_id == tournament_id,
+        Round.date_of_round.between(first, last)).order_by(
+        Round.date_of_round, Round.round_id, RoundCourse.sequence_number).all()
+
+    strokes = db.session.query(
+        RoundStroke.round_course_id, RoundStroke.hole_number, RoundStroke.strokes
+    ).join(RoundCourse, RoundCourse.round_course_id == RoundStroke.round_course_id
+           ).join(Round, Round.round_id == RoundCourse.round_id).filter(
+        Round.tournament_id == tournament_id,
+        Round.date_of_round.between(first, last),
+        RoundStroke.date_of_round.between(first, last),
+        RoundStroke.strokes.isnot(None)).all()
+
+    course_ids = {course_id for _, _, _, course_id in round_courses}
+    pars = {}
+    for course_id, number, par in db.session.query(
+            CourseHole.course_id, CourseHole.number, CourseHole.par).filter(
+            CourseHole.course_id.in_(course_ids), CourseHole.par.isnot(None)):
+        pars.setdefault(course_id, {})[number] = par
+
+    posted = {}
+    for round_course_id, hole_number, hole_strokes in strokes:
+        posted.setdefault(round_course_id, {})[hole_number] = hole_strokes
+
+    played = {}
+    courses = {}
+    for golfer_id, round_id, round_course_id, course_id in round_courses:
+        golfer_rounds = played.setdefault(golfer_id, [])
+        if round_id not in golfer_rounds:
+            golfer_rounds.append(round_id)
+        courses.setdefault(round_id, []).append((round_course_id, course_id))
+
+    golfer_ids = sorted(played)
+    rounds = max([rounds] + [len(golfer_rounds) for golfer_rounds in played.values()])
+    scores = np.zeros((len(golfer_ids), rounds), dtype=np.int64)
+    totals = np.zeros(len(golfer_ids), dtype=np.int64)
+    remaining = []
+    for golfer, golfer_id in enumerate(golfer_ids):
+        holes = []
+        for number, round_id in enumerate(played[golfer_id]):
+            for round_course_id, course_id in courses[round_id]:
+                course_pars = pars.get(course_id, {})
+                entered = posted.get(round_course_id, {})
+                for hole_number, hole_strokes in entered.items():
+                    totals[golfer] += hole_strokes
+                    scores[golfer, number] += hole_strokes - course_pars.get(
+                        hole_number, hole_strokes)
+                holes.extend((number, par) for hole_number, par in sorted(course_pars.items())
+                             if hole_number not in entered)
+        latest_course = courses[played[golfer_id][-1]][-1][1]
+        for number in range(len(played[golfer_id]), rounds):
+            holes.extend((number, par) for _, par in sorted(pars.get(latest_course, {}).items()))
+        remaining.append(holes)
+
+    return golfer_ids, scores, totals, remaining
+
+
+def _positions(scores):
+    '''Tie-aware positions per row of a (batch, golfers) array: 1 + golfers strictly ahead.'''
+    batch, golfers = scores.shape
+    shifted = scores - scores.min()
+    row_offset = (np.arange(batch) * (shifted.max() + 1))[:, None]
+    ordered = np.sort(shifted, axis=1) + row_offset
+    position = np.searchsorted(ordered.ravel(), (shifted + row_offset).ravel(), side='left')
+    return position.reshape(batch, golfers) - np.arange(batch)[:, None] * golfers + 1
+
+
+def simulate_finishes(scores, strokes, remaining, distributions, iterations=10000,
+                      cut_rule=None, seed=None):
+    '''Simulate the rest of the tournament for the whole field at once.
+
+    `scores`, `strokes` and `remaining` come from live_state() and
+    `distributions` are the golfers' score-to-par probabilities from
+    golfer_distributions(). Golfers are compared on score to par. With a
+    `cut_rule` whose round is still ahead of the last one, golfers who miss
+    the cut in an iteration stop after the cut round and finish behind
+    everyone who made it. Returns a dict of per-golfer arrays: win
+    probability, cut probability (None without a cut), mean projected
+    finish and mean projected total strokes.
+    '''
+    rng = np.random.default_rng(seed)
+    golfers, rounds = scores.shape
+    if golfers == 0:
+        empty = np.zeros(0)
+        return {'win': empty, 'cut': None, 'projected_finish': empty,
+                'projected_total': empty}
+
+    cut_round = None
+    if cut_rule is not None and (cut_rule.top_n is not None
+                                 or cut_rule.within_strokes is not None) \
+            and 0 < cut_rule.after_round < rounds:
+        cut_round = cut_rule.after_round
+
+    # Lookup table: quantised uniform draw -> offset, one row per (golfer, par type)
+    cdf = np.cumsum(distributions.reshape(-1, len(OFFSETS)), axis=1)
+    buckets = (np.arange(RESOLUTION) + 0.5) / RESOLUTION
+    table = (buckets[None, :, None] > cdf[:, None, :]).sum(axis=2)
+    table = OFFSETS[np.minimum(table, len(OFFSETS) - 1)].astype(np.int16)
+
+    # Flatten every remaining hole in the field into one row of the table,
+    # grouped by golfer and round so each golfer's round can be summed with
+    # reduceat
+    hole_rows = []
+    hole_pars = []
+    segments = []
+    for golfer, holes in enumerate(remaining):
+        for number, par in sorted(holes, key=lambda hole: hole[0]):
+            hole_rows.append(golfer * len(PAR_TYPES) + _par_index(par))
+            hole_pars.append(par)
+            segments.append(golfer * rounds + number)
+    hole_rows = np.array(hole_rows, dtype=np.intp)
+    segments = np.array(segments, dtype=np.intp)
+    starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]]) \
+        if len(segments) else segments
+
+    # Par of the holes already played, and of those left before and after the cut
+    par_played = np.asarray(strokes, dtype=np.int64) - scores.sum(axis=1)
+    pars_left = np.bincount(segments, weights=hole_pars,
+                            minlength=golfers * rounds).reshape(golfers, rounds)
+    pars_before_cut = pars_left[:, :cut_round].sum(axis=1)
+    pars_left = pars_left.sum(axis=1)
+
+    win = np.zeros(golfers)
+    cut = np.zeros(golfers)
+    finish = np.zeros(golfers)
+    projected = np.zeros(golfers)
+    batch_size = max(1, min(BATCH_SIZE, MAX_BATCH_DRAWS // max(len(hole_rows), 1)))
+    done = 0
+    while done < iterations:
+        batch = min(batch_size, iterations - done)
+        by_round = np.broadcast_to(scores.ravel(), (batch, golfers * rounds)).copy()
+        if len(hole_rows):
+            draws = rng.integers(0, RESOLUTION, size=(batch, len(hole_rows)))
+            offsets = table[hole_rows[None, :], draws].astype(np.int64)
+            by_round[:, segments[starts]] += np.add.reduceat(offsets, starts, axis=1)
+        by_round = by_round.reshape(batch, golfers, rounds)
+        finals = by_round.sum(axis=2)
+
+        made = np.ones((batch, golfers), dtype=bool)
+        ranking = finals
+        if cut_round is not None:
+            cut_scores = by_round[:, :, :cut_round].sum(axis=2)
+            made = np.zeros((batch, golfers), dtype=bool)
+            if cut_rule.top_n is not None:
+                made |= _positions(cut_scores) <= cut_rule.top_n
+            if cut_rule.within_strokes is not None:
+                made |= cut_scores - cut_scores.min(axis=1, keepdims=True) \
+                    <= cut_rule.within_strokes
+            finals = np.where(made, finals, cut_scores)
+            # Everyone who missed the cut ranks behind everyone who made it
+            ranking = np.where(made, finals, cut_scores - cut_scores.min()
+                               + finals.max() + 1)
+            cut += made.sum(axis=0)
+
+        leaders = np.where(made, finals, np.iinfo(np.int64).max).min(axis=1, keepdims=True)
+        leading = made & (finals == leaders)
+        win += (leading / leading.sum(axis=1, keepdims=True)).sum(axis=0)
+        finish += _positions(ranking).sum(axis=0)
+        projected += (finals + par_played + np.where(
+            made, pars_left, pars_before_cut)).sum(axis=0)
+        done += batch
+
+    return {'win': win / iterations,
+            'cut': cut / iterations if cut_round is not None else None,
+            'projected_finish': finish / iterations,
+            'projected_total': projected / iterations}
+
+
+def project_tournament(tournament_id, iterations=10000, cut_rule=None, version=None):
+    '''Chance to win, chance to make the cut and projected finish per golfer.
+
+    Every round still to be played is simulated, up to tournament_rounds().
+    `cut_rule` defaults to the tournament's own. With `version` (the
+    tournament's leaderboard version, which every posted hole bumps) the
+    simulation is seeded from it and the result is cached until the version
+    moves, so repeat requests don't rerun it and get identical projections.
+    '''
+    if cut_rule is None:
+        cut_rule = tournament_cut_rule(tournament_id)
+    key = None
+    if version is not None:
+        key = (tournament_id, version, iterations,
+               (cut_rule.top_n, cut_rule.within_strokes, cut_rule.after_round)
+               if cut_rule else None)
+        with _projections_lock:
+            projections = _projections.get(key)
+            if projections is not None:
+                _projections.move_to_end(key)
+                return projections
+
+    golfer_ids, scores, strokes, remaining = live_state(
+        tournament_id, tournament_rounds(tournament_id))
+    if not golfer_ids:
+        return {}
+    result = simulate_finishes(
+        scores, strokes, remaining, golfer_distributions(golfer_ids),
+        iterations=iterations, cut_rule=cut_rule,
+        seed=[tournament_id, version] if version is not None else None)
+
+    projections = {}
+    for index, golfer_id in enumerate(golfer_ids):
+        projections[golfer_id] = {
+            'holes_remaining': len(remaining[index]),
+            'win': round(float(result['win'][index]), 4),
+            'cut': None if result['cut'] is None else round(float(result['cut'][index]), 4),
+            'projected_finish': round(float(result['projected_finish'][index]), 1),
+            'projected_total': round(float(result['projected_total'][index]), 1),
+        }
+
+    if key is not None:
+        with _projections_lock:
+            _projections[key] = projections
+            while len(_projections) > PROJECTION_CACHE_SIZE:
+                _projections.popitem(last=False)
+    return projections
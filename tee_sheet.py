@@ -0,0 +1,206 @@
+'''Pairings and tee times for tournament rounds'''
+
+from datetime import datetime, timedelta
+import random
+
+from sqlalchemy import insert
+
+from models import db, Golfer, TeeTime
+
+
+# Cost of putting two golfers together again, in squared handicap strokes.
+# High enough that the search always prefers a fresh pairing over balance.
+REPEAT_PAIR_COST = 1000.0
+
+
+def _group_sizes(filled, field_size, group_size):
+    # Deal the rest of the field one at a time to the smallest group that
+    # still has room, so groups holding requested golfers set the sizes and
+    # the others balance around them
+    sizes = list(filled)
+    for _ in range(field_size - sum(filled)):
+        index = min((i for i in range(len(sizes)) if sizes[i] < group_size),
+                    key=lambda i: sizes[i])
+        sizes[index] += 1
+    return sizes
+
+
+def build_groups(handicaps, group_size=4, requested_groups=(), previous_pairs=None,
+                 iterations=None, seed=0):
+    '''Split a field into groups of (at most) `group_size` golfers.
+
+    `handicaps` maps golfer_id -> handicap. Golfers named together in
+    `requested_groups` always play together; those groups are placed
+    largest first, each into the emptiest group, before the remaining
+    group sizes are balanced around them. `previous_pairs` maps
+    golfer_id -> set of golfer_ids they have already been paired with.
+
+    A greedy pass deals golfers from highest handicap down into the group
+    with the lowest handicap total that doesn't repeat a pairing, then a
+    swap-based local search irons out the remaining repeats and imbalance.
+    '''
+    if not handicaps:
+        return []
+
+    previous_pairs = previous_pairs or {}
+    known = [h for h in handicaps.values() if h is not None]
+    average = sum(known) / len(known) if known else 0.0
+    handicaps = {golfer_id: average if h is None else h
+                 for golfer_id, h in handicaps.items()}
+
+    number_of_groups = -(-len(handicaps) // group_size)
+    groups = [[] for _ in range(number_of_groups)]
+    totals = [0.0] * number_of_groups
+    placed = set()
+    locked = set()
+
+    def repeats(golfer_id, members):
+        partners = previous_pairs.get(golfer_id)
+        if not partners:
+            return 0
+        return sum(1 for other in members if other in partners)
+
+    # A golfer named in more than one requested group joins the first
+    requested_members = []
+    claimed = set()
+    for requested in requested_groups:
+        members = [g for g in dict.fromkeys(requested) if g in handicaps and g not in claimed]
+        claimed.update(members)
+        requested_members.append((requested, members))
+
+    for requested, members in sorted(requested_members, key=lambda item: -len(item[1])):
+        if not members:
+            continue
+        index = min(range(len(groups)), key=lambda i: len(groups[i]))
+        if group_size - len(groups[index]) < len(members):
+            raise ValueError(
+                f'No group has room for requested group {list(requested)}')
+        groups[index].extend(members)
+        totals[index] += sum(handicaps[g] for g in members)
+        placed.update(members)
+        locked.update(members)
+
+    sizes = _group_sizes([len(members) for members in groups], len(handicaps), group_size)
+    remaining = sorted((g for g in handicaps if g not in placed),
+                       key=lambda g: handicaps[g], reverse=True)
+    for golfer_id in remaining:
+        index = min(
+            (i for i in range(len(groups)) if len(groups[i]) < sizes[i]),
+            key=lambda i: (repeats(golfer_id, groups[i]), totals[i]))
+        groups[index].append(golfer_id)
+        totals[index] += handicaps[golfer_id]
+
+    # Local search: swap two unlocked golfers in different groups whenever it
+    # lowers repeats * REPEAT_PAIR_COST + sum of squared handicap imbalance.
+    deviation = [totals[i] - len(groups[i]) * average
+                 for i in range(len(groups))]
+    membership = {}
+    for index, members in enumerate(groups):
+        for position, golfer_id in enumerate(members):
+            membership[golfer_id] = (index, position)
+    movable = [g for g in handicaps if g not in locked]
+    if len(groups) < 2 or len(movable) < 2:
+        return groups
+
+    rng = random.Random(seed)
+    if iterations is None:
+        iterations = min(60 * len(handicaps), 40000)
+    for _ in range(iterations):
+        a, b = rng.sample(movable, 2)
+        group_a, position_a = membership[a]
+        group_b, position_b = membership[b]
+        if group_a == group_b:
+            continue
+        members_a, members_b = groups[group_a], groups[group_b]
+
+        shift = handicaps[b] - handicaps[a]
+        new_a, new_b = deviation[group_a] + shift, deviation[group_b] - shift
+        delta = (new_a * new_a + new_b * new_b
+                 - deviation[group_a] ** 2 - deviation[group_b] ** 2)
+
+        partners_a = previous_pairs.get(a, ())
+        partners_b = previous_pairs.get(b, ())
+        if partners_a or partners_b:
+            delta += REPEAT_PAIR_COST * (
+                sum(1 for g in members_b if g != b and g in partners_a)
+                - sum(1 for g in members_a if g != a and g in partners_a)
+                + sum(1 for g in members_a if g != a and g in partners_b)
+                - sum(1 for g in members_b if g != b and g in partners_b))
+
+        if delta < 0:
+            members_a[position_a], members_b[position_b] = b, a
+            membership[a], membership[b] = (group_b, position_b), (group_a, position_a)
+            deviation[group_a], deviation[group_b] = new_a, new_b
+
+    return groups
+
+
+def assign_tee_times(groups, first_tee_time, interval_minutes=10, shotgun=False,
+                     holes=18):
+    '''Return (tee_time, starting_hole) for each group.
+
+    Tee times go off the first tee every `interval_minutes`. A shotgun start
+    sends every group out at `first_tee_time`, one per hole, doubling up on
+    holes once there are more groups than holes.
+    '''
+    if shotgun:
+        return [(first_tee_time, index % holes + 1) for index in range(len(groups))]
+    interval = timedelta(minutes=interval_minutes)
+    return [(first_tee_time + index * interval, 1) for index in range(len(groups))]
+
+
+def previous_pairings(tournament_id, round_number):
+    '''Who has played with whom in the rounds before `round_number`.'''
+    rows = db.session.query(
+        TeeTime.round_number, TeeTime.group_number, TeeTime.golfer_id
+    ).filter(TeeTime.tournament_id == tournament_id,
+             TeeTime.round_number < round_number).all()
+
+    groups = {}
+    for round_number, group_number, golfer_id in rows:
+        groups.setdefault((round_number, group_number), []).append(golfer_id)
+
+    pairs = {}
+    for members in groups.values():
+        for golfer_id in members:
+            pairs.setdefault(golfer_id, set()).update(
+                other for other in members if other != golfer_id)
+    return pairs
+
+
+def schedule_round(tournament_id, round_number, golfer_ids, requested_groups=(),
+                   first_tee_time=None, interval_minutes=10, shotgun=False,
+                   group_size=4):
+    '''Pair a tournament round and write its tee sheet in one bulk insert.
+
+    Any existing tee sheet for the round is replaced. Returns a list of
+    dicts, one per group, in tee order.
+    '''
+    handicaps = dict(db.session.query(Golfer.golfer_id, Golfer.handicap).filter(
+        Golfer.golfer_id.in_(golfer_ids)).all())
+    groups = build_groups(handicaps, group_size=group_size,
+                          requested_groups=requested_groups,
+                          previous_pairs=previous_pairings(tournament_id, round_number))
+
+    if first_tee_time is None:
+        first_tee_time = datetime.now().replace(second=0, microsecond=0)
+    times = assign_tee_times(groups, first_tee_time,
+                             interval_minutes=interval_minutes, shotgun=shotgun)
+
+    rows = [{'tournament_id': tournament_id, 'round_number': round_number,
+             'group_number': group_number, 'golfer_id': golfer_id,
+             'tee_time': tee_time, 'starting_hole': starting_hole}
+            for group_number, (members, (tee_time, starting_hole))
+            in enumerate(zip(groups, times), start=1)
+            for golfer_id in members]
+
+    TeeTime.query.filter_by(tournament_id=tournament_id,
+                            round_number=round_number).delete()
+    if rows:
+        db.session.execute(insert(TeeTime), rows)
+    db.session.commit()
+
+    return [{'group_number': group_number, 'golfer_ids': members,
+             'tee_time': tee_time.isoformat(), 'starting_hole': starting_hole}
+            for group_number, (members, (tee_time, starting_hole))
+            in enumerate(zip(groups, times), start=1)]
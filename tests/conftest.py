@@ -0,0 +1,67 @@
+from datetime import date
+import os
+
+import pytest
+from flask import g
+
+from app import create_app
+from models import (db, Club, Course, CourseHole, Golfer, Round, RoundCourse, Tee,
+                    TeeHole, Tournament)
+
+
+@pytest.fixture
+def app():
+    # TEST_DATABASE_URL runs the suite against another database, e.g. Postgres
+    app = create_app({'SQLALCHEMY_DATABASE_URI': os.environ.get('TEST_DATABASE_URL', 'sqlite://'),
+                      'SECRET_KEY': 'test', 'TESTING': True})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def tournament_round(app):
+    '''Tournament 1 on an 18 hole, par 4 course with golfers 1-3 each playing a round.
+
+    Golfer N's round is round N with round_course_id N. Returns 1.
+    '''
+    db.session.add(Tournament(tournament_id=1, name='Invitational', type='tournament'))
+    db.session.add(Club(club_id=1))
+    db.session.add(Course(course_id=1, club_id=1))
+    db.session.add(Tee(tee_id=1, course_id=1))
+    for golfer_id in (1, 2, 3):
+        db.session.add(Golfer(golfer_id=golfer_id, golfer_name=f'golfer {golfer_id}',
+                              username=f'golfer{golfer_id}',
+                              email=f'{golfer_id}@example.com', password='x'))
+    db.session.flush()
+    for number in range(1, 19):
+        db.session.add(CourseHole(course_id=1, number=number, par=4))
+        db.session.add(TeeHole(tee_id=1, hole_number=number, yards=400))
+    for golfer_id in (1, 2, 3):
+        add_round(golfer_id, golfer_id, date(2026, 5, 1))
+    db.session.commit()
+    return 1
+
+
+def add_round(round_id, golfer_id, date_of_round):
+    db.session.add(Round(round_id=round_id, golfer_id=golfer_id, club_id=1,
+                         tournament_id=1, date_of_round=date_of_round))
+    db.session.flush()
+    db.session.add(RoundCourse(round_course_id=round_id, round_id=round_id, course_id=1,
+                               tee_id=1, sequence_number=1, number_of_holes=18,
+                               date_of_round=date_of_round))
+
+
+@pytest.fixture
+def login(app):
+    def login(golfer_id):
+        # Requests share the fixture's app context, and with it the user
+        # flask_login cached on g for the last one
+        g.pop('_login_user', None)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(golfer_id)
+        return client
+    return login
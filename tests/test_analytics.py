@@ -0,0 +1,27 @@
+from datetime import date
+
+from models import GolferMonthlyStat
+
+
+def post_hole(client, hole_number, strokes, putts=2):
+    return client.post(f'/record_performance/1/{hole_number}',
+                       data={'strokes': str(strokes), 'number_of_putts': str(putts)})
+
+
+def test_reposting_a_hole_unchanged_leaves_the_rollup_alone(tournament_round, login):
+    client = login(1)
+    assert post_hole(client, 1, 5).status_code == 302
+    assert post_hole(client, 1, 5).status_code == 302
+
+    row = GolferMonthlyStat.query.filter_by(golfer_id=1, month=date(2026, 5, 1)).one()
+    assert (row.rounds, row.holes, row.strokes, row.putts) == (1, 1, 5, 2)
+
+
+def test_correcting_a_hole_applies_the_difference(tournament_round, login):
+    client = login(1)
+    post_hole(client, 1, 5)
+    post_hole(client, 2, 4)
+    post_hole(client, 1, 3, putts=1)
+
+    row = GolferMonthlyStat.query.filter_by(golfer_id=1, month=date(2026, 5, 1)).one()
+    assert (row.rounds, row.holes, row.strokes, row.putts) == (1, 2, 7, 3)
@@ -0,0 +1,62 @@
+import os
+import time
+
+from flask import g
+import pytest
+
+from app import create_app
+import db_routing
+from db_routing import STICKY_COOKIE, use_replica
+from models import db
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # A second in-memory SQLite database stands in for the replica
+    monkeypatch.setattr(db_routing, '_lag', {'checked_at': 0.0, 'lag': None})
+    app = create_app({'SQLALCHEMY_DATABASE_URI': os.environ.get('TEST_DATABASE_URL', 'sqlite://'),
+                      'SQLALCHEMY_BINDS': {'replica': 'sqlite://'},
+                      'SECRET_KEY': 'test', 'TESTING': True})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    # db keeps a MetaData per bind key it has seen, which other apps would
+    # then look for
+    db.metadatas.pop('replica', None)
+
+
+def test_read_only_requests_use_the_replica(app):
+    with app.test_request_context('/'):
+        g.read_only = True
+        assert use_replica()
+        assert db.session.get_bind(clause=db.select(1)) is db.engines['replica']
+
+
+def test_requests_that_write_stay_on_the_primary(app):
+    with app.test_request_context('/'):
+        g.read_only = True
+        g.db_wrote = True
+        assert not use_replica()
+
+
+def test_a_write_makes_the_client_read_from_the_primary(tournament_round, login):
+    client = login(1)
+
+    response = client.post('/record_performance/1/1', data={'strokes': 4})
+
+    cookie = client.get_cookie(STICKY_COOKIE)
+    assert response.status_code == 302 and cookie is not None
+    assert float(cookie.value) > time.time()
+    with client.application.test_request_context(
+            '/', headers={'Cookie': f'{STICKY_COOKIE}={cookie.value}'}):
+        g.read_only = True
+        assert not use_replica()
+
+
+def test_stickiness_expires(app):
+    with app.test_request_context(
+            '/', headers={'Cookie': f'{STICKY_COOKIE}={time.time() - 1}'}):
+        g.read_only = True
+        assert use_replica()
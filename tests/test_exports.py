@@ -0,0 +1,50 @@
+from datetime import date
+import io
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import exports
+from exports import SCHEMA, export_dataset, stream_export
+from models import db, RoundStroke
+
+
+def post_strokes():
+    for golfer_id in (1, 2, 3):
+        for hole_number in range(1, 4):
+            db.session.add(RoundStroke(golfer_id=golfer_id, round_course_id=golfer_id,
+                                       hole_number=hole_number, strokes=3 + hole_number,
+                                       date_of_round=date(2026, 5, 1)))
+    # Posted but not yet scored, so every column but the keys is NULL
+    db.session.add(RoundStroke(golfer_id=1, round_course_id=1, hole_number=4,
+                               date_of_round=date(2026, 5, 1)))
+    db.session.commit()
+
+
+def test_dataset_export_is_partitioned_by_season_and_course(tournament_round, tmp_path):
+    post_strokes()
+
+    stats = export_dataset(str(tmp_path), format='parquet')
+
+    assert stats['rows'] == 10
+    assert (tmp_path / 'season=2026' / 'course_id=1').is_dir()
+    table = ds.dataset(str(tmp_path), schema=SCHEMA, format='parquet',
+                       partitioning=exports.PARTITIONING).to_table()
+    assert table.num_rows == 10
+    assert sorted(table.filter(ds.field('golfer_id') == 2).column('strokes').to_pylist()) \
+        == [4, 5, 6]
+
+
+def test_streamed_exports_read_back(tournament_round):
+    post_strokes()
+
+    # One batch per row, the last with nothing but NULL scores
+    arrow = b''.join(stream_export(format='arrow', golfer_ids=[1], batch_size=1))
+    parquet = b''.join(stream_export(format='parquet', stats=(stats := {})))
+
+    table = pa.ipc.open_stream(arrow).read_all()
+    assert table.schema == SCHEMA
+    assert sorted(zip(table.column('hole_number').to_pylist(),
+                      table.column('strokes').to_pylist())) == [(1, 4), (2, 5), (3, 6), (4, None)]
+    assert pq.read_table(io.BytesIO(parquet)).num_rows == stats['rows'] == 10
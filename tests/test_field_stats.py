@@ -0,0 +1,44 @@
+import pytest
+
+import field_stats
+from field_stats import hole_stats, rebuild_field_stats
+
+
+@pytest.fixture(autouse=True)
+def clear_field_stats():
+    # Each test's database starts empty, but workers keep their copies
+    field_stats._stats.clear()
+    field_stats._loaded_at.clear()
+
+
+def post(client, round_id, hole_number, strokes, putts=2):
+    response = client.post(f'/record_performance/{round_id}/{hole_number}',
+                           data={'strokes': strokes, 'number_of_putts': putts})
+    assert response.status_code == 302
+
+
+def test_posted_holes_match_a_rebuild(tournament_round, login):
+    for golfer_id, scores in ((1, [3, 4, 6]), (2, [4, 5, 2]), (3, [5, 4, 4])):
+        client = login(golfer_id)
+        for hole_number, strokes in enumerate(scores, start=1):
+            post(client, golfer_id, hole_number, strokes)
+    # A correction moves the hole from one bucket to another
+    post(login(3), 3, 1, 4, putts=1)
+
+    incremental = hole_stats(1)
+    rebuild_field_stats(1)
+
+    assert incremental == hole_stats(1)
+    first = next(hole for hole in incremental if hole['hole_number'] == 1)
+    assert (first['holes_played'], first['birdies'], first['pars'], first['bogeys']) \
+        == (3, 1, 2, 0)
+    assert first['putts_average'] == round(5 / 3, 2)
+
+
+def test_hardest_hole_ranks_first(tournament_round, login):
+    client = login(1)
+    for hole_number, strokes in enumerate([4, 6, 3], start=1):
+        post(client, 1, hole_number, strokes)
+
+    assert [(hole['hole_number'], hole['difficulty_rank']) for hole in hole_stats(1)] \
+        == [(2, 1), (1, 2), (3, 3)]
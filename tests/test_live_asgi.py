@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from models import db, HoleFieldStat
+
+
+# The live app reads through asyncpg
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL', '').startswith('postgres'),
+    reason='needs TEST_DATABASE_URL pointing at Postgres')
+
+
+class CountingPool:
+    def __init__(self, pool):
+        self.pool = pool
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append(query)
+        return await self.pool.fetch(query, *args)
+
+
+async def hole_stats_bodies(monkeypatch, read_again):
+    import asyncpg
+    import live_asgi
+
+    monkeypatch.setenv('DATABASE_URL', os.environ['TEST_DATABASE_URL'])
+    monkeypatch.delenv('REPLICA_DATABASE_URL', raising=False)
+    pool = CountingPool(await asyncpg.create_pool(
+        live_asgi.database_dsn(), min_size=1, max_size=2))
+    try:
+        feed = live_asgi.HoleStatsFeed(1)
+        bodies = []
+        for _ in range(3):
+            await asyncio.gather(*(feed.refresh(pool) for _ in range(10)))
+            bodies.append(feed.body)
+            read_again(feed)
+        return bodies, pool.queries
+    finally:
+        await pool.pool.close()
+
+
+def test_hole_stats_are_read_once_per_refresh(tournament_round, monkeypatch):
+    db.session.add(HoleFieldStat(tournament_id=1, course_id=1, hole_number=1, par=4,
+                                 holes_played=2, total_strokes=9, total_putts=4,
+                                 pars=1, bogeys=1))
+    db.session.commit()
+
+    def add_a_birdie(feed):
+        HoleFieldStat.query.update({HoleFieldStat.holes_played: HoleFieldStat.holes_played + 1,
+                                    HoleFieldStat.birdies: HoleFieldStat.birdies + 1})
+        db.session.commit()
+
+    bodies, queries = asyncio.run(hole_stats_bodies(monkeypatch, add_a_birdie))
+
+    # Every request inside the refresh interval shares the first one's read
+    assert len(queries) == 1
+    assert bodies[0] == bodies[1] == bodies[2]
+    assert json.loads(bodies[0])[0]['holes_played'] == 2
+
+
+def test_stale_hole_stats_are_read_again(tournament_round, monkeypatch):
+    db.session.add(HoleFieldStat(tournament_id=1, course_id=1, hole_number=1, par=4,
+                                 holes_played=0))
+    db.session.commit()
+
+    def add_a_hole(feed):
+        HoleFieldStat.query.update({HoleFieldStat.holes_played: HoleFieldStat.holes_played + 1})
+        db.session.commit()
+        feed.refreshed_at = 0.0
+
+    bodies, queries = asyncio.run(hole_stats_bodies(monkeypatch, add_a_hole))
+
+    assert len(queries) == 3
+    assert [json.loads(body)[0]['holes_played'] for body in bodies] == [0, 1, 2]
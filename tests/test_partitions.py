@@ -0,0 +1,35 @@
+from datetime import date
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+import partitions
+from partitions import ARCHIVE_SCHEMAS
+from models import db, RoundStroke
+
+
+# Archives read partitions with raw SQL, which needs Postgres column types
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL', '').startswith('postgres'),
+    reason='needs TEST_DATABASE_URL pointing at Postgres')
+
+
+def test_archive_keeps_its_schema_when_a_batch_starts_with_nulls(
+        tournament_round, tmp_path, monkeypatch):
+    monkeypatch.setattr(partitions, 'ARCHIVE_BATCH_SIZE', 1)
+    db.session.add(RoundStroke(id=1, golfer_id=1, round_course_id=1, hole_number=1,
+                               date_of_round=date(2026, 5, 1)))
+    db.session.add(RoundStroke(id=2, golfer_id=1, round_course_id=1, hole_number=2,
+                               strokes=5, fairway_hit=True, date_of_round=date(2026, 5, 1)))
+    db.session.commit()
+    path = tmp_path / 'rounds_strokes_2026.parquet'
+
+    written = partitions._write_parquet(
+        'rounds_strokes', 'rounds_strokes WHERE golfer_id = :golfer_id ORDER BY id',
+        str(path), {'golfer_id': 1})
+
+    table = pq.read_table(path)
+    assert written == 2
+    assert table.schema == ARCHIVE_SCHEMAS['rounds_strokes']
+    assert table.column('strokes').to_pylist() == [None, 5]
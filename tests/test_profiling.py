@@ -0,0 +1,55 @@
+import os
+import pstats
+
+import pytest
+
+from app import create_app
+from models import db
+import profiling
+
+
+@pytest.fixture
+def app(tmp_path):
+    profiling.reset_timings()
+    app = create_app({'SQLALCHEMY_DATABASE_URI': os.environ.get('TEST_DATABASE_URL', 'sqlite://'),
+                      'SECRET_KEY': 'test', 'TESTING': True, 'PROFILING': True,
+                      'PROFILE_TOKEN': 'token', 'PROFILE_DIR': str(tmp_path)})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_requests_are_split_into_phases(tournament_round, app):
+    client = app.test_client()
+
+    response = client.get('/api/tournaments/1/standings')
+
+    phases = dict(part.split(';dur=') for part in response.headers['Server-Timing'].split(', '))
+    assert sorted(phases) == sorted(profiling.PHASES)
+    assert float(phases['db']) > 0 and float(phases['serialize']) > 0
+    assert float(phases['total']) >= float(phases['db']) + float(phases['serialize'])
+
+    assert client.get('/api/profiling/timings').status_code == 403
+    timings = client.get('/api/profiling/timings',
+                         headers={'X-Profile-Token': 'token'}).json['routes']
+    assert timings['results.tournament_standings_api']['total']['count'] == 1
+
+
+@pytest.mark.parametrize('profile_format', profiling.PROFILE_FORMATS)
+def test_profile_on_demand(tournament_round, app, tmp_path, profile_format):
+    client = app.test_client()
+    url = '/api/tournaments/1/standings'
+
+    assert 'X-Profile-File' not in client.get(
+        url, headers={'X-Profile': profile_format, 'X-Profile-Token': 'wrong'}).headers
+    response = client.get(url, headers={'X-Profile': profile_format,
+                                        'X-Profile-Token': 'token'})
+
+    filename = response.headers['X-Profile-File']
+    assert filename.endswith('.' + profile_format)
+    # A request this quick may finish before the sampler's first sample
+    assert (tmp_path / filename).exists()
+    if profile_format == 'pstats':
+        assert pstats.Stats(str(tmp_path / filename)).total_calls > 0
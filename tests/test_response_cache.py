@@ -0,0 +1,57 @@
+from datetime import date
+
+from models import db, RoundStroke
+import response_cache
+
+
+def post_hole(golfer_id, hole_number, strokes):
+    db.session.add(RoundStroke(golfer_id=golfer_id, round_course_id=golfer_id,
+                               hole_number=hole_number, strokes=strokes,
+                               date_of_round=date(2026, 5, 1)))
+    db.session.commit()
+
+
+def test_unchanged_response_is_not_modified(tournament_round, app):
+    client = app.test_client()
+    url = '/api/tournaments/1/standings'
+
+    first = client.get(url)
+    again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200 and first.headers['ETag']
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+def test_compressed_responses_have_their_own_etag(tournament_round, app, monkeypatch):
+    monkeypatch.setattr(response_cache, 'COMPRESS_MIN_SIZE', 0)
+    client = app.test_client()
+    url = '/api/tournaments/1/standings'
+
+    plain = client.get(url)
+    gzipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert client.get(url, headers={'Accept-Encoding': 'gzip',
+                                    'If-None-Match': plain.headers['ETag']}).status_code == 200
+
+
+def test_responses_that_depend_on_the_user_are_private(tournament_round, app):
+    client = app.test_client()
+
+    for url in ('/tournament_results?tournament_id=1', '/api/tournaments/1/projections'):
+        assert client.get(url).headers['Cache-Control'].startswith('private')
+    assert client.get('/api/tournaments/1/standings').headers['Cache-Control'] \
+        .startswith('public')
+
+
+def test_scorecard_is_only_served_to_its_golfer(tournament_round, login):
+    post_hole(1, 1, 5)
+
+    scorecard = login(1).get('/api/rounds/1/scorecard')
+
+    assert scorecard.status_code == 200
+    assert scorecard.json['strokes'][0] == 5 and scorecard.json['to_par'] == 1
+    assert login(2).get('/api/rounds/1/scorecard').status_code == 404
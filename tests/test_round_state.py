@@ -0,0 +1,42 @@
+from sqlalchemy import event
+
+from models import db
+from round_state import get_round_state, next_scoring_version, record_hole
+
+
+def count_queries():
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_cached_state_is_read_without_the_database(tournament_round):
+    state = get_round_state(1)
+    statements = count_queries()
+
+    assert get_round_state(1) is state
+    assert get_round_state(1).par(1) == 4
+    assert statements == []
+
+
+def test_posted_hole_updates_the_cached_state(tournament_round):
+    get_round_state(1)
+    version = next_scoring_version(1)
+    db.session.commit()
+
+    record_hole(1, 1, 5, version)
+
+    state = get_round_state(1)
+    assert (state.entered(1), state.version, state.to_par) == (5, version, 1)
+
+
+def test_state_that_missed_a_post_is_reloaded(tournament_round):
+    get_round_state(1)
+    # Another worker's post, which this worker's store never saw
+    next_scoring_version(1)
+    version = next_scoring_version(1)
+    db.session.commit()
+
+    assert record_hole(1, 1, 5, version) is None
+    assert get_round_state(1).version == version
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func
+
+from conftest import add_round
+from models import db, Leaderboard, ScoreEvent, Tournament
+import score_events
+from score_events import latest_checkpoint, rebuild_leaderboard, replay
+from tournament_scoring import CutRule
+
+
+def post_hole(client, round_id, hole_number, strokes):
+    response = client.post(f'/record_performance/{round_id}/{hole_number}',
+                           data={'strokes': str(strokes)})
+    assert response.status_code == 302
+
+
+def leaderboard():
+    return [(entry.golfer_id, entry.score, entry.to_par, entry.position,
+             entry.holes_played, entry.rounds_played, entry.cut_score)
+            for entry in Leaderboard.query.order_by(Leaderboard.golfer_id)]
+
+
+def test_posted_holes_move_the_leaderboard_as_a_replay_would(tournament_round, login):
+    tournament = db.session.get(Tournament, 1)
+    tournament.live_details = {'cut': CutRule(top_n=1, after_round=1).toJSON()}
+    add_round(4, 1, date(2026, 5, 2))
+    db.session.commit()
+
+    for golfer_id, scores in ((1, [3, 4, 5]), (2, [4, 4, 4]), (3, [5, 5, 3])):
+        client = login(golfer_id)
+        for hole_number, strokes in enumerate(scores, start=1):
+            post_hole(client, golfer_id, hole_number, strokes)
+    # A correction, and golfer 1 starting their second round
+    post_hole(login(3), 3, 3, 6)
+    post_hole(login(1), 4, 1, 5)
+
+    posted = leaderboard()
+    assert posted == [
+        (1, 17, 1, 2, 4, 2, 0),
+        (2, 12, 0, 1, 3, 1, 0),
+        (3, 16, 4, 3, 3, 1, 4),
+    ]
+
+    rebuild_leaderboard(1, use_checkpoints=False)
+    assert leaderboard() == posted
+
+
+def test_replay_from_a_checkpoint_matches_a_full_replay(tournament_round, login, monkeypatch):
+    monkeypatch.setattr(score_events, 'CHECKPOINT_EVERY', 4)
+    monkeypatch.setattr(score_events, 'CHECKPOINT_DELAY', timedelta(0))
+
+    for golfer_id, scores in ((1, [3, 4, 5, 4]), (2, [4, 4, 6]), (3, [5, 5, 3, 4, 4])):
+        client = login(golfer_id)
+        for hole_number, strokes in enumerate(scores, start=1):
+            post_hole(client, golfer_id, hole_number, strokes)
+    post_hole(login(2), 2, 2, 3)
+    post_hole(login(1), 1, 5, 4)
+
+    # Posting wrote the checkpoints, the last one short of the latest event
+    checkpoint = latest_checkpoint(1)
+    assert checkpoint is not None
+    assert 0 < checkpoint.event_id < db.session.query(func.max(ScoreEvent.event_id)).scalar()
+
+    from_checkpoint = replay(1)
+    from_start = replay(1, use_checkpoints=False)
+    assert from_checkpoint.event_id == from_start.event_id
+    assert from_checkpoint.golfers == from_start.golfers
+    assert from_checkpoint.standings() == from_start.standings()
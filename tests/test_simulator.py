@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from models import db, RoundStroke, Tournament
+import simulator
+from simulator import project_tournament
+from tournament_scoring import CutRule
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    simulator.clear_distribution_cache()
+    simulator._projections.clear()
+
+
+def post_round(golfer_id, strokes):
+    for hole_number, hole_strokes in enumerate(strokes, start=1):
+        db.session.add(RoundStroke(golfer_id=golfer_id, round_course_id=golfer_id,
+                                   hole_number=hole_number, strokes=hole_strokes,
+                                   date_of_round=date(2026, 5, 1)))
+
+
+def between_rounds(cut=None):
+    '''Golfers 1-3 have finished the first of two rounds, at -1, +1 and +10.'''
+    tournament = db.session.get(Tournament, 1)
+    tournament.live_details = {'rounds': 2, 'cut': cut.toJSON() if cut else None}
+    post_round(1, [3] + [4] * 17)
+    post_round(2, [5] + [4] * 17)
+    post_round(3, [5] * 10 + [4] * 8)
+    db.session.commit()
+
+
+def test_projections_between_rounds_simulate_the_rounds_to_come(tournament_round):
+    between_rounds()
+
+    projections = project_tournament(1, iterations=2000, version=1)
+
+    assert [projections[golfer_id]['holes_remaining'] for golfer_id in (1, 2, 3)] == [18] * 3
+    assert 0.5 < projections[1]['win'] < 1
+    assert 0 < projections[2]['win'] < projections[1]['win']
+    assert projections[1]['cut'] is None
+    # Projected totals are strokes over both rounds
+    assert 140 < projections[1]['projected_total'] < 160
+
+
+def test_projections_apply_the_tournaments_cut(tournament_round):
+    between_rounds(CutRule(top_n=2, after_round=1))
+
+    projections = project_tournament(1, iterations=2000, version=1)
+
+    assert [projections[golfer_id]['cut'] for golfer_id in (1, 2, 3)] == [1.0, 1.0, 0.0]
+    assert projections[3]['win'] == 0
+    assert projections[3]['projected_finish'] == 3
+    # Golfer 3 doesn't play the second round
+    assert projections[3]['projected_total'] == 82
@@ -0,0 +1,42 @@
+import pytest
+
+from models import db, Golfer, TeeTime, Tournament
+from tee_sheet import build_groups
+
+
+@pytest.mark.parametrize('field_size, sizes', [(5, [4, 1]), (9, [4, 3, 2]), (10, [4, 3, 3])])
+def test_requested_foursome_fits_any_field(field_size, sizes):
+    handicaps = {golfer_id: float(golfer_id) for golfer_id in range(1, field_size + 1)}
+
+    groups = build_groups(handicaps, requested_groups=[[1, 2, 3, 4]])
+
+    assert sorted(groups[0]) == [1, 2, 3, 4]
+    assert [len(group) for group in groups] == sizes
+    assert sorted(g for group in groups for g in group) == list(handicaps)
+
+
+def test_requested_groups_share_a_group_when_they_fit():
+    handicaps = {golfer_id: 0.0 for golfer_id in range(1, 9)}
+
+    groups = build_groups(handicaps, requested_groups=[[1, 2, 3], [4, 5], [6, 7]])
+
+    assert sorted(map(sorted, groups)) == [[1, 2, 3, 8], [4, 5, 6, 7]]
+
+
+def test_requested_group_larger_than_a_group_is_rejected():
+    with pytest.raises(ValueError):
+        build_groups({g: 0.0 for g in range(1, 9)}, requested_groups=[[1, 2, 3, 4, 5]])
+
+
+def test_only_the_organizer_or_an_admin_sets_the_tee_sheet(tournament_round, login):
+    db.session.get(Tournament, 1).organizer_id = 1
+    db.session.get(Golfer, 3).is_admin = True
+    db.session.commit()
+    url = '/api/tournaments/1/rounds/1/tee_times'
+    body = {'golfer_ids': [1, 2, 3], 'requested_groups': [[1, 2]]}
+
+    assert login(2).post(url, json=body).status_code == 403
+    assert TeeTime.query.count() == 0
+    assert login(1).post(url, json=body).status_code == 201
+    assert login(3).post(url, json=body).status_code == 201
+    assert TeeTime.query.count() == 3
@@ -0,0 +1,83 @@
+from datetime import date
+
+from models import db, Golfer, GolferRound, Round, Tournament
+from tournament_scoring import CutRule, rank_standings, tournament_standings
+
+
+def add_golfer(golfer_id, rounds):
+    db.session.add(Golfer(golfer_id=golfer_id, golfer_name=f'golfer {golfer_id}',
+                          username=f'golfer{golfer_id}', email=f'{golfer_id}@example.com',
+                          password='x'))
+    for number, strokes in enumerate(rounds, start=1):
+        round_id = golfer_id * 10 + number
+        db.session.add(Round(round_id=round_id, golfer_id=golfer_id, tournament_id=1,
+                             date_of_round=date(2026, 5, number)))
+        db.session.add(GolferRound(golfer_id=golfer_id, round_id=round_id,
+                                   total_strokes=strokes, total_holes=18))
+
+
+def test_golfers_who_missed_the_cut_rank_behind_the_field(app):
+    db.session.add(Tournament(tournament_id=1, name='Invitational', type='tournament'))
+    add_golfer(1, [70, 70, 70])
+    add_golfer(2, [72, 72, 72])
+    add_golfer(3, [80, 80])
+    add_golfer(4, [85, 85])
+    db.session.commit()
+
+    rows = tournament_standings(1, CutRule(top_n=2))
+
+    assert [(row[0], row[2], row[4], row[8]) for row in rows] == [
+        (1, 1, 210, True),
+        (2, 2, 216, True),
+        (3, 3, 160, False),
+        (4, 4, 170, False),
+    ]
+    # Strokes behind only compares golfers who played the same rounds
+    assert [row[5] for row in rows] == [0, 6, 0, 10]
+
+
+def test_cut_uses_totals_through_the_cut_round():
+    # Golfer 3 leads after three rounds but was outside the top two after two
+    golfers = [(1, 215, 3, 140), (2, 216, 3, 144), (3, 214, 3, 146), (4, 150, 2, 150)]
+
+    ranked = rank_standings(golfers, CutRule(top_n=2))
+
+    assert [(golfer_id, position, made_cut) for golfer_id, position, _, _, made_cut in ranked] == [
+        (1, 1, True), (2, 2, True), (3, 3, False), (4, 4, False)]
+
+
+def test_nobody_is_cut_before_the_cut_round():
+    golfers = [(1, 70, 1, None), (2, 80, 1, None)]
+
+    ranked = rank_standings(golfers, CutRule(top_n=1))
+
+    assert [row[4] for row in ranked] == [True, True]
+
+
+def test_standings_judge_the_cut_on_totals_through_the_cut_round(app):
+    db.session.add(Tournament(tournament_id=1, name='Invitational', type='tournament'))
+    add_golfer(1, [70, 70, 75])
+    add_golfer(2, [72, 72, 72])
+    add_golfer(3, [73, 73, 68])
+    add_golfer(4, [75, 75])
+    db.session.commit()
+
+    rows = tournament_standings(1, CutRule(top_n=2))
+
+    assert [(row[0], row[2], row[3], row[8]) for row in rows] == [
+        (1, 1, False, True), (2, 2, False, True), (3, 3, False, False), (4, 4, False, False)]
+
+
+def test_standings_share_positions_between_ties(app):
+    db.session.add(Tournament(tournament_id=1, name='Invitational', type='tournament'))
+    add_golfer(1, [70, 72])
+    add_golfer(2, [71, 71])
+    add_golfer(3, [74, 70])
+    add_golfer(4, [80, 80])
+    db.session.commit()
+
+    rows = tournament_standings(1, CutRule(within_strokes=10))
+
+    assert [(row[0], row[2], row[3], row[5], row[8]) for row in rows] == [
+        (1, 1, True, 0, True), (2, 1, True, 0, True), (3, 3, False, 2, True),
+        (4, 4, False, 0, False)]
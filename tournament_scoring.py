@@ -0,0 +1,281 @@
+'''Multi-round tournament scoring and cut-line computation'''
+
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import case, func, literal, or_, select, update
+
+from models import db, Golfer, GolferRound, Leaderboard, Round, TeeTime, Tournament, Result
+from live_leaderboard import next_leaderboard_version, record_leaderboard, save_leaderboard
+
+
+# Columns stored for each golfer in Result.leaderboard, in order
+RESULT_FIELDS = ('golfer_id', 'golfer_name', 'position', 'tied',
+                 'total_strokes', 'strokes_behind', 'rounds_played',
+                 'holes_played', 'made_cut')
+
+
+class CutRule:
+    '''Who survives the cut once the leaders have played `after_round` rounds.
+
+    A golfer makes the cut if they are inside the top `top_n` (ties included)
+    or within `within_strokes` of the lead, both judged on totals through
+    `after_round` rounds only. Either limit can be left as None.
+    '''
+
+    def __init__(self, top_n=None, within_strokes=None, after_round=2):
+        self.top_n = top_n
+        self.within_strokes = within_strokes
+        self.after_round = after_round
+
+    def toJSON(self):
+        return {'top_n': self.top_n, 'within_strokes': self.within_strokes,
+                'after_round': self.after_round}
+
+    @classmethod
+    def fromJSON(cls, data):
+        if not data:
+            return None
+        return cls(data.get('top_n'), data.get('within_strokes'), data.get('after_round', 2))
+
+    def made_cut(self, golfers):
+        '''{golfer_id: made the cut} for (golfer_id, score, rounds_played, cut_score) rows.
+
+        `cut_score` is the golfer's score through `after_round` rounds, None
+        if they haven't played that many. Nobody is cut before the leaders
+        reach `after_round` rounds, and golfers still short of it stay in
+        until the leaders have moved on to the next round.
+        '''
+        golfers = list(golfers)
+        leader_rounds = max((golfer[2] for golfer in golfers), default=0)
+        if leader_rounds < self.after_round or (
+                self.top_n is None and self.within_strokes is None):
+            return {golfer[0]: True for golfer in golfers}
+
+        cut_scores = sorted(golfer[3] for golfer in golfers if golfer[3] is not None)
+        made = {}
+        for golfer_id, _score, _rounds_played, cut_score in golfers:
+            if cut_score is None:
+                made[golfer_id] = leader_rounds == self.after_round
+                continue
+            made[golfer_id] = bool(
+                (self.top_n is not None
+                 and bisect_left(cut_scores, cut_score) < self.top_n)
+                or (self.within_strokes is not None
+                    and cut_score - cut_scores[0] <= self.within_strokes))
+        return made
+
+
+def tournament_cut_rule(tournament_id):
+    '''The cut stored in a tournament's live_details, if any.'''
+    live_details = db.session.query(Tournament.live_details).filter_by(
+        tournament_id=tournament_id).scalar()
+    return CutRule.fromJSON((live_details or {}).get('cut'))
+
+
+def tournament_rounds(tournament_id):
+    '''How many rounds a tournament is played over.
+
+    live_details['rounds'] when it is set, otherwise the most rounds on the
+    tee sheet, played by one golfer or implied by the cut (a round after it).
+    '''
+    live_details = db.session.query(Tournament.live_details).filter_by(
+        tournament_id=tournament_id).scalar() or {}
+    if live_details.get('rounds'):
+        return live_details['rounds']
+    scheduled = db.session.query(func.max(TeeTime.round_number)).filter(
+        TeeTime.tournament_id == tournament_id).scalar()
+    played = db.session.query(func.count()).filter(
+        Round.tournament_id == tournament_id).group_by(Round.golfer_id).order_by(
+        func.count().desc()).limit(1).scalar()
+    cut_rule = CutRule.fromJSON(live_details.get('cut'))
+    return max(scheduled or 0, played or 0, cut_rule.after_round + 1 if cut_rule else 1)
+
+
+def _cut_missed(golfers, cut_rule):
+    '''SQL for CutRule.made_cut(), 1 for golfers who missed the cut and 0 otherwise.'''
+    if cut_rule is None or (cut_rule.top_n is None and cut_rule.within_strokes is None):
+        return select(golfers.c.golfer_id, golfers.c.score, golfers.c.rounds_played,
+                      literal(0).label('missed_cut'))
+
+    # Window functions can't be nested, so the cut's inputs come first
+    cut = select(
+        golfers.c.golfer_id, golfers.c.score, golfers.c.rounds_played, golfers.c.cut_score,
+        func.max(golfers.c.rounds_played).over().label('leader_rounds'),
+        func.min(golfers.c.cut_score).over().label('cut_leader'),
+        func.rank().over(partition_by=golfers.c.cut_score.is_(None),
+                         order_by=golfers.c.cut_score).label('cut_rank'),
+    ).subquery()
+
+    inside = []
+    if cut_rule.top_n is not None:
+        inside.append(cut.c.cut_rank <= cut_rule.top_n)
+    if cut_rule.within_strokes is not None:
+        inside.append(cut.c.cut_score - cut.c.cut_leader <= cut_rule.within_strokes)
+    missed = case(
+        (cut.c.leader_rounds < cut_rule.after_round, 0),
+        (cut.c.cut_score.is_(None),
+         case((cut.c.leader_rounds == cut_rule.after_round, 0), else_=1)),
+        (or_(*inside), 0),
+        else_=1)
+    return select(cut.c.golfer_id, cut.c.score, cut.c.rounds_played,
+                  missed.label('missed_cut'))
+
+
+def ranked_standings(golfers, cut_rule=None, by_rounds=True):
+    '''Rank a (golfer_id, score, rounds_played, cut_score) subquery, lowest score first.
+
+    Golfers who made the cut come first. With `by_rounds` golfers are then
+    grouped by rounds played, most first, so stroke totals are only compared
+    between golfers who have played as many rounds; scores to par compare
+    across rounds and can leave it off. Positions come from RANK() so ties
+    share them, and `strokes_behind` is measured from the leader of the
+    golfer's group.
+
+    Returns a subquery of golfer_id, position, tied, strokes_behind and
+    made_cut, for joining back to wherever the scores came from.
+    '''
+    cut = _cut_missed(golfers, cut_rule).subquery()
+    group = [cut.c.missed_cut] + ([cut.c.rounds_played] if by_rounds else [])
+    order = [cut.c.missed_cut] + ([cut.c.rounds_played.desc()] if by_rounds else [])
+    return select(
+        cut.c.golfer_id,
+        func.rank().over(order_by=order + [cut.c.score.nulls_last()]).label('position'),
+        (func.count().over(partition_by=group + [cut.c.score]) > 1).label('tied'),
+        (cut.c.score - func.min(cut.c.score).over(partition_by=group)).label(
+            'strokes_behind'),
+        (cut.c.missed_cut == 0).label('made_cut'),
+    ).subquery()
+
+
+def rank_leaderboard(tournament_id, version, cut_rule=None):
+    '''Re-rank a tournament's Leaderboard rows by score to par in one UPDATE.
+
+    Rows whose position moved are stamped with `version`, which comes from
+    next_leaderboard_version() in the same transaction. The cut is judged
+    on each row's cut_score. Doesn't commit.
+    '''
+    golfers = select(
+        Leaderboard.golfer_id, Leaderboard.to_par.label('score'),
+        Leaderboard.rounds_played, Leaderboard.cut_score,
+    ).where(Leaderboard.tournament_id == tournament_id).subquery()
+    ranked = ranked_standings(golfers, cut_rule, by_rounds=False)
+    db.session.execute(update(Leaderboard).where(
+        Leaderboard.tournament_id == tournament_id,
+        Leaderboard.golfer_id == ranked.c.golfer_id,
+        Leaderboard.position.is_distinct_from(ranked.c.position),
+    ).values(position=ranked.c.position, version=version).execution_options(
+        synchronize_session=False))
+
+
+def rank_standings(golfers, cut_rule=None, by_rounds=True):
+    '''ranked_standings() for (golfer_id, score, rounds_played, cut_score) rows in memory.
+
+    Score replays rank states that are never written to the database (a
+    position history has one per interval), so they rank here instead.
+
+    Returns (golfer_id, position, tied, strokes_behind, made_cut) rows in order.
+    '''
+    golfers = list(golfers)
+    made = cut_rule.made_cut(golfers) if cut_rule is not None else {}
+
+    def group(golfer):
+        return (not made.get(golfer[0], True), -golfer[2] if by_rounds else 0)
+
+    order = sorted(golfers, key=lambda golfer: (group(golfer), golfer[1], golfer[0]))
+    ties = Counter((group(golfer), golfer[1]) for golfer in golfers)
+    leaders = {}
+    rows = []
+    position = 0
+    previous = None
+    for index, golfer in enumerate(order, start=1):
+        golfer_id, score = golfer[0], golfer[1]
+        key = (group(golfer), score)
+        if key != previous:
+            position, previous = index, key
+        leader = leaders.setdefault(key[0], score)
+        rows.append((golfer_id, position, ties[key] > 1, score - leader,
+                     made.get(golfer_id, True)))
+    return rows
+
+
+def tournament_standings(tournament_id, cut_rule=None):
+    '''Aggregate every golfer's rounds in a tournament into ranked standings.
+
+    Totals, and totals through the cut round, are summed in one grouped
+    query and ranked by ranked_standings() in the same statement. Returns
+    rows in RESULT_FIELDS order sorted by position.
+    '''
+    numbered = db.session.query(
+        GolferRound.golfer_id.label('golfer_id'),
+        GolferRound.total_strokes.label('total_strokes'),
+        GolferRound.total_holes.label('total_holes'),
+        func.row_number().over(
+            partition_by=GolferRound.golfer_id,
+            order_by=(Round.date_of_round, Round.round_id)).label('round_number'),
+    ).join(Round, Round.round_id == GolferRound.round_id).filter(
+        Round.tournament_id == tournament_id,
+        GolferRound.total_strokes.isnot(None),
+    ).subquery()
+
+    after_round = cut_rule.after_round if cut_rule is not None else 0
+    totals = db.session.query(
+        numbered.c.golfer_id.label('golfer_id'),
+        func.sum(numbered.c.total_strokes).label('score'),
+        func.sum(numbered.c.total_holes).label('holes_played'),
+        func.count().label('rounds_played'),
+        case((func.count() >= after_round, func.sum(case(
+            (numbered.c.round_number <= after_round, numbered.c.total_strokes),
+            else_=0)))).label('cut_score'),
+    ).group_by(numbered.c.golfer_id).subquery()
+    ranked = ranked_standings(totals, cut_rule)
+
+    rows = db.session.query(
+        totals.c.golfer_id, Golfer.golfer_name, ranked.c.position, ranked.c.tied,
+        totals.c.score, ranked.c.strokes_behind, totals.c.rounds_played,
+        totals.c.holes_played, ranked.c.made_cut,
+    ).join(ranked, ranked.c.golfer_id == totals.c.golfer_id).join(
+        Golfer, Golfer.golfer_id == totals.c.golfer_id).order_by(
+        ranked.c.position, totals.c.golfer_id)
+    return [tuple(row) for row in rows]
+
+
+def finalize_standings(tournament_id, cut_rule=None):
+    '''Compute standings and persist them.
+
+    Writes positions to the tournament's Leaderboard rows, stores a compact
+    snapshot in Result.leaderboard and publishes the change to polling clients.
+    `cut_rule` defaults to the tournament's own; the one used is saved back
+    to live_details so later score replays apply the same cut.
+    '''
+    tournament = Tournament.query.get(tournament_id)
+    if tournament is None:
+        return None
+
+    version = next_leaderboard_version(tournament_id)
+    if cut_rule is None:
+        cut_rule = tournament_cut_rule(tournament_id)
+    else:
+        tournament.live_details = dict(tournament.live_details or {},
+                                       cut=cut_rule.toJSON())
+    rows = tournament_standings(tournament_id, cut_rule)
+    save_leaderboard(tournament_id, version, [
+        (golfer_id, total_strokes, position, holes_played, rounds_played)
+        for (golfer_id, _name, position, _tied, total_strokes, _behind,
+             rounds_played, holes_played, _made_cut) in rows])
+
+    result = Result.query.get(tournament.results_id) if tournament.results_id else None
+    if result is None:
+        result = Result()
+        db.session.add(result)
+    result.leaderboard = {
+        'fields': RESULT_FIELDS,
+        'rows': [list(row) for row in rows],
+        'cut': cut_rule.toJSON() if cut_rule else None,
+    }
+    db.session.flush()
+    tournament.results_id = result.results_id
+    db.session.commit()
+
+    record_leaderboard(tournament_id)
+    return result
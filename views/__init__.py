@@ -0,0 +1,92 @@
+'''Blueprints for the Shore Tour Invitational app
+
+Every blueprint's URL rules are declared here so the whole URL map (and
+url_for) is available as soon as the app is created, but a blueprint's view
+module (and its forms, numpy, pyarrow...) is only imported the first time
+one of its routes is hit. Call load_all() to import everything up front,
+e.g. in a preforking server's master process.
+'''
+
+from importlib import import_module
+
+from flask import Blueprint
+from werkzeug.utils import cached_property
+
+
+BLUEPRINTS = {
+    'auth': [
+        ('/register', 'register', ['GET', 'POST']),
+        ('/login', 'login', ['GET', 'POST']),
+        ('/logout', 'logout', ['GET']),
+    ],
+    'golfers': [
+        ('/golfer/<int:golfer_id>', 'golfer', ['GET', 'PUT', 'DELETE']),
+        ('/all_golfers', 'all_golfers', ['GET']),
+        ('/api/golfers/<int:golfer_id>/stats', 'golfer_stats', ['GET']),
+    ],
+    'courses': [
+        ('/search_course', 'search_course', ['GET', 'POST']),
+        ('/courses/<int:course_id>', 'selected_course', ['GET']),
+    ],
+    'rounds': [
+        ('/start_round/<int:course_id>', 'start_round', ['POST']),
+        ('/record_performance/<int:round_id>/<int:hole_number>', 'record_performance', ['POST']),
+        ('/view_performance/<int:round_id>/<int:hole_number>', 'view_performance', ['GET']),
+        ('/api/rounds/<int:round_id>/scorecard', 'scorecard_api', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/rounds/<int:round_number>/tee_times',
+         'schedule_tee_times', ['POST']),
+        ('/api/exports/rounds', 'export_rounds_stream', ['GET']),
+    ],
+    'results': [
+        ('/match_results', 'match_results', ['GET']),
+        ('/stroke_results', 'stroke_results', ['GET']),
+        ('/tournament_results', 'tournament_results', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/leaderboard',
+         'tournament_leaderboard_api', ['GET']),
+        ('/tournaments/<int:tournament_id>/hole_stats', 'tournament_hole_stats', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/hole_stats',
+         'tournament_hole_stats_api', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/projections',
+         'tournament_projections_api', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/standings',
+         'tournament_standings_api', ['GET']),
+        ('/api/tournaments/<int:tournament_id>/position_history',
+         'tournament_position_history_api', ['GET']),
+    ],
+    'notifications': [
+        ('/notifications', 'notifications', ['GET']),
+        ('/mark_notification_as_read/<int:notification_id>',
+         'mark_notification_as_read', ['POST']),
+    ],
+}
+
+
+class LazyView:
+    '''View function stand-in that imports the real view on first call.'''
+
+    def __init__(self, module, name):
+        self.__module__ = module
+        self.__name__ = name
+
+    @cached_property
+    def view(self):
+        return getattr(import_module(self.__module__), self.__name__)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def register_blueprints(app):
+    for name, rules in BLUEPRINTS.items():
+        blueprint = Blueprint(name, f'{__name__}.{name}')
+        for rule, endpoint, methods in rules:
+            blueprint.add_url_rule(rule, endpoint, LazyView(f'{__name__}.{name}', endpoint),
+                                   methods=methods)
+        app.register_blueprint(blueprint)
+
+
+def load_all(app):
+    '''Import every view module now instead of on first request.'''
+    for view in app.view_functions.values():
+        if isinstance(view, LazyView):
+            view.view
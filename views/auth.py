@@ -0,0 +1,46 @@
+'''Registration, login and logout'''
+
+from flask import request, render_template, flash, url_for, redirect
+from flask_login import login_user, logout_user, login_required, current_user
+
+from models import db, bcrypt, Golfer
+from forms import RegistrationForm, LoginForm
+
+
+def register():
+    form = RegistrationForm(request.form)
+    if request.method == 'POST' and form.validate():
+        hashed_password = bcrypt.generate_password_hash(
+            form.password.data).decode('utf-8')
+        golfer = Golfer(golfer_name=form.golfer_name.data,
+                        username=form.username.data,
+                        password=hashed_password,
+                        email=form.email.data,
+                        GHIN=form.GHIN.data,
+                        handicap=form.handicap.data)
+        db.session.add(golfer)
+        db.session.commit()
+        flash('Your account has been created! You can now log in', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('golfers/register.html', form=form)
+
+
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('index'))
+    form = LoginForm(request.form)
+    if request.method == 'POST' and form.validate():
+        golfer = Golfer.query.filter_by(username=form.username.data).first()
+        if golfer and bcrypt.check_password_hash(golfer.password, form.password.data):
+            login_user(golfer)
+            next_page = request.args.get('next')
+            return redirect(next_page) if next_page else redirect(url_for('index'))
+        else:
+            flash('Login Unsuccessful. Please check username and password', 'danger')
+    return render_template('golfers/login.html', form=form)
+
+
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('index'))
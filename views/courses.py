@@ -0,0 +1,51 @@
+'''Course search'''
+
+from flask import abort, render_template, flash
+
+from db_routing import read_only
+from forms import SearchCourseForm
+from loaders import request_loaders
+from models import Course
+
+
+@read_only
+def search_course():
+    form = SearchCourseForm()
+    if form.validate_on_submit():
+        course_name = form.course_name.data
+        # Perform search in the database for courses with matching names
+        courses = Course.query.filter(
+            Course.course_name.ilike(f'%{course_name}%')).all()
+        if not courses:  # If no courses found in the database
+            # # Make a request to the external API to search for the course name
+            # api_url = f"https://example.com/api/search?course_name={course_name}"
+            # response = requests.get(api_url)
+            # if response.status_code == 200:
+            #     data = response.json()
+            #     if data:  # If API returns course data
+            #         return jsonify(data), 200
+            #     else:
+            #         return jsonify({'error': 'Course not found'}), 404
+            # else:
+            #     return jsonify({'error': 'Failed to fetch data from the API'}), 500
+            flash('No courses found', 'info')
+        else:
+            # Queue every listed course's tees and holes so the template's
+            # first lookup fetches them all in one IN (...) query each
+            loaders = request_loaders()
+            for course in courses:
+                loaders.course.prime(course.course_id, course)
+                loaders.tees_by_course.defer(course.course_id)
+                loaders.holes_by_course.defer(course.course_id)
+            return render_template('search_results.html', courses=courses)
+    return render_template('search_course.html', form=form)
+
+
+@read_only
+def selected_course(course_id):
+    # The template looks up the course's tees and holes through the request
+    # loaders, so repeated lookups share one query each
+    course = request_loaders().course.load(course_id)
+    if course is None:
+        abort(404)
+    return render_template('selected_course.html', course=course)
@@ -0,0 +1,62 @@
+'''Golfer management and golfer stats'''
+
+from flask import request, Response, jsonify
+
+import analytics
+from db_routing import read_only
+from forms import GolferEditForm
+from models import db, Golfer
+
+
+def golfer(golfer_id):
+    if request.method == 'GET':
+        golfer = Golfer.query.get(golfer_id)
+        if not golfer:
+            return Response(response="Golfer not found", status=404, mimetype="application/text")
+        return jsonify(golfer.toJSON()), 200
+
+    if request.method == 'PUT':
+        form = GolferEditForm(request.form)
+        if form.validate():
+            golfer = Golfer.query.get(golfer_id)
+            if not golfer:
+                return Response(response="Golfer not found", status=404, mimetype="application/text")
+            # Update golfer attributes
+            golfer.golfer_name = form.golfer_name.data
+            golfer.username = form.username.data
+            golfer.password = form.password.data
+            golfer.email = form.email.data
+            golfer.GHIN = form.GHIN.data
+            golfer.handicap = form.handicap.data
+            golfer.home_course = form.home_course.data
+            # Commit changes to the database
+            db.session.commit()
+            return jsonify(golfer.toJSON()), 200
+        else:
+            return jsonify(form.errors), 400
+
+    if request.method == 'DELETE':
+        golfer = Golfer.query.get(golfer_id)
+        if not golfer:
+            return Response(response="Golfer not found", status=404, mimetype="application/text")
+        # Delete golfer
+        db.session.delete(golfer)
+        db.session.commit()
+        return Response(response="Golfer deleted successfully", status=200, mimetype="application/text")
+
+
+@read_only
+def all_golfers():
+    golfers = Golfer.query.all()
+    if not golfers:
+        return Response(response="No Golfers found", status=204, mimetype="application/text")
+    else:
+        return jsonify([golfer.toJSON() for golfer in golfers]), 200
+
+
+@read_only
+def golfer_stats(golfer_id):
+    # Dashboard stats are read from the monthly rollups only
+    months = min(request.args.get('months', 12, type=int), 120)
+    return jsonify({'trend': analytics.golfer_trend(golfer_id, months),
+                    'percentiles': analytics.field_percentiles(golfer_id)}), 200
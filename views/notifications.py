@@ -0,0 +1,21 @@
+'''Golfer notifications'''
+
+from flask import render_template, flash, url_for, redirect
+from flask_login import current_user
+
+from models import db, Notification
+
+
+def notifications():
+    user_id = current_user.golfer_id  # Assuming you're using Flask-Login for user authentication
+    notifications = Notification.query.filter_by(
+        recipient_id=user_id, read=False).all()
+    return render_template('notifications.html', notifications=notifications)
+
+
+def mark_notification_as_read(notification_id):
+    notification = Notification.query.get_or_404(notification_id)
+    notification.read = True
+    db.session.commit()
+    flash('Notification marked as read.')
+    return redirect(url_for('notifications.notifications'))
@@ -0,0 +1,148 @@
+'''Match, stroke and tournament play results and live tournament data'''
+
+from datetime import datetime
+
+from flask import request, jsonify, render_template
+from flask_login import current_user
+
+from db_routing import read_only
+from field_stats import hole_stats
+from live_leaderboard import leaderboard_since, leaderboard_version
+from models import db, Golfer, Leaderboard, Tournament
+from response_cache import cached_response
+from score_events import STANDINGS_FIELDS, replay, position_history
+from simulator import project_tournament
+from tournament_scoring import CutRule, tournament_cut_rule
+
+
+# Monte Carlo iterations per projection; anonymous spectators get fewer
+MAX_ITERATIONS = 50000
+SPECTATOR_MAX_ITERATIONS = 10000
+
+
+def projection_iterations(default=10000):
+    '''?iterations= capped for the current user.'''
+    limit = MAX_ITERATIONS if current_user.is_authenticated else SPECTATOR_MAX_ITERATIONS
+    return max(1, min(request.args.get('iterations', default, type=int), limit))
+
+
+def retrieve_leaderboard_data(tournament_type):
+    '''Leaderboard rows for every tournament of one type, best position first.'''
+    return db.session.query(
+        Leaderboard.tournament_id, Leaderboard.golfer_id, Golfer.golfer_name,
+        Leaderboard.position, Leaderboard.score
+    ).join(Golfer, Golfer.golfer_id == Leaderboard.golfer_id
+           ).join(Tournament, Tournament.tournament_id == Leaderboard.tournament_id
+                  ).filter(Tournament.type == tournament_type
+                           ).order_by(Leaderboard.tournament_id, Leaderboard.position).all()
+
+
+def retrieve_match_leaderboard_data():
+    return retrieve_leaderboard_data('match')
+
+
+def retrieve_stroke_leaderboard_data():
+    return retrieve_leaderboard_data('stroke')
+
+
+def retrieve_tournament_leaderboard_data():
+    return retrieve_leaderboard_data('tournament')
+
+
+@read_only
+@cached_response(max_age=5)
+def match_results():
+    # Retrieve leaderboard data for match play from the database
+    leaderboard_entries = retrieve_match_leaderboard_data()
+    # Render the match results template with the leaderboard data
+    return render_template('match_play_results.html', leaderboard_entries=leaderboard_entries)
+
+
+@read_only
+@cached_response(max_age=5)
+def stroke_results():
+    # Retrieve leaderboard data for stroke play from the database
+    leaderboard_entries = retrieve_stroke_leaderboard_data()
+    # Render the stroke results template with the leaderboard data
+    return render_template('stroke_play_results.html', leaderboard_entries=leaderboard_entries)
+
+
+@read_only
+# private: spectators and signed-in golfers get different projections
+@cached_response(max_age=5, private=True)
+def tournament_results():
+    # Retrieve leaderboard data for tournament play from the database
+    leaderboard_entries = retrieve_tournament_leaderboard_data()
+    # Simulated chance to win / make the cut while the tournament is live
+    tournament_id = request.args.get('tournament_id', type=int)
+    projections = project_tournament(
+        tournament_id, iterations=projection_iterations(),
+        version=leaderboard_version(tournament_id)) if tournament_id else {}
+    # Render the tournament results template with the leaderboard data
+    return render_template('tournament_play_results.html', leaderboard_entries=leaderboard_entries, projections=projections)
+
+
+@read_only
+@cached_response(version=lambda tournament_id: leaderboard_version(
+    tournament_id, request.args.get('since', type=int)))
+def tournament_leaderboard_api(tournament_id):
+    # Polling clients pass the last version they saw and only get the rows
+    # that changed since then (or a full snapshot if that version is too old)
+    since = request.args.get('since', type=int)
+    return jsonify(leaderboard_since(tournament_id, since)), 200
+
+
+@read_only
+@cached_response(max_age=5)
+def tournament_hole_stats(tournament_id):
+    # Hole difficulty and scoring distribution, served from memory
+    return render_template('hole_stats.html', tournament_id=tournament_id, holes=hole_stats(tournament_id))
+
+
+@read_only
+@cached_response()
+def tournament_hole_stats_api(tournament_id):
+    return jsonify(hole_stats(tournament_id)), 200
+
+
+@read_only
+@cached_response(private=True, version=lambda tournament_id: (
+    leaderboard_version(tournament_id), projection_iterations()))
+def tournament_projections_api(tournament_id):
+    # Monte Carlo chance to win, make the cut and projected finish per golfer,
+    # simulated once per leaderboard version
+    # ?cut_top_n= and ?cut_within= try another cut after the tournament's cut round
+    top_n = request.args.get('cut_top_n', type=int)
+    within_strokes = request.args.get('cut_within', type=int)
+    cut_rule = tournament_cut_rule(tournament_id)
+    if top_n or within_strokes:
+        cut_rule = CutRule(top_n, within_strokes,
+                           cut_rule.after_round if cut_rule else CutRule().after_round)
+    projections = project_tournament(
+        tournament_id, iterations=projection_iterations(), cut_rule=cut_rule,
+        version=leaderboard_version(tournament_id))
+    return jsonify({str(golfer_id): projection for golfer_id, projection in projections.items()}), 200
+
+
+@read_only
+@cached_response()
+def tournament_standings_api(tournament_id):
+    # Standings replayed from the score event log, as of ?at= (ISO time) or now
+    at = request.args.get('at')
+    try:
+        until = datetime.fromisoformat(at) if at else None
+    except ValueError:
+        return jsonify({'error': 'at must be an ISO 8601 timestamp'}), 400
+    state = replay(tournament_id, until=until)
+    return jsonify({'tournament_id': tournament_id, 'event_id': state.event_id,
+                    'fields': STANDINGS_FIELDS,
+                    'rows': state.standings(tournament_cut_rule(tournament_id))}), 200
+
+
+@read_only
+@cached_response()
+def tournament_position_history_api(tournament_id):
+    # Position over time chart data, one point per interval of play
+    interval = max(request.args.get('interval', 300, type=int), 60)
+    golfer_ids = request.args.getlist('golfer_id', type=int)
+    return jsonify(position_history(tournament_id, interval, golfer_ids)), 200
@@ -0,0 +1,214 @@
+'''Starting and scoring rounds, tee sheets and round exports'''
+
+from datetime import datetime
+
+from flask import abort, current_app, request, Response, jsonify, render_template, url_for, redirect, stream_with_context
+from flask_login import login_required, current_user
+
+import analytics
+import exports
+from field_stats import record_round_stroke
+from live_leaderboard import record_leaderboard
+from models import db, Course, Tee, Round, RoundCourse, RoundStroke, Tournament
+from response_cache import cached_response
+from round_state import get_round_state, next_scoring_version, record_hole
+from score_events import add_score_event, apply_score_event, checkpoint_if_due
+from tee_sheet import schedule_round
+
+
+def start_round(course_id):
+    match_type = request.form.get('match_type')
+    number_of_holes = int(request.form.get('number_of_holes'))
+    teebox_id = int(request.form.get('teebox'))
+
+    # Get the course and teebox
+    course = Course.query.get(course_id)
+    teebox = Tee.query.get(teebox_id)
+
+    # Create a new round
+    new_round = Round.begin_round(
+        golfer_id=1, club_id=course.club_id, date_of_round=datetime.now())
+
+    # Associate the round with the selected course and teebox
+    round_course = RoundCourse(round_id=new_round.round_id, course_id=course_id, tee_id=teebox_id,
+                               sequence_number=1, number_of_holes=number_of_holes,
+                               date_of_round=new_round.date_of_round)
+    db.session.add(round_course)
+    db.session.commit()
+
+    # Hole pages are keyed by the round course and served from its round state
+    state = get_round_state(round_course.round_course_id)
+    if state is None:
+        abort(404)
+
+    # Render the golfer_round.html template and pass necessary data
+    return render_template('golfer_round.html', round_id=round_course.round_course_id, match_type=match_type, number_of_holes=number_of_holes, teebox=teebox, course=course,
+                           state=state, current_hole_number=1, previous_hole_number=None,
+                           next_hole_number=2 if state.has_hole(2) else None,
+                           current_hole_par=state.par(1), current_hole_yards=state.yardage(1))
+
+
+def record_performance(round_id, hole_number):
+    # Retrieve data from the form
+    strokes = request.form.get('strokes')
+    fairway_hit = request.form.get('fairway_hit')
+    green_in_reg = request.form.get('green_in_reg')
+    number_of_putts = request.form.get('number_of_putts')
+    bunker_shot = request.form.get('bunker_shot')
+
+    state = get_round_state(round_id)
+    if state is None or not state.has_hole(hole_number):
+        abort(404)
+
+    # A hole that was already posted is corrected in place. The round's date
+    # keeps the lookup to one season partition of rounds_strokes.
+    round_stroke = RoundStroke.query.filter_by(
+        golfer_id=current_user.golfer_id,  # Assuming current_user is the authenticated golfer
+        round_course_id=round_id, hole_number=hole_number,
+        date_of_round=state.date_of_round).first()
+    previous = None
+    if round_stroke is None:
+        round_stroke = RoundStroke(
+            golfer_id=current_user.golfer_id,
+            round_course_id=round_id,
+            # rounds_strokes is partitioned on the round's date
+            date_of_round=state.date_of_round,
+            hole_number=hole_number)
+        db.session.add(round_stroke)
+    else:
+        previous = {'strokes': round_stroke.strokes, 'fairway_hit': round_stroke.fairway_hit,
+                    'green_in_reg': round_stroke.green_in_reg,
+                    'number_of_putts': round_stroke.number_of_putts}
+
+    # Save the performance data to the database
+    round_stroke.strokes = strokes
+    round_stroke.fairway_hit = fairway_hit
+    round_stroke.green_in_reg = green_in_reg
+    round_stroke.number_of_putts = number_of_putts
+    round_stroke.bunker_shot = bunker_shot
+    # Logged, and the tournament leaderboard re-ranked, in the same
+    # transaction as the stroke itself
+    event = add_score_event(round_stroke, previous['strokes'] if previous else None)
+    if event is not None:
+        leaderboard_version = apply_score_event(event)
+    scoring_version = next_scoring_version(round_id)
+    db.session.commit()
+    if event is not None:
+        record_leaderboard(event.tournament_id)
+    record_round_stroke(round_stroke, (previous['strokes'], previous['number_of_putts'])
+                        if previous else None)
+    analytics.record_round_stroke(round_stroke, previous)
+    record_hole(round_id, hole_number, round_stroke.strokes, scoring_version)
+    if event is not None:
+        checkpoint_if_due(event.tournament_id, leaderboard_version)
+
+    # Redirect to the view performance page for the next hole
+    next_hole_number = hole_number + 1 if state.has_hole(hole_number + 1) else hole_number
+    return redirect(url_for('rounds.view_performance', round_id=round_id, hole_number=next_hole_number))
+
+
+def view_performance(round_id, hole_number):
+    # Course, tee and strokes entered so far come from the round state, not the database
+    state = get_round_state(round_id)
+    if state is None or not state.has_hole(hole_number):
+        abort(404)
+
+    # Check if there's a previous hole
+    previous_hole_number = hole_number - 1 if hole_number > 1 else None
+
+    # Check if there's a next hole
+    total_holes = state.number_of_holes
+    next_hole_number = hole_number + 1 if hole_number < total_holes else None
+
+    return render_template('golfer_round.html', round_id=round_id, current_hole_number=hole_number,
+                           previous_hole_number=previous_hole_number, next_hole_number=next_hole_number,
+                           current_hole_par=state.par(hole_number), current_hole_yards=state.yardage(hole_number),
+                           state=state)
+
+
+@login_required
+@cached_response(private=True)
+def scorecard_api(round_id):
+    # Scorecard for a round in progress, straight from its round state
+    state = get_round_state(round_id)
+    # Other golfers' rounds are reported as missing, not forbidden
+    if state is None or state.golfer_id != current_user.golfer_id:
+        return jsonify({'error': 'Round not found'}), 404
+    scorecard = state.toJSON()
+    scorecard.update(total=state.total, to_par=state.to_par, holes_played=state.holes_played)
+    return jsonify(scorecard), 200
+
+
+@login_required
+def schedule_tee_times(tournament_id, round_number):
+    # Pair the field for a round and write the tee sheet before play starts
+    tournament = Tournament.query.get(tournament_id)
+    if tournament is None:
+        return jsonify({'error': 'Tournament not found'}), 404
+    if not (current_user.is_admin or tournament.organizer_id == current_user.golfer_id):
+        return jsonify({'error': 'Only the tournament organizer can set the tee sheet'}), 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'expected a JSON object'}), 400
+    golfer_ids = data.get('golfer_ids')
+    if not golfer_ids:
+        return jsonify({'error': 'golfer_ids is required'}), 400
+    requested_groups = data.get('requested_groups', [])
+    first_tee_time = data.get('first_tee_time')
+    interval_minutes = data.get('interval_minutes', 10)
+    shotgun = data.get('shotgun', False)
+    # Checked here so a wrongly typed field is a 400, not a 500 from deep in the scheduler
+    if not _is_list_of(golfer_ids, int):
+        return jsonify({'error': 'golfer_ids must be a list of golfer ids'}), 400
+    if not isinstance(requested_groups, list) or not all(
+            _is_list_of(group, int) for group in requested_groups):
+        return jsonify({'error': 'requested_groups must be a list of lists of golfer ids'}), 400
+    if first_tee_time is not None and not isinstance(first_tee_time, str):
+        return jsonify({'error': 'first_tee_time must be an ISO 8601 timestamp'}), 400
+    if isinstance(interval_minutes, bool) or not isinstance(interval_minutes, (int, float)) \
+            or interval_minutes <= 0:
+        return jsonify({'error': 'interval_minutes must be a positive number'}), 400
+    if not isinstance(shotgun, bool):
+        return jsonify({'error': 'shotgun must be true or false'}), 400
+    try:
+        groups = schedule_round(
+            tournament_id, round_number, golfer_ids,
+            requested_groups=requested_groups,
+            first_tee_time=datetime.fromisoformat(
+                first_tee_time) if first_tee_time else None,
+            interval_minutes=interval_minutes,
+            shotgun=shotgun)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(groups), 201
+
+
+def _is_list_of(value, kind):
+    return isinstance(value, list) and all(
+        isinstance(item, kind) and not isinstance(item, bool) for item in value)
+
+
+@login_required
+def export_rounds_stream():
+    # Stream the export straight from a server-side cursor, batch by batch
+    export_format = request.args.get('format', 'arrow')
+    if export_format not in exports.FORMATS:
+        return jsonify({'error': f'format must be one of {exports.FORMATS}'}), 400
+    start = request.args.get('start')
+    end = request.args.get('end')
+    stats = {}
+    chunks = exports.stream_export(
+        format=export_format, stats=stats,
+        start_date=datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+        end_date=datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+        golfer_ids=request.args.getlist('golfer_id', type=int))
+    logger = current_app.logger
+
+    def generate():
+        yield from chunks
+        logger.info('Exported %s rows in %.2fs', stats.get('rows'), stats.get('seconds', 0))
+
+    extension = 'parquet' if export_format == 'parquet' else 'arrows'
+    mimetype = 'application/vnd.apache.parquet' if export_format == 'parquet' else 'application/vnd.apache.arrow.stream'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=rounds.{extension}'})